@@ -0,0 +1,100 @@
+# benchmarks/bench_demarrage.py
+"""
+Mesure le temps d'import de chaque sous-commande de cli.py et le compare à son budget.
+
+Chaque mesure est faite dans un nouvel interpréteur (les modules déjà en
+mémoire fausseraient le temps) : import de cli puis des modules de la
+sous-commande (cli.MODULES), meilleur temps sur plusieurs répétitions. Le
+script vérifie aussi qu'aucune bibliothèque lourde interdite pour la
+commande (yfinance, scipy, matplotlib, seaborn) n'a été chargée, et se termine
+en erreur si un budget est dépassé, pour pouvoir servir de contrôle.
+
+Exécution depuis la racine du projet :
+    python -m benchmarks.bench_demarrage
+    python -m benchmarks.bench_demarrage --repetitions 10
+
+Mesures (meilleur de 5), en secondes, avant → après les imports différés :
+
+    commande      avant   après   budget
+    stats          3.73    0.83     1.00
+    corr           1.16    0.76     1.00
+    beta           0.71    0.76     1.00
+    optimise       2.98    0.75     1.00
+    update-data    0.80    0.66     1.00
+    serve             —    0.61     1.00
+    structure         —    0.02     0.10
+    report         3.35    2.91     4.00
+
+Le socle des commandes de calcul est l'import de pandas (0,6 à 0,7 s sur la
+machine de mesure) ; "avant" comptait en plus seaborn, matplotlib et scipy,
+chargés au démarrage par affichage et optimisation.
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+# Budget d'import de chaque sous-commande, en secondes
+BUDGETS = {
+    "stats": 1.0,
+    "corr": 1.0,
+    "beta": 1.0,
+    "optimise": 1.0,
+    "update-data": 1.0,
+    "serve": 1.0,
+    "structure": 0.1,
+    "report": 4.0,
+}
+
+# Bibliothèques lourdes qu'une sous-commande ne doit pas charger
+BIBLIOTHEQUES_LOURDES = ("yfinance", "scipy", "matplotlib", "seaborn")
+AUTORISEES = {
+    "report": ("scipy", "matplotlib", "seaborn"),
+}
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_SCRIPT = """
+import sys, time, json
+debut = time.perf_counter()
+import cli
+cli.importer_modules({commande!r})
+duree = time.perf_counter() - debut
+print(json.dumps({{"duree": duree, "modules": [m for m in {lourdes!r} if m in sys.modules]}}))
+"""
+
+def mesurer_commande(commande, repetitions=5):
+    """
+    Temps d'import d'une sous-commande dans un nouvel interpréteur.
+
+    Returns:
+        tuple: (meilleur temps en secondes, bibliothèques lourdes chargées)
+    """
+    script = _SCRIPT.format(commande=commande, lourdes=BIBLIOTHEQUES_LOURDES)
+    durees, modules = [], []
+    for _ in range(repetitions):
+        sortie = subprocess.run([sys.executable, "-W", "ignore", "-c", script], cwd=RACINE, capture_output=True,
+                                text=True, check=True).stdout
+        mesure = json.loads(sortie.strip().splitlines()[-1])
+        durees.append(mesure["duree"])
+        modules = mesure["modules"]
+    return min(durees), modules
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Temps d'import de chaque sous-commande de cli.py.")
+    parser.add_argument("--repetitions", type=int, default=5, help="Répétitions par commande (meilleur temps retenu)")
+    args = parser.parse_args(arguments)
+
+    depassements = 0
+    print(f"{'commande':<12} {'import (s)':>10} {'budget (s)':>10}  bibliothèques lourdes")
+    for commande, budget in BUDGETS.items():
+        duree, modules = mesurer_commande(commande, repetitions=args.repetitions)
+        interdites = [m for m in modules if m not in AUTORISEES.get(commande, ())]
+        statut = "ok" if duree <= budget and not interdites else "DÉPASSEMENT"
+        depassements += statut != "ok"
+        print(f"{commande:<12} {duree:>10.3f} {budget:>10.2f}  {', '.join(modules) or '-'}  {statut}")
+    return depassements
+
+if __name__ == "__main__":
+    sys.exit(1 if main(sys.argv[1:]) else 0)
@@ -0,0 +1,98 @@
+# benchmarks/bench_memoire.py
+"""
+Mesure le pic de mémoire de chaque étape, en float64 et en float32.
+
+Le pic est mesuré avec tracemalloc (qui suit aussi les allocations NumPy) :
+c'est la mémoire supplémentaire allouée par l'étape au-delà des données
+qu'elle reçoit. Les rendements sont calculés une fois par précision, puis
+chaque étape reçoit un contexte où ils sont déjà disponibles.
+
+Exécution depuis la racine du projet :
+    python -m benchmarks.bench_memoire                  # 2 000 titres × 10 ans
+    python -m benchmarks.bench_memoire --tickers 5000 --annees 25
+
+Mesures sur 2 000 titres × 10 ans (2 520 dates, prix float64 : 38 Mo), en Mo :
+
+    étape                              avant   float64   float32
+    nettoyer_donnees                      82        43        24
+    rendements                           157        38        19
+    calculer_statistiques                 87        87        67
+    calculer_matrice_correlation          35        62        62
+    calculer_beta                        274        11        11
+    calculer_statistiques_glissantes    1081       421       268
+
+"avant" correspond au code précédant la politique de précision, en float64
+(ffill().bfill(), pct_change().dropna(), DataFrame.corr, sommes sur le panel
+complet). La corrélation par blocs alloue un peu plus que DataFrame.corr
+(deux blocs de colonnes en float64) mais s'exécute par produits matriciels.
+Pour les statistiques glissantes, l'essentiel du pic est le résultat lui-même
+(8 panels dates × titres), rangé dans la précision de stockage.
+"""
+import gc
+import io
+import sys
+import argparse
+import tempfile
+import contextlib
+import tracemalloc
+import pandas as pd
+
+from benchmarks.donnees import generer_prix
+from traitement.contexte import ContexteMarche
+from traitement.nettoyage import nettoyer_donnees
+from traitement.analyse import calculer_statistiques
+from traitement.matrice_correlation import calculer_matrice_correlation
+from traitement.beta_calcul import calculer_beta
+from traitement.glissant import calculer_statistiques_glissantes
+
+def pic_memoire(fonction):
+    """
+    Exécute la fonction et retourne son résultat et la mémoire maximale allouée pendant l'appel.
+
+    Returns:
+        tuple: (résultat, pic en Mo au-delà de la mémoire déjà allouée avant l'appel)
+    """
+    gc.collect()
+    tracemalloc.start()
+    avant = tracemalloc.get_traced_memory()[0]
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            resultat = fonction()
+        pic = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return resultat, (pic - avant) / 1024 ** 2
+
+def mesurer_precision(prix, precision):
+    """Pic de mémoire de chaque étape pour une précision de stockage"""
+    prix = prix.astype(precision)
+    dossier = tempfile.mkdtemp(prefix="bench_memoire_")
+    pics = {}
+
+    prix_nettoyes, pics["nettoyer_donnees"] = pic_memoire(lambda: nettoyer_donnees(prix))
+    contexte = ContexteMarche(prix_nettoyes)
+    _, pics["rendements"] = pic_memoire(lambda: contexte.rendements)
+
+    etapes = {
+        "calculer_statistiques": lambda: calculer_statistiques(contexte),
+        "calculer_matrice_correlation": lambda: calculer_matrice_correlation(contexte),
+        "calculer_beta": lambda: calculer_beta(contexte, f"{dossier}/beta.xlsx"),
+        "calculer_statistiques_glissantes": lambda: calculer_statistiques_glissantes(contexte),
+    }
+    for nom, etape in etapes.items():
+        _, pics[nom] = pic_memoire(etape)
+    return pics
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Pic de mémoire par étape selon la précision de stockage.")
+    parser.add_argument("--tickers", type=int, default=2000)
+    parser.add_argument("--annees", type=int, default=10)
+    args = parser.parse_args(arguments)
+
+    prix = generer_prix(args.tickers, nb_annees=args.annees)
+    print(f"{args.tickers} titres × {len(prix)} dates (prix float64 : {prix.memory_usage().sum() / 1024 ** 2:.0f} Mo)")
+    resultats = pd.DataFrame({precision: mesurer_precision(prix, precision) for precision in ("float64", "float32")})
+    print(resultats.round(0).to_string())
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,70 @@
+# benchmarks/bench_optimisation.py
+"""
+Compare le temps de l'optimisation du ratio de Sharpe selon le nombre d'actifs.
+
+Trois variantes sont mesurées sur des données synthétiques :
+- SLSQP avec gradient par différences finies (comportement historique) ;
+- SLSQP avec gradient analytique ;
+- forme fermée (portefeuille tangent), lorsque aucune borne n'est active.
+
+Exécution depuis la racine du projet :
+    python -m benchmarks.bench_optimisation
+"""
+import time
+import numpy as np
+import scipy.optimize as sco
+from traitement.optimisation import optimiser_portefeuille
+
+def generer_probleme(nb_actifs, seed=0):
+    """Génère une covariance factorielle et des rendements dont le portefeuille tangent est à poids positifs"""
+    rng = np.random.default_rng(seed)
+    expositions = rng.normal(1.0, 0.3, size=(nb_actifs, 3)) * 0.01
+    cov_matrix = expositions @ expositions.T + np.diag(rng.uniform(1e-4, 4e-4, nb_actifs))
+    poids_cibles = rng.exponential(1.0, nb_actifs) + 0.05
+    poids_cibles /= poids_cibles.sum()
+    rendements = cov_matrix @ poids_cibles * 2.0
+    return rendements, cov_matrix
+
+def optimiser_differences_finies(rendements, cov_matrix, poids_min=0.01, contrainte=True):
+    """Reproduction de l'optimisation historique (objectif seul, gradient par différences finies)"""
+    nb_actifs = len(rendements)
+    
+    def sharpe_ratio(weights):
+        port_return = np.sum(weights * rendements)
+        port_volatility = np.sqrt(np.dot(weights.T, np.dot(cov_matrix, weights)))
+        if port_volatility < 1e-8:
+            return 0
+        return -port_return / port_volatility
+    
+    constraints = ({'type': 'eq', 'fun': lambda x: np.sum(x) - 1})
+    borne_min = poids_min if contrainte else 0
+    bounds = tuple((borne_min, 1) for _ in range(nb_actifs))
+    init_guess = nb_actifs * [1. / nb_actifs]
+    opt_result = sco.minimize(sharpe_ratio, init_guess, method='SLSQP', bounds=bounds, constraints=constraints)
+    return opt_result.x if opt_result.success else None
+
+def chronometrer(fonction, repetitions=3):
+    """Meilleur temps sur plusieurs répétitions, en secondes"""
+    meilleur = float("inf")
+    resultat = None
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        resultat = fonction()
+        meilleur = min(meilleur, time.perf_counter() - debut)
+    return meilleur, resultat
+
+def sharpe(poids, rendements, cov_matrix):
+    return (rendements @ poids) / np.sqrt(poids @ cov_matrix @ poids) if poids is not None else np.nan
+
+def main(tailles=(10, 25, 50, 100, 200, 400)):
+    print(f"{'actifs':>7} {'diff. finies':>13} {'analytique':>11} {'forme fermée':>13} {'accélération':>13} {'écart Sharpe':>13}")
+    for nb_actifs in tailles:
+        rendements, cov_matrix = generer_probleme(nb_actifs)
+        t_df, w_df = chronometrer(lambda: optimiser_differences_finies(rendements, cov_matrix, contrainte=False))
+        t_an, w_an = chronometrer(lambda: optimiser_portefeuille(rendements, cov_matrix, contrainte=False, forme_fermee=False))
+        t_ff, w_ff = chronometrer(lambda: optimiser_portefeuille(rendements, cov_matrix, contrainte=False))
+        ecart = abs(sharpe(w_an, rendements, cov_matrix) - sharpe(w_df, rendements, cov_matrix))
+        print(f"{nb_actifs:>7} {t_df:>12.4f}s {t_an:>10.4f}s {t_ff:>12.6f}s {t_df / t_an:>12.1f}x {ecart:>13.2e}")
+
+if __name__ == "__main__":
+    main()
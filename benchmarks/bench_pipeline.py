@@ -0,0 +1,171 @@
+# benchmarks/bench_pipeline.py
+"""
+Mesure le temps des principales étapes du pipeline sur une grille de tailles de données.
+
+Pour chaque combinaison (nombre de titres × années d'historique), des prix
+synthétiques sont générés (voir benchmarks.donnees) puis chaque étape est
+chronométrée : nettoyage, statistiques, corrélation, bêtas, optimisation et
+export des statistiques. Les résultats sont enregistrés en JSON dans
+benchmarks/resultats/, avec le commit et l'environnement, pour comparer deux
+exécutions.
+
+Exécution depuis la racine du projet :
+    python -m benchmarks.bench_pipeline                      # grille rapide
+    python -m benchmarks.bench_pipeline --complet            # 10 à 5 000 titres, 5 à 25 ans
+    python -m benchmarks.bench_pipeline --comparer avant.json apres.json
+"""
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+import contextlib
+import numpy as np
+import pandas as pd
+
+from benchmarks.donnees import generer_prix
+from benchmarks.bench_optimisation import chronometrer
+from traitement.contexte import ContexteMarche
+from traitement.nettoyage import nettoyer_donnees
+from traitement.analyse import calculer_statistiques
+from traitement.matrice_correlation import calculer_matrice_correlation
+from traitement.beta_calcul import calculer_beta
+from traitement.optimisation import optimiser_portefeuille
+from utils.export import exporter_statistiques_excel
+
+GRILLE_RAPIDE = {"tickers": (10, 100, 500), "annees": (5, 10)}
+GRILLE_COMPLETE = {"tickers": (10, 100, 500, 1000, 2000, 5000), "annees": (5, 10, 25)}
+DOSSIER_RESULTATS = os.path.join(os.path.dirname(__file__), "resultats")
+
+# Nombre maximal d'actifs passés à l'optimisation (les titres de meilleur Sharpe)
+TAILLE_MAX_OPTIMISATION = 500
+
+def _commit():
+    """Commit courant du dépôt, None hors d'un dépôt git"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _environnement():
+    return {
+        "commit": _commit(),
+        "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "systeme": platform.system(),
+        "processeurs": os.cpu_count(),
+    }
+
+def mesurer_configuration(nb_tickers, nb_annees, repetitions=3, graine=0):
+    """
+    Chronomètre chaque étape pour une taille de données.
+
+    Chaque mesure repart d'un nouveau contexte de marché, si bien que le calcul
+    des rendements est inclus dans le temps de chaque étape, comme lors d'un
+    appel isolé.
+
+    Returns:
+        list: Une mesure (dict) par étape
+    """
+    prix = generer_prix(nb_tickers, nb_annees=nb_annees, graine=graine)
+    dossier = tempfile.mkdtemp(prefix="bench_")
+    mesures = []
+
+    def mesurer(etape, fonction):
+        with contextlib.redirect_stdout(io.StringIO()):
+            duree, resultat = chronometrer(fonction, repetitions=repetitions)
+        mesures.append({"etape": etape, "tickers": nb_tickers, "annees": nb_annees,
+                        "dates": len(prix), "duree_s": round(duree, 6)})
+        return resultat
+
+    try:
+        prix_nettoyes = mesurer("nettoyer_donnees", lambda: nettoyer_donnees(prix))
+        stats = mesurer("calculer_statistiques", lambda: calculer_statistiques(ContexteMarche(prix_nettoyes)))
+        mesurer("calculer_matrice_correlation", lambda: calculer_matrice_correlation(ContexteMarche(prix_nettoyes)))
+        mesurer("calculer_beta", lambda: calculer_beta(ContexteMarche(prix_nettoyes), os.path.join(dossier, "beta.xlsx")))
+
+        titres = stats["stats_globales"]["Sharpe Ratio"].drop("^STOXX50E").nlargest(TAILLE_MAX_OPTIMISATION).index
+        rendements = stats["rendements"][titres]
+        rendements_moyens, cov_matrix = rendements.mean(), rendements.cov()
+        mesurer("optimiser_portefeuille", lambda: optimiser_portefeuille(rendements_moyens, cov_matrix, contrainte=False))
+
+        mesurer("exporter_statistiques_excel", lambda: exporter_statistiques_excel(stats, os.path.join(dossier, "statistiques.xlsx")))
+    finally:
+        shutil.rmtree(dossier, ignore_errors=True)
+    return mesures
+
+def executer_benchmark(grille=GRILLE_RAPIDE, repetitions=3, fichier_sortie=None):
+    """
+    Exécute la grille complète et enregistre les résultats.
+
+    Args:
+        grille (dict): Nombres de titres ("tickers") et profondeurs d'historique ("annees")
+        repetitions (int): Nombre de répétitions par mesure (le meilleur temps est retenu)
+        fichier_sortie (str, optional): Fichier JSON de résultats (par défaut benchmarks/resultats/<date>_<commit>.json)
+
+    Returns:
+        pandas.DataFrame: Temps de chaque étape pour chaque configuration
+    """
+    environnement = _environnement()
+    mesures = []
+    for nb_tickers in grille["tickers"]:
+        for nb_annees in grille["annees"]:
+            debut = time.perf_counter()
+            mesures += mesurer_configuration(nb_tickers, nb_annees, repetitions=repetitions)
+            print(f"{nb_tickers:>6} titres × {nb_annees:>2} ans : {time.perf_counter() - debut:.1f} s")
+
+    if fichier_sortie is None:
+        os.makedirs(DOSSIER_RESULTATS, exist_ok=True)
+        nom = f"{time.strftime('%Y%m%d_%H%M%S')}_{environnement['commit'] or 'local'}.json"
+        fichier_sortie = os.path.join(DOSSIER_RESULTATS, nom)
+    with open(fichier_sortie, "w", encoding="utf-8") as f:
+        json.dump({"environnement": environnement, "mesures": mesures}, f, indent=2)
+
+    df = pd.DataFrame(mesures)
+    print(df.pivot_table(index=["tickers", "annees"], columns="etape", values="duree_s").round(4).to_string())
+    print(f"\nRésultats enregistrés dans {fichier_sortie}")
+    return df
+
+def comparer(fichier_reference, fichier_nouveau):
+    """
+    Compare deux exécutions : rapport des temps (nouveau / référence) par étape et configuration.
+
+    Un rapport supérieur à 1 signale une régression.
+
+    Returns:
+        pandas.DataFrame: Temps de référence, nouveaux temps et rapport
+    """
+    tables = []
+    for fichier in (fichier_reference, fichier_nouveau):
+        with open(fichier, encoding="utf-8") as f:
+            tables.append(pd.DataFrame(json.load(f)["mesures"]).set_index(["etape", "tickers", "annees"])["duree_s"])
+    comparaison = pd.DataFrame({"reference_s": tables[0], "nouveau_s": tables[1]}).dropna()
+    comparaison["rapport"] = (comparaison["nouveau_s"] / comparaison["reference_s"]).round(2)
+    print(comparaison.sort_values("rapport", ascending=False).to_string())
+    return comparaison
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Benchmark des étapes du pipeline sur données synthétiques.")
+    parser.add_argument("--complet", action="store_true", help="Grille complète (10 à 5 000 titres, 5 à 25 ans)")
+    parser.add_argument("--repetitions", type=int, default=3, help="Répétitions par mesure (meilleur temps retenu)")
+    parser.add_argument("--sortie", default=None, help="Fichier JSON de résultats")
+    parser.add_argument("--comparer", nargs=2, metavar=("REFERENCE", "NOUVEAU"), help="Compare deux fichiers de résultats")
+    args = parser.parse_args(arguments)
+
+    if args.comparer:
+        comparer(*args.comparer)
+        return
+    executer_benchmark(GRILLE_COMPLETE if args.complet else GRILLE_RAPIDE, repetitions=args.repetitions,
+                       fichier_sortie=args.sortie)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
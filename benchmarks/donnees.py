@@ -0,0 +1,68 @@
+# benchmarks/donnees.py
+"""
+Générateur de prix synthétiques pour les benchmarks.
+
+Les rendements suivent un modèle factoriel : un facteur de marché (qui sert
+aussi d'indice de référence) et des facteurs sectoriels, plus un bruit propre
+à chaque titre. Les valeurs manquantes reproduisent celles des données
+téléchargées : titres introduits en cours de période, titres retirés de la
+cote et cotations manquantes isolées ou en courtes séries.
+"""
+import numpy as np
+import pandas as pd
+
+def generer_prix(nb_tickers, nb_annees=10, nb_facteurs=3, indice="^STOXX50E", part_introductions=0.1,
+                 part_radiations=0.02, taux_trous=0.002, longueur_trous_max=5, graine=0):
+    """
+    Génère un DataFrame de prix (dates ouvrées × tickers), indice en première colonne.
+
+    Args:
+        nb_tickers (int): Nombre de titres, hors indice
+        nb_annees (int): Profondeur d'historique en années (252 séances par an)
+        nb_facteurs (int): Nombre de facteurs, marché compris
+        indice (str): Nom de la colonne de l'indice (le facteur de marché)
+        part_introductions (float): Part des titres introduits en cours de période (NaN avant l'introduction)
+        part_radiations (float): Part des titres retirés de la cote (NaN après la radiation)
+        taux_trous (float): Probabilité qu'une cotation manquante commence à une date donnée
+        longueur_trous_max (int): Longueur maximale d'une série de cotations manquantes
+        graine (int): Graine du générateur aléatoire
+
+    Returns:
+        pandas.DataFrame: Prix synthétiques
+    """
+    rng = np.random.default_rng(graine)
+    nb_dates = nb_annees * 252
+    dates = pd.bdate_range("2000-01-03", periods=nb_dates, name="Date")
+
+    # Facteurs : marché (rendement moyen positif) et facteurs sectoriels moins volatils
+    vol_facteurs = np.r_[0.012, np.full(nb_facteurs - 1, 0.006)]
+    facteurs = rng.standard_normal((nb_dates, nb_facteurs)) * vol_facteurs
+    facteurs[:, 0] += 0.0003
+
+    expositions = np.empty((nb_tickers, nb_facteurs))
+    expositions[:, 0] = rng.normal(1.0, 0.3, nb_tickers)
+    expositions[:, 1:] = rng.normal(0.0, 0.8, (nb_tickers, nb_facteurs - 1))
+    vol_specifique = rng.uniform(0.008, 0.025, nb_tickers)
+
+    rendements_log = facteurs @ expositions.T + rng.standard_normal((nb_dates, nb_tickers)) * vol_specifique
+    prix_titres = 100 * np.exp(np.cumsum(rendements_log, axis=0))
+    prix_indice = 4000 * np.exp(np.cumsum(facteurs[:, 0]))
+
+    # Introductions et radiations : NaN avant la première ou après la dernière cotation
+    introduits = rng.random(nb_tickers) < part_introductions
+    debuts = rng.integers(1, nb_dates // 2, size=nb_tickers)
+    lignes = np.arange(nb_dates)[:, None]
+    masque = introduits & (lignes < debuts)
+    radies = rng.random(nb_tickers) < part_radiations
+    fins = rng.integers(nb_dates // 2, nb_dates - 1, size=nb_tickers)
+    masque |= radies & (lignes > fins)
+
+    # Cotations manquantes en courtes séries
+    departs = rng.random((nb_dates, nb_tickers)) < taux_trous
+    longueurs = rng.integers(1, longueur_trous_max + 1, size=(nb_dates, nb_tickers))
+    for decalage in range(longueur_trous_max):
+        masque[decalage:] |= departs[:nb_dates - decalage] & (longueurs[:nb_dates - decalage] > decalage)
+    prix_titres[masque] = np.nan
+
+    colonnes = [indice] + [f"T{i:05d}" for i in range(nb_tickers)]
+    return pd.DataFrame(np.column_stack([prix_indice, prix_titres]), index=dates, columns=colonnes)
@@ -0,0 +1,149 @@
+# benchmarks/source_factice.py
+"""
+Serveur HTTP local imitant une source de prix, pour tester et mesurer le téléchargement.
+
+Le serveur répond à GET /prix?tickers=A,B&debut=...&fin=... au format de
+traitement.telechargement.SourceHTTP, à partir de prix synthétiques
+(benchmarks.donnees). Il reproduit les défauts d'une vraie source : latence
+par requête et par ticker, erreurs aléatoires (503), limitation de débit (429
+avec Retry-After) et symboles qui font échouer toute la requête (500). Les
+connexions sont persistantes (HTTP/1.1), et le nombre de requêtes, d'erreurs et
+de connexions ouvertes est compté.
+
+    with ServeurPrixFactice(generer_prix(500), taux_erreurs=0.1) as serveur:
+        data, echecs = telecharger_par_lots(tickers, debut, fin, SourceHTTP(serveur.url))
+"""
+import json
+import math
+import time
+import random
+import threading
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import pandas as pd
+
+class _GestionnaireFactice(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.factice._compter("connexions")
+
+    def _repondre(self, statut, contenu, entetes=None):
+        corps = json.dumps(contenu).encode("utf-8")
+        self.send_response(statut)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(corps)))
+        for cle, valeur in (entetes or {}).items():
+            self.send_header(cle, valeur)
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def do_GET(self):
+        factice = self.server.factice
+        factice._compter("requetes")
+        url = urlparse(self.path)
+        parametres = {cle: valeurs[-1] for cle, valeurs in parse_qs(url.query).items()}
+        tickers = [t for t in parametres.get("tickers", "").split(",") if t]
+
+        if factice._limite_atteinte():
+            factice._compter("limitees")
+            self._repondre(429, {"erreur": "trop de requêtes"}, {"Retry-After": str(factice.attente_limite)})
+            return
+        if any(t in factice.tickers_defaillants for t in tickers):
+            factice._compter("erreurs")
+            self._repondre(500, {"erreur": "symbole défaillant dans la requête"})
+            return
+        if factice._rng_tirage() < factice.taux_erreurs:
+            factice._compter("erreurs")
+            self._repondre(503, {"erreur": "service indisponible"})
+            return
+
+        time.sleep(factice.latence + factice.latence_par_ticker * len(tickers))
+        prix = factice.prix
+        connus = [t for t in tickers if t in prix.columns]
+        lignes = (prix.index >= pd.Timestamp(parametres["debut"])) & (prix.index < pd.Timestamp(parametres["fin"]))
+        selection = prix.loc[lignes, connus]
+        contenu = {
+            "dates": [str(d.date()) for d in selection.index],
+            "prix": {t: [None if math.isnan(v) else v for v in selection[t].tolist()] for t in connus},
+        }
+        self._repondre(200, contenu)
+
+    def log_message(self, format, *args):
+        pass
+
+class ServeurPrixFactice:
+    """
+    Source de prix factice servie sur localhost, dans un thread d'arrière-plan.
+
+    Args:
+        prix (pandas.DataFrame): Prix servis (dates × tickers)
+        latence (float): Délai fixe de chaque réponse, en secondes
+        latence_par_ticker (float): Délai supplémentaire par ticker demandé, en secondes
+        taux_erreurs (float): Probabilité qu'une requête échoue (503)
+        debit_max (float, optional): Nombre de requêtes par seconde au-delà duquel la source répond 429
+        attente_limite (float): Délai Retry-After renvoyé avec les réponses 429, en secondes
+        tickers_defaillants (iterable): Tickers qui font échouer toute requête qui les contient (500)
+        graine (int): Graine des erreurs aléatoires
+    """
+
+    def __init__(self, prix, latence=0.02, latence_par_ticker=0.0005, taux_erreurs=0.0, debit_max=None,
+                 attente_limite=0.2, tickers_defaillants=(), graine=0):
+        self.prix = prix
+        self.latence = latence
+        self.latence_par_ticker = latence_par_ticker
+        self.taux_erreurs = taux_erreurs
+        self.debit_max = debit_max
+        self.attente_limite = attente_limite
+        self.tickers_defaillants = set(tickers_defaillants)
+        self.compteurs = {"connexions": 0, "requetes": 0, "erreurs": 0, "limitees": 0}
+        self._rng = random.Random(graine)
+        self._instants = deque()
+        self._verrou = threading.Lock()
+        self._serveur = None
+
+    def _compter(self, nom):
+        with self._verrou:
+            self.compteurs[nom] += 1
+
+    def _rng_tirage(self):
+        with self._verrou:
+            return self._rng.random()
+
+    def _limite_atteinte(self):
+        """Fenêtre glissante d'une seconde : la requête est refusée au-delà de debit_max"""
+        if not self.debit_max:
+            return False
+        with self._verrou:
+            maintenant = time.monotonic()
+            while self._instants and self._instants[0] < maintenant - 1:
+                self._instants.popleft()
+            if len(self._instants) >= self.debit_max:
+                return True
+            self._instants.append(maintenant)
+            return False
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._serveur.server_port}"
+
+    def demarrer(self):
+        self._serveur = ThreadingHTTPServer(("127.0.0.1", 0), _GestionnaireFactice)
+        self._serveur.daemon_threads = True
+        self._serveur.factice = self
+        threading.Thread(target=self._serveur.serve_forever, daemon=True).start()
+        return self
+
+    def arreter(self):
+        if self._serveur is not None:
+            self._serveur.shutdown()
+            self._serveur.server_close()
+            self._serveur = None
+
+    def __enter__(self):
+        return self.demarrer()
+
+    def __exit__(self, *exc):
+        self.arreter()
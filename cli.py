@@ -0,0 +1,197 @@
+# cli.py
+"""
+Interface en ligne de commande : une sous-commande par étape de l'analyse.
+
+    python cli.py stats                 # statistiques, affichées et exportées en Excel
+    python cli.py corr --graphique      # matrice de corrélation (et heatmap)
+    python cli.py beta                  # bêtas des titres
+    python cli.py optimise -n 10        # portefeuilles optimisés
+    python cli.py report                # analyse complète (équivalent de main.py)
+    python cli.py update-data           # mise à jour incrémentale du stock de prix
+    python cli.py serve --port 8765     # service HTTP/JSON local, données gardées en mémoire
+    python cli.py structure             # régénère structure_du_code.txt
+
+Chaque sous-commande n'importe que les modules dont elle a besoin (MODULES) :
+yfinance, scipy, matplotlib et seaborn ne sont chargés que par les commandes
+qui les utilisent. Le temps d'import de chaque sous-commande est mesuré, avec
+son budget, par benchmarks/bench_demarrage.py. Avec INSTRUMENTATION=1, le
+rapport des étapes mesurées est écrit en fin de commande dans le dossier de
+sortie (instrumentation_<commande>.json / .csv).
+"""
+import sys
+import argparse
+import importlib
+
+# Modules importés par chaque sous-commande, dans l'ordre de chargement
+MODULES = {
+    "stats": ("traitement.nettoyage", "traitement.analyse", "utils.affichage", "utils.export"),
+    "corr": ("traitement.nettoyage", "traitement.matrice_correlation", "utils.export"),
+    "beta": ("traitement.nettoyage", "traitement.beta_calcul", "utils.export"),
+    "optimise": ("traitement.nettoyage", "traitement.optimisation", "utils.export"),
+    "report": ("main",),
+    "update-data": ("traitement.nettoyage", "traitement.stockage"),
+    "structure": ("utils.struct",),
+    "serve": ("service",),
+}
+
+def importer_modules(commande):
+    """
+    Importe les modules d'une sous-commande.
+
+    Returns:
+        list: Modules importés
+    """
+    return [importlib.import_module(module) for module in MODULES[commande]]
+
+def _charger_contexte(args):
+    """Charge et nettoie les prix du stock, et retourne le contexte de marché partagé"""
+    from traitement.nettoyage import charger_donnees, nettoyer_donnees
+    from traitement.contexte import ContexteMarche
+
+    data = charger_donnees(args.tickers, dossier_stock=args.stock, fichier_csv=args.csv, precision=args.precision)
+    return ContexteMarche(nettoyer_donnees(data), indice=args.indice)
+
+def commande_stats(args):
+    from traitement.analyse import calculer_statistiques
+    from utils.affichage import afficher_statistiques
+    from utils.export import exporter_statistiques_excel, JournalExport
+
+    journal = JournalExport()
+    stats = calculer_statistiques(_charger_contexte(args))
+    afficher_statistiques(stats)
+    exporter_statistiques_excel(stats, f"{args.sortie}/statistiques.xlsx", journal=journal)
+    journal.afficher()
+
+def commande_corr(args):
+    import os
+    from traitement.matrice_correlation import calculer_matrice_correlation, ordonner_matrice_correlation
+    from utils.export import exporter_ordre_correlation, exporter_tableau_excel, JournalExport
+
+    journal = JournalExport()
+    correlation_matrix, min_corr_ticker, max_corr_ticker, mean_corr = calculer_matrice_correlation(_charger_contexte(args))
+    exporter_tableau_excel(correlation_matrix, os.path.join(args.sortie, "matrice_correlation.xlsx"), journal=journal)
+    ordre = ordonner_matrice_correlation(correlation_matrix)
+    exporter_ordre_correlation(ordre, os.path.join(args.sortie, "ordre_correlation.csv"))
+
+    # La heatmap (matplotlib et seaborn) n'est produite que sur demande
+    if args.graphique:
+        from utils.affichage import afficher_matrice_correlation
+        afficher_matrice_correlation(correlation_matrix, save_path=os.path.join(args.sortie, "matrice_correlation.png"),
+                                     ordre=ordre)
+
+    print(f"\nTitre le moins corrélé à l'indice : {min_corr_ticker}")
+    print(f"Titre le plus corrélé à l'indice : {max_corr_ticker}")
+    print(f"Corrélation moyenne : {mean_corr:.4f}")
+    journal.afficher()
+
+def commande_beta(args):
+    from traitement.beta_calcul import calculer_beta
+    from utils.export import JournalExport
+
+    journal = JournalExport()
+    betas = calculer_beta(_charger_contexte(args), f"{args.sortie}/beta_titres.xlsx", journal=journal)
+    print(betas.to_string())
+    journal.afficher()
+
+def commande_optimise(args):
+    from traitement.optimisation import executer_optimisation
+    from utils.export import JournalExport
+
+    journal = JournalExport()
+    executer_optimisation(_charger_contexte(args), n=args.n, methode_covariance=args.covariance, dossier_sortie=args.sortie,
+                          journal=journal)
+    journal.afficher()
+
+def commande_report(args):
+    import main
+
+    main.main()
+
+def commande_update_data(args):
+    from traitement.nettoyage import mettre_a_jour_donnees
+    from traitement.stockage import StockPrix
+
+    # Par défaut, les tickers déjà présents dans le stock
+    stock = StockPrix(args.stock)
+    tickers = args.tickers or (stock.tickers if stock.existe() else None)
+    if not tickers:
+        raise SystemExit(f"Aucun ticker à mettre à jour : stock {args.stock} absent et --tickers non fourni")
+    mettre_a_jour_donnees(tickers, date_debut=args.debut, date_fin=args.fin, dossier_stock=args.stock)
+
+def commande_serve(args):
+    from service import demarrer_service
+
+    demarrer_service(hote=args.hote, port=args.port, dossier_stock=args.stock, fichier_csv=args.csv,
+                     indice=args.indice, precision=args.precision, taille_cache=args.taille_cache)
+
+def commande_structure(args):
+    from utils.struct import generer_structure_projet
+
+    generer_structure_projet()
+    print("Structure du projet écrite dans structure_du_code.txt")
+
+def creer_parser():
+    """Construit le parser des sous-commandes"""
+    parser = argparse.ArgumentParser(description="Analyse de titres : statistiques, corrélations, bêtas et optimisation.")
+    sous_parsers = parser.add_subparsers(dest="commande", required=True)
+
+    # Options communes aux commandes de calcul
+    donnees = argparse.ArgumentParser(add_help=False)
+    donnees.add_argument("--stock", default="data/prix", help="Dossier du stock de prix")
+    donnees.add_argument("--csv", default="data/donnees.csv", help="CSV historique converti en stock si nécessaire")
+    donnees.add_argument("--tickers", nargs="+", default=None, help="Tickers à analyser (tous ceux du stock par défaut)")
+    donnees.add_argument("--indice", default="^STOXX50E", help="Ticker de l'indice de référence")
+    donnees.add_argument("--precision", choices=("float64", "float32"), default=None, help="Précision de stockage en mémoire")
+    donnees.add_argument("--sortie", default="resultats", help="Dossier des résultats")
+
+    sous_parsers.add_parser("stats", parents=[donnees], help="Statistiques des titres et de l'indice")
+    corr = sous_parsers.add_parser("corr", parents=[donnees], help="Matrice de corrélation")
+    corr.add_argument("--graphique", action="store_true", help="Sauvegarde aussi la heatmap")
+    sous_parsers.add_parser("beta", parents=[donnees], help="Bêtas des titres par rapport à l'indice")
+    optimise = sous_parsers.add_parser("optimise", parents=[donnees], help="Portefeuilles optimisés (Sharpe maximal)")
+    optimise.add_argument("-n", type=int, default=10, help="Nombre de titres retenus selon le ratio de Sharpe")
+    optimise.add_argument("--covariance", default="echantillon",
+                          choices=("echantillon", "ledoit_wolf", "ewma", "factorielle"), help="Estimateur de covariance")
+    sous_parsers.add_parser("report", help="Analyse complète avec graphiques (équivalent de main.py)")
+    mise_a_jour = sous_parsers.add_parser("update-data", help="Télécharge uniquement les prix manquants du stock")
+    mise_a_jour.add_argument("--stock", default="data/prix", help="Dossier du stock de prix")
+    mise_a_jour.add_argument("--tickers", nargs="+", default=None, help="Tickers à maintenir (ceux du stock par défaut)")
+    mise_a_jour.add_argument("--debut", default="2015-01-01", help="Date de début pour les nouveaux tickers")
+    mise_a_jour.add_argument("--fin", default=None, help="Date de fin (exclue), aujourd'hui par défaut")
+    serve = sous_parsers.add_parser("serve", parents=[donnees], help="Service HTTP/JSON local (données gardées en mémoire)")
+    serve.add_argument("--hote", default="127.0.0.1", help="Interface d'écoute")
+    serve.add_argument("--port", type=int, default=8765, help="Port d'écoute")
+    serve.add_argument("--taille-cache", type=int, default=256, help="Nombre de réponses gardées dans le cache LRU")
+    sous_parsers.add_parser("structure", help="Régénère structure_du_code.txt")
+    return parser
+
+COMMANDES = {
+    "stats": commande_stats,
+    "corr": commande_corr,
+    "beta": commande_beta,
+    "optimise": commande_optimise,
+    "report": commande_report,
+    "update-data": commande_update_data,
+    "serve": commande_serve,
+    "structure": commande_structure,
+}
+
+def _exporter_instrumentation(args):
+    """Écrit le rapport d'instrumentation de la sous-commande (INSTRUMENTATION=1) dans son dossier de sortie"""
+    # Aucun module instrumenté chargé (structure) : rien à mesurer, et pandas n'est pas importé pour rien
+    instrumentation = sys.modules.get("utils.instrumentation")
+    if instrumentation is None or not instrumentation.instrumentation_active():
+        return
+    instrumentation.exporter_rapport(getattr(args, "sortie", "resultats"), nom=f"instrumentation_{args.commande}")
+
+def main(arguments=None):
+    args = creer_parser().parse_args(arguments)
+    try:
+        COMMANDES[args.commande](args)
+    finally:
+        # report exécute main.py, qui exporte lui-même son rapport
+        if args.commande != "report":
+            _exporter_instrumentation(args)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
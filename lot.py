@@ -0,0 +1,123 @@
+# lot.py
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from traitement.nettoyage import charger_donnees, nettoyer_donnees
+from traitement.stockage import StockPrix
+from traitement.contexte import ContexteMarche
+from traitement.analyse import calculer_statistiques
+from traitement.matrice_correlation import calculer_matrice_correlation
+from traitement.beta_calcul import calculer_beta
+from traitement.optimisation import executer_optimisation
+from utils.export import exporter_statistiques_excel, exporter_tableau_excel, JournalExport
+
+# Prix du stock, ouverts une seule fois par processus de travail (projection mémoire partagée entre processus)
+_PRIX = None
+
+def _ouvrir_stock(dossier_stock):
+    """Initialiseur des processus : ouvre le stock de prix une fois pour toutes les tâches du processus"""
+    global _PRIX
+    _PRIX = StockPrix(dossier_stock).charger()
+
+def executer_tache(tache, dossier_sortie):
+    """
+    Exécute la chaîne statistiques → corrélation → beta → optimisation pour un univers.
+
+    Args:
+        tache (dict): Description de la tâche (nom, tickers, indice, debut, fin)
+        dossier_sortie (str): Dossier racine des résultats ; la tâche écrit dans un sous-dossier à son nom
+
+    Returns:
+        dict: Résumé de l'exécution (nom, dossier, nombre de titres, durée, écritures du journal d'export)
+    """
+    debut_execution = time.perf_counter()
+    nom = tache["nom"]
+    indice = tache.get("indice", "^STOXX50E")
+    dossier = os.path.join(dossier_sortie, nom)
+    os.makedirs(dossier, exist_ok=True)
+
+    tickers = list(dict.fromkeys([indice] + list(tache["tickers"])))
+    manquants = [t for t in tickers if t not in _PRIX.columns]
+    if manquants:
+        raise KeyError(f"[{nom}] Tickers absents du stock : {manquants}")
+    prix = _PRIX[tickers].loc[tache.get("debut"):tache.get("fin")]
+
+    # Temps d'écriture de chaque fichier de la tâche, renvoyé dans le résumé
+    journal = JournalExport()
+
+    contexte = ContexteMarche(nettoyer_donnees(prix), indice=indice)
+    stats = calculer_statistiques(contexte)
+    exporter_statistiques_excel(stats, os.path.join(dossier, "statistiques.xlsx"), journal=journal)
+
+    correlation_matrix, min_corr_ticker, max_corr_ticker, mean_corr = calculer_matrice_correlation(contexte)
+    exporter_tableau_excel(correlation_matrix, os.path.join(dossier, "matrice_correlation.xlsx"), journal=journal)
+
+    calculer_beta(contexte, os.path.join(dossier, "beta_titres.xlsx"), journal=journal)
+    executer_optimisation(contexte, stats=stats, n=tache.get("n", 10), dossier_sortie=dossier, journal=journal)
+
+    return {
+        "nom": nom,
+        "dossier": dossier,
+        "titres": len(tickers),
+        "correlation_moyenne": round(float(mean_corr), 4),
+        "duree": round(time.perf_counter() - debut_execution, 2),
+        "exports": journal.entrees,
+    }
+
+def executer_lot(fichier_config, nb_processus=None):
+    """
+    Exécute toutes les tâches d'un fichier de configuration sur un pool de processus.
+
+    Le fichier JSON décrit le stock de prix, le dossier de sortie et la liste des
+    tâches (univers, indice de référence, période) :
+
+        {"dossier_stock": "data/prix", "dossier_sortie": "resultats/lots",
+         "taches": [{"nom": "eurostoxx", "indice": "^STOXX50E", "tickers": [...],
+                     "debut": "2015-01-01", "fin": "2025-01-01"}]}
+
+    Args:
+        fichier_config (str): Chemin du fichier de configuration JSON
+        nb_processus (int, optional): Nombre de processus (tous les cœurs par défaut)
+
+    Returns:
+        list: Résumés des tâches réussies
+    """
+    with open(fichier_config, encoding="utf-8") as f:
+        config = json.load(f)
+
+    dossier_stock = config.get("dossier_stock", "data/prix")
+    dossier_sortie = config.get("dossier_sortie", "resultats/lots")
+    taches = config["taches"]
+
+    # Conversion éventuelle du CSV en stock binaire, une seule fois avant le lancement des processus
+    if not StockPrix(dossier_stock).existe():
+        charger_donnees(dossier_stock=dossier_stock, fichier_csv=config.get("fichier_csv", "data/donnees.csv"))
+
+    print(f"Exécution de {len(taches)} tâches...")
+    resumes = []
+    with ProcessPoolExecutor(max_workers=nb_processus, initializer=_ouvrir_stock, initargs=(dossier_stock,)) as pool:
+        futures = {pool.submit(executer_tache, tache, dossier_sortie): tache["nom"] for tache in taches}
+        for future in as_completed(futures):
+            try:
+                resume = future.result()
+            except Exception as erreur:
+                print(f"Échec de la tâche {futures[future]} : {erreur}")
+                continue
+            resumes.append(resume)
+            print(f"Tâche {resume['nom']} terminée en {resume['duree']} s ({resume['dossier']})")
+
+    print(f"\n{len(resumes)}/{len(taches)} tâches terminées. Résultats dans '{dossier_sortie}'")
+    return resumes
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exécute l'analyse complète pour plusieurs univers en parallèle.")
+    parser.add_argument("config", help="Fichier de configuration JSON des tâches")
+    parser.add_argument("-j", "--processus", type=int, default=None, help="Nombre de processus (tous les cœurs par défaut)")
+    args = parser.parse_args()
+
+    resumes = executer_lot(args.config, nb_processus=args.processus)
+    sys.exit(0 if resumes else 1)
@@ -2,16 +2,21 @@
 import pandas as pd
 import os
 import numpy as np
+from functools import partial
 
-from traitement.nettoyage import telecharger_donnees, nettoyer_donnees
+from traitement.nettoyage import telecharger_donnees, charger_donnees, nettoyer_donnees
 from traitement.analyse import calculer_statistiques
-from traitement.matrice_correlation import calculer_matrice_correlation
+from traitement.matrice_correlation import calculer_matrice_correlation, ordonner_matrice_correlation
 from utils.affichage import afficher_statistiques, afficher_matrice_correlation
-from utils.export import exporter_statistiques_excel
-from visualisation.graphiques import afficher_graphiques
+from utils.export import exporter_statistiques_excel, exporter_statistiques_glissantes_parquet, exporter_ordre_correlation, JournalExport
+from visualisation.graphiques import afficher_graphiques, graphique_beta_glissant
+from visualisation.rendu import FileRendu
 from traitement.beta_calcul import calculer_beta
-from utils.struct import generer_structure_projet
 from traitement.optimisation import executer_optimisation
+from traitement.contexte import ContexteMarche
+from traitement.glissant import calculer_statistiques_glissantes
+from utils.pipeline import Pipeline, CacheDisque
+from utils.instrumentation import instrumentation_active, exporter_rapport
 
 def creer_structure_projet():
     """Crée la structure des dossiers pour le projet"""
@@ -34,36 +39,61 @@ def main():
         "BAS.DE", "ASML.AS", "BNP.PA", "DG.PA", "GLE.PA"
     ]
     
-    # Télécharger les données si elles n'existent pas déjà
+    # Précision de stockage des prix et rendements ("float32" pour les très grands univers)
+    precision = "float64"
+    
+    # Télécharger les données si elles n'existent pas déjà (ni dans le stock, ni en CSV)
     fichier_donnees = "data/donnees.csv"
-    if not os.path.exists(fichier_donnees):
-        data = telecharger_donnees(tickers, date_debut="2015-01-01", date_fin="2025-01-01", fichier_sortie=fichier_donnees)
+    dossier_stock = "data/prix"
+    if not os.path.exists(fichier_donnees) and not os.path.exists(dossier_stock):
+        data = telecharger_donnees(tickers, date_debut="2015-01-01", date_fin="2025-01-01", dossier_stock=dossier_stock)
     else:
-        print(f"Chargement des données depuis {fichier_donnees}")
-        data = pd.read_csv(fichier_donnees, index_col=0, parse_dates=True)
+        # Le CSV est converti automatiquement en stock binaire à la première utilisation
+        data = charger_donnees(tickers, dossier_stock=dossier_stock, fichier_csv=fichier_donnees, precision=precision)
+    
+    # Les graphiques sont générés en arrière-plan pendant que les calculs continuent
+    file_rendu = FileRendu()
     
-    # Nettoyer les données
-    df_nettoye = nettoyer_donnees(data)
+    # Temps d'écriture de chaque fichier de résultats
+    journal = JournalExport()
     
-    # Calculer les statistiques
-    stats = calculer_statistiques(df_nettoye)
+    # Définir le chemin du fichier Excel dans "resultats"
+    save_path_excel = "resultats/beta_titres.xlsx"
+    
+    # Graphe des étapes de calcul : chaque résultat est mis en cache sur disque et
+    # seules les étapes en aval d'une modification (données, paramètres, code) sont recalculées
+    pipeline = Pipeline(CacheDisque("cache/pipeline"))
+    pipeline.ajouter("nettoyage", nettoyer_donnees, ["prix"], {"limite_comblement": 5})
+    # Contexte partagé : les rendements ne sont calculés qu'une seule fois pour tout le pipeline
+    pipeline.ajouter("contexte", ContexteMarche, ["nettoyage"], {"indice": "^STOXX50E"}, cache=False)
+    pipeline.ajouter("statistiques", calculer_statistiques, ["contexte"])
+    pipeline.ajouter("correlation", calculer_matrice_correlation, ["contexte"])
+    pipeline.ajouter("beta", partial(calculer_beta, journal=journal), ["contexte"], {"save_path": save_path_excel}, fichiers=[save_path_excel])
+    # Bêtas et corrélations glissants (60, 120 et 252 jours) pour chaque titre et chaque date
+    pipeline.ajouter("glissant", calculer_statistiques_glissantes, ["contexte"], {"fenetres": (60, 120, 252)})
+    # Optimisation du portefeuille en réutilisant les statistiques déjà calculées
+    pipeline.ajouter("optimisation", partial(executer_optimisation, journal=journal), ["contexte", "statistiques"],
+                     fichiers=["resultats/portefeuille_optimise.xlsx"])
+    
+    resultats = pipeline.executer({"prix": data})
+    df_nettoye = resultats["nettoyage"]
+    stats = resultats["statistiques"]
     
     # Afficher les résultats
     afficher_statistiques(stats)
     
     # Exporter les statistiques en Excel
-    exporter_statistiques_excel(stats, "resultats/statistiques.xlsx")
-    
-    # Calcul de la matrice de corrélation
-    correlation_matrix, min_corr_ticker, max_corr_ticker, mean_corr = calculer_matrice_correlation(df_nettoye)
+    exporter_statistiques_excel(stats, "resultats/statistiques.xlsx", journal=journal)
     
-    # Calcul et affichage de la matrice de corrélation
-    correlation_matrix, min_corr_ticker, max_corr_ticker, mean_corr = calculer_matrice_correlation(df_nettoye)
+    # Matrice de corrélation
+    correlation_matrix, min_corr_ticker, max_corr_ticker, mean_corr = resultats["correlation"]
     
     # Sauvegarde de la matrice de corrélation
     os.makedirs("resultats", exist_ok=True)
     save_path_png = os.path.join("resultats", "matrice_correlation.png")
-    afficher_matrice_correlation(correlation_matrix, save_path=save_path_png)
+    ordre_correlation = ordonner_matrice_correlation(correlation_matrix)
+    exporter_ordre_correlation(ordre_correlation, os.path.join("resultats", "ordre_correlation.csv"))
+    file_rendu.soumettre(afficher_matrice_correlation, correlation_matrix, save_path=save_path_png, ordre=ordre_correlation)
 
     # Afficher les résultats relatifs à l'indice
     print(f"\nTitre le moins corrélé à l'indice : {min_corr_ticker}")
@@ -87,23 +117,28 @@ def main():
         selection += autres_titres
     
     # Afficher les graphiques
-    afficher_graphiques(df_nettoye, stats, selection)
+    afficher_graphiques(df_nettoye, stats, selection, file_rendu=file_rendu)
 
-    # Définir le chemin du fichier Excel dans "resultats"
-    save_path_excel = "resultats/beta_titres.xlsx"
-
-    # Appeler la fonction en lui passant les données nettoyées
-    beta_df = calculer_beta(data, save_path_excel)
-
-    # Exécuter l'optimisation du portefeuille
-    executer_optimisation(df_nettoye)
+    # Bêtas et corrélations glissants
+    stats_glissantes = resultats["glissant"]
+    exporter_statistiques_glissantes_parquet(stats_glissantes, "resultats/glissant", journal=journal)
+    file_rendu.soumettre(graphique_beta_glissant, stats_glissantes[252]["beta"], [t for t in selection if t != "^STOXX50E"],
+                         fichier_sortie="resultats/beta_glissant.png")
+    
+    # Attendre que tous les graphiques soient écrits avant de terminer
+    file_rendu.attendre()
+    journal.afficher()
+    
+    # Rapport de durée et de mémoire par étape (INSTRUMENTATION=1)
+    if instrumentation_active():
+        exporter_rapport("resultats")
     
     print("\nAnalyse complète terminée. Tous les résultats et graphiques sont disponibles dans le dossier 'resultats'")
 
 if __name__ == "__main__":
     # Créer la structure de projet si elle n'existe pas
+    # (structure_du_code.txt n'est plus régénéré à chaque lancement : python cli.py structure)
     creer_structure_projet()
-    generer_structure_projet()
     
     # Exécuter le programme principal
     main()
@@ -0,0 +1,396 @@
+# service.py
+"""
+Service local d'analyse : API HTTP/JSON sur des données gardées en mémoire.
+
+Le stock de prix est chargé et nettoyé une seule fois ; les rendements, les
+statistiques, les régressions sur l'indice et la matrice de covariance sont
+calculés à la première question puis conservés. Les réponses sont gardées
+dans un cache LRU. Le cache et les données sont invalidés dès que la version
+du stock change : ajout de prix par POST /prix, ou mise à jour externe
+(python cli.py update-data).
+
+    python cli.py serve --port 8765
+
+    curl 'http://127.0.0.1:8765/sante'
+    curl 'http://127.0.0.1:8765/beta?tickers=ASML.AS,BNP.PA'
+    curl 'http://127.0.0.1:8765/correlation?tickers=ASML.AS'
+    curl 'http://127.0.0.1:8765/statistiques?tickers=ASML.AS'
+    curl 'http://127.0.0.1:8765/optimisation?tickers=ASML.AS,BNP.PA,AI.PA&contrainte=1'
+    curl -X POST 'http://127.0.0.1:8765/prix' -d '{"dates": ["2025-01-02"], "prix": {"ASML.AS": [680.5]}}'
+
+Le serveur n'écoute que sur l'interface locale par défaut.
+"""
+import json
+import math
+import threading
+import traceback
+from collections import OrderedDict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+import pandas as pd
+
+from traitement.nettoyage import charger_donnees, nettoyer_donnees, mettre_a_jour_donnees
+from traitement.stockage import StockPrix
+from traitement.contexte import ContexteMarche, INDICE_DEFAUT
+from traitement.analyse import calculer_statistiques
+from traitement.beta_calcul import calculer_regressions
+from traitement.covariance import estimer_covariance
+
+class CacheLRU:
+    """
+    Cache des réponses, limité aux capacite entrées les plus récemment utilisées.
+
+    Args:
+        capacite (int): Nombre maximal de réponses conservées
+    """
+
+    def __init__(self, capacite=256):
+        self.capacite = capacite
+        self.succes = 0
+        self.echecs = 0
+        self._entrees = OrderedDict()
+        self._verrou = threading.Lock()
+
+    def lire(self, cle):
+        """
+        Returns:
+            tuple: (présente, valeur) ; l'entrée lue devient la plus récente
+        """
+        with self._verrou:
+            if cle not in self._entrees:
+                self.echecs += 1
+                return False, None
+            self._entrees.move_to_end(cle)
+            self.succes += 1
+            return True, self._entrees[cle]
+
+    def ecrire(self, cle, valeur):
+        """Ajoute une réponse, en évinçant la moins récemment utilisée au-delà de la capacité"""
+        with self._verrou:
+            self._entrees[cle] = valeur
+            self._entrees.move_to_end(cle)
+            while len(self._entrees) > self.capacite:
+                self._entrees.popitem(last=False)
+
+    def vider(self):
+        with self._verrou:
+            self._entrees.clear()
+
+    def __len__(self):
+        return len(self._entrees)
+
+def _en_json(valeur):
+    """Convertit un résultat (DataFrame, Series, scalaires NumPy) en objet sérialisable, NaN → null"""
+    if isinstance(valeur, pd.DataFrame):
+        return _en_json(valeur.to_dict(orient="index"))
+    if isinstance(valeur, pd.Series):
+        return {str(cle): _en_json(v) for cle, v in valeur.items()}
+    if isinstance(valeur, dict):
+        return {str(cle): _en_json(v) for cle, v in valeur.items()}
+    if isinstance(valeur, (list, tuple)):
+        return [_en_json(v) for v in valeur]
+    if isinstance(valeur, (pd.Timestamp, np.datetime64)):
+        return str(pd.Timestamp(valeur).date())
+    if isinstance(valeur, np.generic):
+        valeur = valeur.item()
+    if isinstance(valeur, float) and not math.isfinite(valeur):
+        return None
+    return valeur
+
+class _Instantane:
+    """
+    Contexte de marché chargé pour une version du stock, et résultats calculés sur ce contexte.
+
+    Un instantané n'est jamais modifié après sa création : une question
+    commencée sur une version du stock est calculée jusqu'au bout sur cette
+    version, même si de nouveaux prix sont ajoutés entre-temps.
+    """
+
+    def __init__(self, version, contexte):
+        self.version = version
+        self.contexte = contexte
+        self._resultats = {}
+        self._verrou = threading.Lock()
+
+    def _resultat(self, nom, calcul):
+        """Résultat gardé en mémoire aussi longtemps que l'instantané"""
+        with self._verrou:
+            if nom not in self._resultats:
+                self._resultats[nom] = calcul()
+            return self._resultats[nom]
+
+    @property
+    def statistiques(self):
+        return self._resultat("statistiques", lambda: calculer_statistiques(self.contexte))
+
+    @property
+    def regressions(self):
+        def calcul():
+            contexte = self.contexte
+            regressions = calculer_regressions(contexte.rendements, contexte.rendements_indice,
+                                               validite=contexte.validite)
+            # Corrélation à l'indice sur la même fenêtre commune : signe du beta et racine du R²
+            regressions["Corrélation"] = np.sign(regressions["Beta"]) * np.sqrt(regressions["R²"])
+            return regressions
+        return self._resultat("regressions", calcul)
+
+    @property
+    def covariance(self):
+        return self._resultat("covariance", lambda: estimer_covariance(self.contexte.rendements))
+
+class ServiceAnalyse:
+    """
+    Données de marché et résultats gardés en mémoire entre les requêtes.
+
+    Les questions passent par les fonctions de traitement existantes
+    (calculer_statistiques, calculer_regressions, estimer_covariance,
+    optimiser_portefeuille). La version du stock est vérifiée à chaque
+    question : si elle a changé, les prix sont rechargés dans un nouvel
+    instantané et tous les résultats (en mémoire et dans le cache LRU) sont
+    oubliés. Chaque question est calculée sur l'instantané lu au moment où
+    elle arrive, et mise en cache sous la version de cet instantané.
+
+    Args:
+        dossier_stock (str): Dossier du stock de prix
+        fichier_csv (str): CSV historique converti en stock si nécessaire
+        indice (str): Ticker de l'indice de référence
+        precision (str, optional): Précision de stockage en mémoire ("float64" ou "float32")
+        taille_cache (int): Nombre de réponses conservées dans le cache LRU
+    """
+
+    def __init__(self, dossier_stock="data/prix", fichier_csv="data/donnees.csv", indice=INDICE_DEFAUT, precision=None,
+                 taille_cache=256):
+        self.stock = StockPrix(dossier_stock)
+        self.fichier_csv = fichier_csv
+        self.indice = indice
+        self.precision = precision
+        self.cache = CacheLRU(taille_cache)
+        self._verrou = threading.RLock()
+        self._instantane = None
+
+    @property
+    def version(self):
+        return self._instantane.version if self._instantane is not None else None
+
+    @property
+    def contexte(self):
+        return self._instantane.contexte if self._instantane is not None else None
+
+    def actualiser(self):
+        """
+        Recharge les prix si le stock a changé depuis le dernier chargement.
+
+        Returns:
+            _Instantane: Version du stock et contexte correspondant, lus ensemble
+        """
+        with self._verrou:
+            version = self.stock.version()
+            if self._instantane is not None and version == self._instantane.version:
+                return self._instantane
+            prix = charger_donnees(dossier_stock=self.stock.dossier, fichier_csv=self.fichier_csv, precision=self.precision)
+            # Version lue avant le chargement : une écriture concurrente provoquera un nouveau rechargement.
+            # Si le stock n'existait pas, il vient d'être créé par la conversion du CSV
+            if version is None:
+                version = self.stock.version()
+            self._instantane = _Instantane(version, ContexteMarche(nettoyer_donnees(prix), indice=self.indice))
+            self.cache.vider()
+            print(f"Service : stock version {self._instantane.version} chargé "
+                  f"({self._instantane.contexte.prix.shape[1]} tickers)")
+            return self._instantane
+
+    def _tickers(self, etat, parametres, obligatoire=False):
+        """Tickers demandés (paramètre tickers, séparés par des virgules), tous par défaut"""
+        tickers = [t for t in parametres.get("tickers", "").split(",") if t]
+        if not tickers:
+            if obligatoire:
+                raise ValueError("Paramètre 'tickers' requis")
+            return None
+        manquants = [t for t in tickers if t not in etat.contexte.prix.columns]
+        if manquants:
+            raise KeyError(f"Tickers inconnus : {manquants}")
+        return tickers
+
+    def sante(self, etat, parametres):
+        prix = etat.contexte.prix
+        return {
+            "version": etat.version,
+            "tickers": prix.shape[1],
+            "dates": len(prix),
+            "premiere_date": prix.index[0],
+            "derniere_date": prix.index[-1],
+            "indice": self.indice,
+            "cache": {"entrees": len(self.cache), "succes": self.cache.succes, "echecs": self.cache.echecs},
+        }
+
+    def statistiques_titres(self, etat, parametres):
+        stats_globales = etat.statistiques["stats_globales"]
+        tickers = self._tickers(etat, parametres)
+        return stats_globales.loc[tickers] if tickers else stats_globales
+
+    def beta(self, etat, parametres):
+        if not etat.contexte.a_indice:
+            raise ValueError(f"L'indice '{self.indice}' n'est pas dans les données.")
+        tickers = self._tickers(etat, parametres)
+        regressions = etat.regressions.drop(columns="Corrélation")
+        return regressions.loc[tickers] if tickers else regressions
+
+    def correlation(self, etat, parametres):
+        if not etat.contexte.a_indice:
+            raise ValueError(f"L'indice '{self.indice}' n'est pas dans les données.")
+        tickers = self._tickers(etat, parametres)
+        correlations = etat.regressions["Corrélation"]
+        return correlations.loc[tickers] if tickers else correlations
+
+    def optimisation(self, etat, parametres):
+        # Import différé : scipy n'est chargé qu'à la première optimisation
+        from traitement.optimisation import optimiser_portefeuille
+
+        tickers = self._tickers(etat, parametres, obligatoire=True)
+        contrainte = parametres.get("contrainte", "1") not in ("0", "false", "non")
+        poids_min = float(parametres.get("poids_min", 0.01))
+
+        rendements_moyens = etat.contexte.rendements[tickers].mean()
+        cov_matrix = etat.covariance.loc[tickers, tickers]
+        poids = optimiser_portefeuille(rendements_moyens, cov_matrix, poids_min=poids_min, contrainte=contrainte)
+        if poids is None:
+            raise ValueError("L'optimisation n'a pas convergé")
+
+        rendement = float(rendements_moyens.to_numpy() @ poids) * 252
+        volatilite = float(np.sqrt(poids @ cov_matrix.to_numpy() @ poids * 252))
+        return {
+            "poids": pd.Series(poids, index=tickers),
+            "rendement_annualise": rendement,
+            "volatilite_annualisee": volatilite,
+            "sharpe": rendement / volatilite,
+        }
+
+    ROUTES = {
+        "/sante": "sante",
+        "/statistiques": "statistiques_titres",
+        "/beta": "beta",
+        "/correlation": "correlation",
+        "/optimisation": "optimisation",
+    }
+
+    def interroger(self, route, parametres):
+        """
+        Répond à une question, depuis le cache LRU si elle a déjà été posée pour la version courante du stock.
+
+        Args:
+            route (str): Chemin de la requête (voir ROUTES)
+            parametres (dict): Paramètres de la requête
+
+        Returns:
+            Objet sérialisable en JSON
+        """
+        if route not in self.ROUTES:
+            raise LookupError(f"Route inconnue : {route}")
+        etat = self.actualiser()
+        if route == "/sante":
+            return _en_json(self.sante(etat, parametres))
+
+        cle = (etat.version, route, tuple(sorted(parametres.items())))
+        present, reponse = self.cache.lire(cle)
+        if not present:
+            reponse = _en_json(getattr(self, self.ROUTES[route])(etat, parametres))
+            self.cache.ecrire(cle, reponse)
+        return reponse
+
+    def ajouter_prix(self, nouveaux):
+        """
+        Ajoute de nouveaux prix au stock puis recharge les données.
+
+        Seules les dates postérieures au dernier prix connu de chaque ticker sont
+        ajoutées (voir mettre_a_jour_donnees) ; le changement de version du stock
+        invalide le cache.
+
+        Args:
+            nouveaux (pandas.DataFrame): Prix à ajouter (dates × tickers)
+
+        Returns:
+            dict: Nouvelle version du stock et dimensions
+        """
+        with self._verrou:
+            nouveaux = nouveaux.sort_index()
+            mettre_a_jour_donnees(list(nouveaux.columns), date_debut=nouveaux.index[0],
+                                  date_fin=nouveaux.index[-1] + pd.Timedelta(days=1), dossier_stock=self.stock.dossier,
+                                  source=lambda groupe, debut, fin: nouveaux[groupe])
+            return _en_json(self.sante(self.actualiser(), {}))
+
+class _GestionnaireRequetes(BaseHTTPRequestHandler):
+    """Traduit les requêtes HTTP en appels au ServiceAnalyse du serveur"""
+
+    def _repondre(self, statut, contenu):
+        corps = json.dumps(contenu, ensure_ascii=False).encode("utf-8")
+        self.send_response(statut)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def _executer(self, fonction):
+        try:
+            self._repondre(200, fonction())
+        except LookupError as erreur:
+            self._repondre(404, {"erreur": erreur.args[0] if erreur.args else str(erreur)})
+        except (ValueError, TypeError) as erreur:
+            self._repondre(400, {"erreur": str(erreur)})
+        except Exception as erreur:
+            # Erreur inattendue (calcul, lecture du stock) : journalisée, et renvoyée au client en JSON
+            self.log_error("Erreur interne sur %s :\n%s", self.path, traceback.format_exc())
+            self._repondre(500, {"erreur": f"{type(erreur).__name__} : {erreur}"})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parametres = {cle: valeurs[-1] for cle, valeurs in parse_qs(url.query).items()}
+        self._executer(lambda: self.server.service.interroger(url.path, parametres))
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/prix":
+            self._repondre(404, {"erreur": f"Route inconnue : {self.path}"})
+            return
+
+        def ajouter():
+            longueur = int(self.headers.get("Content-Length", 0))
+            contenu = json.loads(self.rfile.read(longueur) or b"{}")
+            if "dates" not in contenu or "prix" not in contenu:
+                raise ValueError("Corps attendu : {\"dates\": [...], \"prix\": {ticker: [...]}}")
+            nouveaux = pd.DataFrame(contenu["prix"], index=pd.DatetimeIndex(contenu["dates"], name="Date"), dtype=float)
+            return self.server.service.ajouter_prix(nouveaux)
+
+        self._executer(ajouter)
+
+    def log_message(self, format, *args):
+        print(f"Service : {self.address_string()} {format % args}")
+
+def creer_serveur(service, hote="127.0.0.1", port=8765):
+    """
+    Crée le serveur HTTP (un thread par requête) ; port=0 choisit un port libre.
+
+    Returns:
+        ThreadingHTTPServer: Serveur prêt à être lancé (serve_forever)
+    """
+    serveur = ThreadingHTTPServer((hote, port), _GestionnaireRequetes)
+    serveur.service = service
+    return serveur
+
+def demarrer_service(hote="127.0.0.1", port=8765, **options):
+    """
+    Charge les données puis sert les requêtes jusqu'à interruption (Ctrl+C).
+
+    Args:
+        hote (str): Interface d'écoute
+        port (int): Port d'écoute
+        **options: Paramètres de ServiceAnalyse (dossier_stock, fichier_csv, indice, precision, taille_cache)
+    """
+    service = ServiceAnalyse(**options)
+    service.actualiser()
+    serveur = creer_serveur(service, hote=hote, port=port)
+    print(f"Service d'analyse à l'écoute sur http://{hote}:{serveur.server_port}")
+    try:
+        serveur.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        serveur.server_close()
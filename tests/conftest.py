@@ -0,0 +1,11 @@
+# tests/conftest.py
+"""
+Configuration commune des tests : la racine du projet est ajoutée au chemin
+d'import, comme lors d'une exécution de main.py ou cli.py depuis la racine.
+"""
+import os
+import sys
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RACINE not in sys.path:
+    sys.path.insert(0, RACINE)
@@ -0,0 +1,56 @@
+# tests/test_beta_calcul.py
+"""
+Tests des régressions sur l'indice : résultats comparés à scipy.stats.linregress, titre par titre.
+"""
+import io
+import contextlib
+import numpy as np
+import pytest
+from scipy.stats import linregress
+
+from benchmarks.donnees import generer_prix
+from traitement.nettoyage import nettoyer_donnees
+from traitement.contexte import ContexteMarche
+from traitement.beta_calcul import calculer_regressions
+
+@pytest.fixture(scope="module")
+def contexte():
+    # Introductions, radiations et trous : chaque titre a sa propre fenêtre commune avec l'indice
+    with contextlib.redirect_stdout(io.StringIO()):
+        prix = nettoyer_donnees(generer_prix(12, nb_annees=3, part_introductions=0.3, part_radiations=0.2, graine=5))
+    return ContexteMarche(prix)
+
+def test_identique_a_linregress(contexte):
+    rendements, indice = contexte.rendements, contexte.rendements_indice
+    resultats = calculer_regressions(rendements, indice, taille_bloc=5)
+    for titre in rendements.columns.drop(contexte.indice):
+        communs = rendements[titre].notna() & indice.notna()
+        x, y = indice[communs].to_numpy(), rendements.loc[communs, titre].to_numpy()
+        reference = linregress(x, y)
+        residus = y - reference.intercept - reference.slope * x
+        ligne = resultats.loc[titre]
+
+        assert ligne["Observations"] == len(x)
+        assert ligne["Beta"] == pytest.approx(reference.slope, rel=1e-10)
+        assert ligne["Alpha Annualisé"] == pytest.approx(reference.intercept * 252, rel=1e-8)
+        assert ligne["R²"] == pytest.approx(reference.rvalue ** 2, rel=1e-10)
+        assert ligne["Volatilité Résiduelle"] == pytest.approx(np.sqrt((residus ** 2).sum() / (len(x) - 2) * 252), rel=1e-10)
+        assert ligne["t-stat Beta"] == pytest.approx(reference.slope / reference.stderr, rel=1e-8)
+        assert ligne["t-stat Alpha"] == pytest.approx(reference.intercept / reference.intercept_stderr, rel=1e-6)
+
+def test_masque_de_validite(contexte):
+    # Le bitmap du contexte donne les mêmes effectifs et les mêmes sommes que les NaN du panel
+    rendements, indice = contexte.rendements, contexte.rendements_indice
+    sans_masque = calculer_regressions(rendements, indice)
+    avec_masque = calculer_regressions(rendements, indice, taille_bloc=4, validite=contexte.validite)
+    np.testing.assert_allclose(avec_masque.to_numpy(), sans_masque.to_numpy(), rtol=1e-12)
+
+def test_rendements_float32(contexte):
+    # Les sommes sont accumulées en float64 même pour des rendements stockés en float32
+    rendements = contexte.rendements.astype(np.float32)
+    indice = contexte.rendements_indice.astype(np.float32)
+    resultats = calculer_regressions(rendements, indice)
+    titre = rendements.columns[1]
+    communs = rendements[titre].notna() & indice.notna()
+    reference = linregress(indice[communs].to_numpy(np.float64), rendements.loc[communs, titre].to_numpy(np.float64))
+    assert resultats.loc[titre, "Beta"] == pytest.approx(reference.slope, rel=1e-9)
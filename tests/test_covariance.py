@@ -0,0 +1,85 @@
+# tests/test_covariance.py
+"""
+Tests des estimateurs de covariance en présence de fenêtres de cotation différentes.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.donnees import generer_prix
+from traitement.validite import MasqueValidite
+from traitement.covariance import (covariance_echantillon, covariance_ledoit_wolf, covariance_ewma,
+                                   covariance_factorielle)
+
+INDICE = "^STOXX50E"
+
+def _rendements(**options):
+    prix = generer_prix(20, nb_annees=3, **options)
+    return prix.pct_change(fill_method=None).iloc[1:]
+
+@pytest.fixture
+def complets():
+    return _rendements(part_introductions=0, part_radiations=0, taux_trous=0)
+
+@pytest.fixture
+def incomplets():
+    # Un tiers des titres introduits en cours de période : très peu de dates où tous sont cotés
+    return _rendements(part_introductions=0.3, graine=1)
+
+def test_ledoit_wolf_panel_complet(complets):
+    x = complets.to_numpy() - complets.to_numpy().mean(axis=0)
+    n, p = x.shape
+    empirique = x.T @ x / n
+    mu = np.trace(empirique) / p
+    delta = ((empirique - mu * np.eye(p)) ** 2).sum() / p
+    beta = min(sum(((np.outer(l, l) - empirique) ** 2).sum() for l in x) / n ** 2 / p, delta)
+    attendu = (1 - beta / delta) * empirique + beta / delta * mu * np.eye(p)
+    np.testing.assert_allclose(covariance_ledoit_wolf(complets).to_numpy(), attendu, rtol=1e-10, atol=1e-15)
+
+def test_ewma_panel_complet(complets):
+    poids = 0.94 ** np.arange(len(complets) - 1, -1, -1)
+    poids /= poids.sum()
+    x = complets.to_numpy() - poids @ complets.to_numpy()
+    np.testing.assert_allclose(covariance_ewma(complets).to_numpy(), (x * poids[:, None]).T @ x, atol=1e-15)
+
+@pytest.mark.parametrize("estimateur", [covariance_ledoit_wolf, covariance_ewma])
+def test_paires_sur_dates_communes(incomplets, estimateur):
+    assert len(incomplets.dropna()) < len(incomplets) / 2
+    covariance = estimateur(incomplets)
+    assert np.isfinite(covariance.to_numpy()).all()
+    assert np.linalg.eigvalsh(covariance.to_numpy()).min() > -1e-12
+
+    # Les titres cotés sur toute la période sont estimés sur toutes les dates, pas sur la fenêtre commune
+    entiers = incomplets.columns[incomplets.notna().all().to_numpy()]
+    assert len(entiers) >= 2
+    attendu = estimateur(incomplets[entiers])
+    if estimateur is covariance_ewma:
+        np.testing.assert_allclose(covariance.loc[entiers, entiers], attendu, rtol=1e-8, atol=1e-14)
+    else:
+        # Ledoit-Wolf : même covariance empirique, seule l'intensité de rétrécissement diffère
+        ratio = np.diag(covariance.loc[entiers, entiers]) / np.diag(incomplets[entiers].cov())
+        assert (ratio > 0.5).all() and (ratio < 1.5).all()
+
+def test_ledoit_wolf_bitmap(incomplets):
+    np.testing.assert_allclose(covariance_ledoit_wolf(incomplets, validite=MasqueValidite.depuis(incomplets)),
+                               covariance_ledoit_wolf(incomplets))
+
+def test_factorielle_fenetre_propre(complets, incomplets):
+    # Panel complet : régression de tous les actifs sur l'indice centré
+    titres = complets.drop(columns=INDICE)
+    y = titres.to_numpy() - titres.to_numpy().mean(axis=0)
+    f = complets[[INDICE]].to_numpy() - complets[INDICE].mean()
+    np.testing.assert_allclose(covariance_factorielle(titres, complets[INDICE]).expositions,
+                               np.linalg.lstsq(f, y, rcond=None)[0].T, rtol=1e-10)
+
+    # Panel incomplet : chaque titre est régressé sur sa propre fenêtre de cotation
+    titres = incomplets.drop(columns=INDICE)
+    modele = covariance_factorielle(titres, incomplets[INDICE], nb_facteurs_supplementaires=1)
+    for position, ticker in enumerate(titres.columns):
+        paire = incomplets[[ticker, INDICE]].dropna()
+        beta = paire.cov().iloc[0, 1] / paire[INDICE].var()
+        assert modele.expositions[position, 0] == pytest.approx(beta, rel=1e-8)
+    assert np.isfinite(modele.dense().to_numpy()).all()
+
+def test_echantillon_inchange(incomplets):
+    pd.testing.assert_frame_equal(covariance_echantillon(incomplets), incomplets.cov())
@@ -0,0 +1,80 @@
+# tests/test_flux.py
+"""
+Tests de l'accumulateur de statistiques en flux : mêmes résultats que calculer_statistiques.
+"""
+import io
+import contextlib
+import pandas as pd
+import pytest
+
+from benchmarks.donnees import generer_prix
+from traitement.nettoyage import nettoyer_donnees
+from traitement.analyse import calculer_statistiques
+from traitement.flux import AccumulateurStatistiques
+
+@pytest.fixture(scope="module")
+def prix():
+    # Introductions, radiations et trous : chaque titre a sa propre fenêtre de cotation
+    with contextlib.redirect_stdout(io.StringIO()):
+        return nettoyer_donnees(generer_prix(30, nb_annees=4, part_introductions=0.3, part_radiations=0.1, graine=3))
+
+@pytest.fixture(scope="module")
+def complet(prix):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return calculer_statistiques(prix)
+
+def _accumuler(prix, decoupage, **options):
+    accumulateur = AccumulateurStatistiques(**options)
+    debut = 0
+    for fin in decoupage + [len(prix)]:
+        accumulateur.ajouter(prix.iloc[debut:fin])
+        debut = fin
+    return accumulateur
+
+@pytest.mark.parametrize("decoupage", [[], [1, 250, 251, 252, 700], list(range(1, 40))])
+def test_identique_au_calcul_complet(prix, complet, decoupage):
+    resultat = _accumuler(prix, decoupage).resultat()
+    # Même schéma que calculer_statistiques (mesures de risque et toutes les périodes), sans les panels
+    assert set(resultat) == set(complet) - {"prix", "rendements"}
+    for cle, tableau in resultat.items():
+        pd.testing.assert_frame_equal(tableau, complet[cle], check_exact=False, rtol=1e-9)
+
+def test_queue_historique_bornee(prix, complet):
+    # Queue trop courte pour l'historique : VaR et CVaR historiques NaN, les autres colonnes restent exactes
+    stats = _accumuler(prix, [500], taille_queue=20).resultat()["stats_globales"]
+    historiques = ["VaR Historique 95%", "CVaR Historique 95%"]
+    assert stats.loc["^STOXX50E", historiques].isna().all()
+    exactes = stats[historiques].dropna()
+    pd.testing.assert_frame_equal(exactes, complet["stats_globales"].loc[exactes.index, historiques])
+    autres = stats.columns.difference(historiques)
+    pd.testing.assert_frame_equal(stats[autres], complet["stats_globales"][autres], check_exact=False, rtol=1e-9)
+
+def test_tickers_apparus_en_cours_de_flux(prix, complet):
+    # Chaque bloc ne contient que les tickers déjà cotés : les introductions apparaissent en cours de flux
+    accumulateur = AccumulateurStatistiques()
+    for debut in range(0, len(prix), 200):
+        accumulateur.ajouter(prix.iloc[debut:debut + 200].dropna(axis=1, how="all"))
+    assert len(accumulateur.colonnes) == prix.shape[1]
+    assert accumulateur.colonnes != list(prix.columns)
+    for cle, tableau in accumulateur.resultat().items():
+        attendu = complet[cle]
+        if cle == "stats_globales":
+            tableau = tableau.loc[attendu.index]
+        else:
+            tableau = tableau[attendu.columns]
+        pd.testing.assert_frame_equal(tableau, attendu, check_exact=False, rtol=1e-9)
+
+def test_ligne_par_ligne(prix):
+    accumulateur = AccumulateurStatistiques()
+    for _, ligne in prix.iloc[:300].iterrows():
+        accumulateur.ajouter(ligne)
+    with contextlib.redirect_stdout(io.StringIO()):
+        attendu = calculer_statistiques(prix.iloc[:300])
+    for cle, tableau in accumulateur.resultat().items():
+        pd.testing.assert_frame_equal(tableau, attendu[cle], check_exact=False, rtol=1e-9)
+
+def test_dates_anterieures_refusees(prix):
+    accumulateur = AccumulateurStatistiques()
+    accumulateur.ajouter(prix.iloc[:10])
+    with pytest.raises(ValueError):
+        accumulateur.ajouter(prix.iloc[5:20])
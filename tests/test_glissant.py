@@ -0,0 +1,59 @@
+# tests/test_glissant.py
+"""
+Tests des bêtas et corrélations glissants : résultats comparés aux fenêtres glissantes de pandas.
+"""
+import io
+import contextlib
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.donnees import generer_prix
+from traitement.nettoyage import nettoyer_donnees
+from traitement.contexte import ContexteMarche
+from traitement.glissant import _moments_glissants, calculer_beta_glissant, calculer_correlation_glissante
+
+@pytest.fixture(scope="module")
+def contexte():
+    # Introductions, radiations et trous longs (non comblés) : fenêtres incomplètes en cours d'historique
+    with contextlib.redirect_stdout(io.StringIO()):
+        prix = nettoyer_donnees(generer_prix(8, nb_annees=3, part_introductions=0.3, part_radiations=0.2,
+                                             taux_trous=0.01, longueur_trous_max=12, graine=11),
+                                limite_comblement=3)
+    return ContexteMarche(prix)
+
+def _reference(contexte, fenetre):
+    """Bêtas et corrélations de pandas sur les paires présentes, fenêtre complète exigée"""
+    x = contexte.rendements_indice
+    betas, correlations = {}, {}
+    for titre in contexte.rendements.columns.drop(contexte.indice):
+        y = contexte.rendements[titre]
+        xm = x.where(y.notna())
+        glissant = (lambda s: s.rolling(fenetre, min_periods=fenetre)) if fenetre else (lambda s: s.expanding(min_periods=2))
+        betas[titre] = glissant(y).cov(x) / glissant(xm).var()
+        correlations[titre] = glissant(y).corr(x)
+    return pd.DataFrame(betas), pd.DataFrame(correlations)
+
+@pytest.mark.parametrize("fenetre", [20, 60, None])
+def test_identique_a_pandas(contexte, fenetre):
+    beta, correlation = _reference(contexte, fenetre)
+    cle = fenetre if fenetre is not None else "expansive"
+    resultats = _moments_glissants(contexte.rendements, contexte.rendements_indice, [fenetre],
+                                   exclure=contexte.indice, taille_bloc=3)[cle]
+    assert beta.notna().to_numpy().any() and beta.isna().to_numpy().any()
+    pd.testing.assert_frame_equal(resultats["beta"], beta, check_names=False, rtol=1e-9, atol=1e-12)
+    pd.testing.assert_frame_equal(resultats["correlation"], correlation, check_names=False, rtol=1e-9, atol=1e-12)
+
+def test_fonctions_publiques(contexte):
+    beta, correlation = _reference(contexte, 60)
+    pd.testing.assert_frame_equal(calculer_beta_glissant(contexte, fenetre=60), beta, check_names=False,
+                                  rtol=1e-9, atol=1e-12)
+    pd.testing.assert_frame_equal(calculer_correlation_glissante(contexte, fenetre=60), correlation,
+                                  check_names=False, rtol=1e-9, atol=1e-12)
+
+def test_masque_de_validite(contexte):
+    sans_masque = _moments_glissants(contexte.rendements, contexte.rendements_indice, [60], exclure=contexte.indice)
+    avec_masque = _moments_glissants(contexte.rendements, contexte.rendements_indice, [60], exclure=contexte.indice,
+                                     validite=contexte.validite)
+    for nom in ("beta", "correlation"):
+        np.testing.assert_array_equal(avec_masque[60][nom].to_numpy(), sans_masque[60][nom].to_numpy())
@@ -0,0 +1,53 @@
+# tests/test_instrumentation.py
+"""
+Tests de l'instrumentation : activation par variables d'environnement et rapport des sous-commandes.
+"""
+import os
+import sys
+import json
+import subprocess
+import pytest
+
+from benchmarks.donnees import generer_prix
+from traitement.stockage import StockPrix
+from utils import instrumentation
+import cli
+
+from conftest import RACINE
+
+def test_memoire_suivie_des_l_import():
+    script = ("import tracemalloc, utils.instrumentation as i; "
+              "print(tracemalloc.is_tracing(), i.instrumentation_active())")
+    environnement = dict(os.environ, INSTRUMENTATION="1", INSTRUMENTATION_MEMOIRE="1")
+    sortie = subprocess.run([sys.executable, "-c", script], cwd=RACINE, env=environnement, capture_output=True,
+                            text=True, check=True).stdout
+    assert sortie.split() == ["True", "True"]
+
+@pytest.fixture
+def instrumentation_active():
+    instrumentation.reinitialiser_mesures()
+    instrumentation.activer_instrumentation(actif=True)
+    yield
+    instrumentation.activer_instrumentation(actif=False)
+    instrumentation.reinitialiser_mesures()
+
+def test_rapport_des_sous_commandes(tmp_path, instrumentation_active):
+    stock = tmp_path / "prix"
+    StockPrix(str(stock)).ecrire(generer_prix(10, nb_annees=2))
+    sortie = tmp_path / "resultats"
+
+    cli.main(["beta", "--stock", str(stock), "--sortie", str(sortie)])
+
+    with open(sortie / "instrumentation_beta.json", encoding="utf-8") as f:
+        rapport = json.load(f)
+    etapes = {mesure["etape"] for mesure in rapport["mesures"]}
+    assert {"charger_donnees", "nettoyer_donnees", "calculer_beta"} <= etapes
+    assert (sortie / "instrumentation_beta.csv").exists()
+
+def test_pas_de_rapport_sans_instrumentation(tmp_path):
+    stock = tmp_path / "prix"
+    StockPrix(str(stock)).ecrire(generer_prix(10, nb_annees=2))
+    sortie = tmp_path / "resultats"
+
+    cli.main(["beta", "--stock", str(stock), "--sortie", str(sortie)])
+    assert not (sortie / "instrumentation_beta.json").exists()
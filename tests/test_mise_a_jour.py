@@ -0,0 +1,84 @@
+# tests/test_mise_a_jour.py
+"""
+Tests de la mise à jour incrémentale du stock de prix (mettre_a_jour_donnees).
+"""
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.donnees import generer_prix
+from traitement.stockage import StockPrix
+from traitement.nettoyage import mettre_a_jour_donnees
+
+class SourceEnregistree:
+    """Source de prix en mémoire qui enregistre chaque appel (tickers, début, fin)"""
+
+    def __init__(self, prix):
+        self.prix = prix
+        self.appels = []
+        self._verrou = threading.Lock()
+
+    def __call__(self, tickers, date_debut, date_fin):
+        with self._verrou:
+            self.appels.append((tuple(tickers), pd.Timestamp(date_debut), pd.Timestamp(date_fin)))
+        lignes = (self.prix.index >= pd.Timestamp(date_debut)) & (self.prix.index < pd.Timestamp(date_fin))
+        return self.prix.loc[lignes, [t for t in tickers if t in self.prix.columns]]
+
+@pytest.fixture
+def prix():
+    return generer_prix(6, nb_annees=1, part_introductions=0, part_radiations=0, taux_trous=0)
+
+def test_premiere_mise_a_jour_telecharge_tout(tmp_path, prix):
+    source = SourceEnregistree(prix)
+    fin = prix.index[-1] + pd.Timedelta(days=1)
+    data = mettre_a_jour_donnees(list(prix.columns), date_debut=prix.index[0], date_fin=fin,
+                                 dossier_stock=str(tmp_path), source=source, debit=None)
+
+    assert {debut for _, debut, _ in source.appels} == {prix.index[0]}
+    pd.testing.assert_frame_equal(data[prix.columns], prix, check_freq=False)
+    pd.testing.assert_frame_equal(StockPrix(str(tmp_path)).charger()[prix.columns], prix, check_freq=False)
+
+def test_seules_les_dates_manquantes_sont_demandees(tmp_path, prix):
+    coupure = prix.index[200]
+    anciens, nouveau = list(prix.columns[:-1]), prix.columns[-1]
+    StockPrix(str(tmp_path)).ecrire(prix.loc[:coupure, anciens])
+
+    source = SourceEnregistree(prix)
+    fin = prix.index[-1] + pd.Timedelta(days=1)
+    data = mettre_a_jour_donnees(list(prix.columns), date_debut=prix.index[0], date_fin=fin,
+                                 dossier_stock=str(tmp_path), source=source, debit=None)
+
+    # Tickers déjà stockés : reprise au lendemain de leur dernière valeur ; nouveau ticker : depuis date_debut
+    for tickers, debut, _ in source.appels:
+        attendu = prix.index[0] if tickers == (nouveau,) else coupure + pd.Timedelta(days=1)
+        assert debut == attendu
+    assert {t for tickers, _, _ in source.appels for t in tickers} == set(prix.columns)
+    pd.testing.assert_frame_equal(data[prix.columns], prix, check_freq=False)
+
+def test_valeurs_stockees_conservees(tmp_path, prix):
+    coupure = prix.index[100]
+    stocke = prix.loc[:coupure].copy()
+    stocke.iloc[-1, 0] = 123.0
+    StockPrix(str(tmp_path)).ecrire(stocke)
+
+    # La source renvoie aussi des dates déjà stockées : elles ne doivent pas écraser le stock
+    source = lambda tickers, debut, fin: prix.loc[:, list(tickers)]
+    data = mettre_a_jour_donnees(list(prix.columns), date_fin=prix.index[-1] + pd.Timedelta(days=1),
+                                 dossier_stock=str(tmp_path), source=source, debit=None)
+    assert data.loc[coupure, prix.columns[0]] == 123.0
+    assert data.index[-1] == prix.index[-1]
+
+def test_deuxieme_execution_sans_effet(tmp_path, prix):
+    fin = prix.index[-1] + pd.Timedelta(days=1)
+    mettre_a_jour_donnees(list(prix.columns), date_debut=prix.index[0], date_fin=fin,
+                          dossier_stock=str(tmp_path), source=SourceEnregistree(prix), debit=None)
+    stock = StockPrix(str(tmp_path))
+    version = stock.version()
+
+    source = SourceEnregistree(prix)
+    data = mettre_a_jour_donnees(list(prix.columns), date_debut=prix.index[0], date_fin=fin,
+                                 dossier_stock=str(tmp_path), source=source, debit=None)
+    assert source.appels == []
+    assert stock.version() == version
+    assert np.allclose(data[prix.columns].to_numpy(), prix.to_numpy())
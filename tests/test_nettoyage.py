@@ -0,0 +1,66 @@
+# tests/test_nettoyage.py
+"""
+Tests du nettoyage par fenêtre de cotation et du bitmap de validité, comparés à un calcul titre par titre.
+"""
+import io
+import contextlib
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.donnees import generer_prix
+from traitement.nettoyage import nettoyer_donnees
+from traitement.contexte import ContexteMarche
+from traitement.validite import MasqueValidite
+
+@pytest.fixture(scope="module")
+def prix():
+    # Introductions, radiations et trous de 1 à 10 dates
+    return generer_prix(15, nb_annees=2, part_introductions=0.3, part_radiations=0.2, taux_trous=0.02,
+                        longueur_trous_max=10, graine=2)
+
+def _combler_reference(serie, limite):
+    """Comble les trous d'au plus limite dates entre deux cotations, date par date"""
+    valeurs = serie.to_numpy(copy=True)
+    presents = np.flatnonzero(~np.isnan(valeurs))
+    for precedente, suivante in zip(presents[:-1], presents[1:]):
+        if 1 < suivante - precedente <= limite + 1:
+            valeurs[precedente + 1:suivante] = valeurs[precedente]
+    return pd.Series(valeurs, index=serie.index, name=serie.name)
+
+@pytest.mark.parametrize("limite", [0, 3, 5])
+def test_identique_au_comblement_titre_par_titre(prix, limite):
+    with contextlib.redirect_stdout(io.StringIO()):
+        nettoye = nettoyer_donnees(prix, limite_comblement=limite, taille_bloc=4)
+    attendu = pd.DataFrame({titre: _combler_reference(prix[titre], limite) for titre in prix.columns})
+    pd.testing.assert_frame_equal(nettoye, attendu)
+
+    # Rien n'est inventé hors de la fenêtre de cotation de chaque titre
+    for titre in prix.columns:
+        serie = nettoye[titre]
+        assert serie.first_valid_index() == prix[titre].first_valid_index()
+        assert serie.last_valid_index() == prix[titre].last_valid_index()
+
+def test_rendements_et_bitmap(prix):
+    with contextlib.redirect_stdout(io.StringIO()):
+        contexte = ContexteMarche(nettoyer_donnees(prix, limite_comblement=3))
+    # Un rendement manque dès que l'un de ses deux prix manque
+    attendu = contexte.prix.pct_change(fill_method=None).iloc[1:]
+    pd.testing.assert_frame_equal(contexte.rendements, attendu, rtol=1e-12)
+
+    validite = contexte.validite
+    presents = contexte.rendements.notna()
+    np.testing.assert_array_equal(validite.extraire(slice(None)), presents.to_numpy())
+    np.testing.assert_array_equal(validite.effectifs, presents.sum().to_numpy())
+    fenetres = validite.fenetres()
+    pd.testing.assert_series_equal(fenetres["Première Date"], contexte.rendements.apply(pd.Series.first_valid_index),
+                                   check_names=False)
+    pd.testing.assert_series_equal(fenetres["Dernière Date"], contexte.rendements.apply(pd.Series.last_valid_index),
+                                   check_names=False)
+
+def test_bitmap_colonne_vide():
+    df = pd.DataFrame({"A": [1.0, np.nan, 2.0], "B": [np.nan] * 3}, index=pd.bdate_range("2020-01-01", periods=3))
+    validite = MasqueValidite.depuis(df)
+    assert validite.effectifs.tolist() == [2, 0]
+    assert validite.fenetres()["Première Date"].isna().tolist() == [False, True]
+    assert not validite.complet
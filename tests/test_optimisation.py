@@ -0,0 +1,113 @@
+# tests/test_optimisation.py
+"""
+Tests de l'optimisation : rendements de portefeuille en présence de fenêtres de
+cotation différentes, forme fermée et frontière comparées au solveur SLSQP.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.optimize import check_grad, minimize
+
+from traitement.covariance import CovarianceFactorielle
+from traitement.optimisation import (rendements_portefeuille, portefeuille_tangent, optimiser_portefeuille,
+                                     calculer_frontiere_efficiente, _minimiser_variance, _sharpe_negatif_et_gradient)
+
+def test_poids_renormalises_sur_les_titres_cotes():
+    dates = pd.bdate_range("2020-01-01", periods=4, name="Date")
+    rendements = pd.DataFrame({
+        "A": [0.01, 0.02, -0.01, 0.03],
+        "B": [np.nan, np.nan, 0.02, 0.01],   # introduit le troisième jour
+        "C": [0.00, 0.01, 0.01, np.nan],     # radié le dernier jour
+    }, index=dates)
+    poids = np.array([0.5, 0.3, 0.2])
+
+    resultat = rendements_portefeuille(rendements, poids)
+
+    attendu = [
+        (0.5 * 0.01 + 0.2 * 0.00) / 0.7,
+        (0.5 * 0.02 + 0.2 * 0.01) / 0.7,
+        0.5 * -0.01 + 0.3 * 0.02 + 0.2 * 0.01,
+        (0.5 * 0.03 + 0.3 * 0.01) / 0.8,
+    ]
+    np.testing.assert_allclose(resultat.to_numpy(), attendu)
+    assert resultat.index.equals(dates)
+
+def test_panel_complet_inchange():
+    rendements = pd.DataFrame(np.random.default_rng(0).normal(0, 0.01, (50, 4)))
+    poids = np.array([0.1, 0.2, 0.3, 0.4])
+    np.testing.assert_allclose(rendements_portefeuille(rendements, poids), (rendements * poids).sum(axis=1))
+
+def test_aucun_titre_cote():
+    rendements = pd.DataFrame({"A": [np.nan, 0.01], "B": [np.nan, 0.02]})
+    assert rendements_portefeuille(rendements, np.array([0.5, 0.5])).tolist() == [0.0, 0.015]
+
+@pytest.fixture
+def marche():
+    # Covariance factorielle (un facteur de marché) ; rendements choisis pour que Σ⁻¹μ soit strictement positif
+    generateur = np.random.default_rng(1)
+    nb = 8
+    expositions = generateur.uniform(0.8, 1.2, (nb, 1))
+    variances_specifiques = generateur.uniform(1e-4, 3e-4, nb)
+    cov_facteurs = np.array([[1.5e-4]])
+    sigma = expositions @ cov_facteurs @ expositions.T + np.diag(variances_specifiques)
+    mu = sigma @ generateur.uniform(0.05, 0.2, nb) * 2
+    return mu, sigma, CovarianceFactorielle(expositions, cov_facteurs, variances_specifiques)
+
+def _sharpe(poids, mu, sigma):
+    return mu @ poids / np.sqrt(poids @ sigma @ poids)
+
+def test_forme_fermee_identique_au_solveur(marche):
+    mu, sigma, _ = marche
+    tangent = portefeuille_tangent(mu, sigma)
+    assert tangent is not None and (tangent > 0.01).all()
+
+    # Bornes inactives : SLSQP, avec l'objectif et les contraintes d'optimiser_portefeuille, converge vers
+    # le portefeuille tangent (tolérance resserrée : le Sharpe quotidien est très plat autour de l'optimum)
+    nb = len(mu)
+    precis = minimize(_sharpe_negatif_et_gradient, np.full(nb, 1 / nb), args=(mu, sigma), jac=True, method="SLSQP",
+                      bounds=[(0.01, 1)] * nb, options={"ftol": 1e-15, "maxiter": 1000},
+                      constraints={"type": "eq", "fun": lambda w: w.sum() - 1, "jac": lambda w: np.ones(nb)})
+    assert precis.success
+    np.testing.assert_allclose(precis.x, tangent, atol=1e-5)
+
+    for contrainte in (False, True):
+        # Avec les tolérances par défaut, le solveur s'arrête juste avant l'optimum de la forme fermée
+        solveur = optimiser_portefeuille(mu, sigma, contrainte=contrainte, forme_fermee=False)
+        np.testing.assert_allclose(solveur, tangent, atol=1e-2)
+        assert _sharpe(solveur, mu, sigma) == pytest.approx(_sharpe(tangent, mu, sigma), rel=1e-4)
+        assert _sharpe(tangent, mu, sigma) >= _sharpe(solveur, mu, sigma)
+        np.testing.assert_array_equal(optimiser_portefeuille(mu, sigma, contrainte=contrainte), tangent)
+
+def test_forme_fermee_covariance_factorielle(marche):
+    mu, sigma, factorielle = marche
+    np.testing.assert_allclose(portefeuille_tangent(mu, factorielle), portefeuille_tangent(mu, sigma), rtol=1e-10)
+
+def test_bornes_actives_solveur(marche):
+    mu, sigma, _ = marche
+    mu = mu.copy()
+    mu[0] = -5e-4   # Σ⁻¹μ a une composante négative : la forme fermée viole les bornes
+    assert (portefeuille_tangent(mu, sigma) < 0).any()
+    poids = optimiser_portefeuille(mu, sigma, poids_min=0.01)
+    np.testing.assert_array_equal(poids, optimiser_portefeuille(mu, sigma, poids_min=0.01, forme_fermee=False))
+    assert poids.sum() == pytest.approx(1) and (poids >= 0.01 - 1e-9).all()
+
+def test_gradient_analytique(marche):
+    mu, sigma, _ = marche
+    poids = np.random.default_rng(2).dirichlet(np.ones(len(mu)))
+    ecart = check_grad(lambda w: _sharpe_negatif_et_gradient(w, mu, sigma)[0],
+                       lambda w: _sharpe_negatif_et_gradient(w, mu, sigma)[1], poids)
+    assert ecart < 1e-6 * np.linalg.norm(_sharpe_negatif_et_gradient(poids, mu, sigma)[1])
+
+def test_frontiere_demarrage_a_chaud(marche):
+    mu, sigma, _ = marche
+    mu = mu.copy()
+    mu[0] = -5e-4   # Bornes actives sur une partie de la frontière
+    frontiere = calculer_frontiere_efficiente(pd.Series(mu), sigma, nb_points=8)
+    assert len(frontiere) == 8
+    assert (np.diff(frontiere["Volatilité"]) > -1e-10).all()
+    bornes = tuple((0.0, 1) for _ in mu)
+    depart = np.full(len(mu), 1 / len(mu))
+    for _, point in frontiere.iterrows():
+        # Chaque point est l'optimum obtenu sans démarrage à chaud
+        froid = _minimiser_variance(sigma, bornes, depart, rendements=mu, cible=point["Rendement"])
+        assert point["Volatilité"] == pytest.approx(np.sqrt(froid @ sigma @ froid), rel=1e-4)
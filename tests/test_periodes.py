@@ -0,0 +1,41 @@
+# tests/test_periodes.py
+"""
+Tests des rendements par période : résultats comparés à un rééchantillonnage pandas.
+"""
+import io
+import contextlib
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.donnees import generer_prix
+from traitement.nettoyage import nettoyer_donnees
+from traitement.contexte import ContexteMarche
+from traitement.periodes import calculer_rendements_periodiques, rendements_relatifs
+
+@pytest.fixture(scope="module")
+def rendements():
+    # Titres introduits ou radiés en cours de période : périodes sans aucun rendement comprises
+    with contextlib.redirect_stdout(io.StringIO()):
+        prix = nettoyer_donnees(generer_prix(10, nb_annees=3, part_introductions=0.4, part_radiations=0.2, graine=4))
+    return ContexteMarche(prix).rendements
+
+@pytest.mark.parametrize("frequence, regle, libelle", [
+    ("mensuelle", "ME", "2000-02"),
+    ("trimestrielle", "QE", "2000T1"),
+    ("annuelle", "YE", 2000),
+])
+def test_identique_au_reechantillonnage(rendements, frequence, regle, libelle):
+    resultat = calculer_rendements_periodiques(rendements, frequences=(frequence,))[frequence]
+    attendu = (1 + rendements).resample(regle).prod(min_count=1) - 1
+    assert resultat.shape == attendu.shape
+    assert libelle in resultat.index
+    np.testing.assert_allclose(resultat.to_numpy(), attendu.to_numpy(), rtol=1e-12, atol=1e-15)
+    assert resultat.isna().to_numpy().any()
+
+def test_rendements_relatifs(rendements):
+    annuels = calculer_rendements_periodiques(rendements, frequences=("annuelle",))["annuelle"]
+    relatifs = rendements_relatifs(annuels, "^STOXX50E")
+    pd.testing.assert_frame_equal(relatifs, annuels.sub(annuels["^STOXX50E"], axis=0))
+    assert (relatifs["^STOXX50E"] == 0).all()
+    assert rendements_relatifs(annuels.drop(columns="^STOXX50E"), "^STOXX50E") is None
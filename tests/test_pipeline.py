@@ -0,0 +1,69 @@
+# tests/test_pipeline.py
+"""
+Tests du pipeline mémorisé : clés de cache et invalidation par le code.
+"""
+import sys
+import importlib
+import textwrap
+import pandas as pd
+import pytest
+
+from utils.pipeline import Pipeline, CacheDisque, empreinte
+
+def _ecrire_module(dossier, nom, source):
+    (dossier / f"{nom}.py").write_text(textwrap.dedent(source), encoding="utf-8")
+
+@pytest.fixture
+def modules(tmp_path, monkeypatch):
+    """Module d'étape (etape_test) qui appelle une fonction d'un module auxiliaire (aide_test)"""
+    dossier = tmp_path / "modules"
+    dossier.mkdir()
+    _ecrire_module(dossier, "aide_test", """
+        def facteur():
+            return 2
+    """)
+    _ecrire_module(dossier, "etape_test", """
+        from aide_test import facteur
+
+        def multiplier(serie):
+            return serie * facteur()
+    """)
+    monkeypatch.syspath_prepend(str(dossier))
+    # Pas de .pyc : un module réécrit dans la même seconde avec la même taille serait sinon relu depuis l'ancien
+    monkeypatch.setattr(sys, "dont_write_bytecode", True)
+    yield dossier
+    for nom in ("aide_test", "etape_test"):
+        sys.modules.pop(nom, None)
+
+def _executer(cache):
+    etape = importlib.import_module("etape_test")
+    pipeline = Pipeline(cache=cache, nb_threads=1).ajouter("resultat", etape.multiplier, ["serie"])
+    return pipeline.executer({"serie": pd.Series([1.0, 2.0, 3.0])})["resultat"]
+
+def test_resultat_relu_depuis_le_cache(tmp_path, modules, capsys):
+    cache = CacheDisque(str(tmp_path / "cache"))
+    assert _executer(cache).tolist() == [2.0, 4.0, 6.0]
+    assert _executer(cache).tolist() == [2.0, 4.0, 6.0]
+    assert "lue depuis le cache" in capsys.readouterr().out
+
+def test_modification_d_un_module_auxiliaire_invalide_le_cache(tmp_path, modules, capsys):
+    cache = CacheDisque(str(tmp_path / "cache"))
+    assert _executer(cache).tolist() == [2.0, 4.0, 6.0]
+
+    # Seul le module auxiliaire change : le code de la fonction de l'étape est identique
+    _ecrire_module(modules, "aide_test", """
+        def facteur():
+            return 3
+    """)
+    importlib.reload(sys.modules["aide_test"])
+    importlib.reload(sys.modules["etape_test"])
+    capsys.readouterr()
+
+    assert _executer(cache).tolist() == [3.0, 6.0, 9.0]
+    assert "lue depuis le cache" not in capsys.readouterr().out
+
+def test_empreinte_par_contenu():
+    a = pd.DataFrame({"x": [1.0, 2.0]})
+    assert empreinte(a) == empreinte(a.copy())
+    assert empreinte(a) != empreinte(a.assign(x=[1.0, 2.5]))
+    assert empreinte({"b": 1, "a": 2}) == empreinte({"a": 2, "b": 1})
@@ -0,0 +1,102 @@
+# tests/test_risque.py
+"""
+Tests des mesures de risque : queue historique comparée à numpy.quantile, et
+tableau complet comparé à un calcul colonne par colonne.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from traitement.risque import calculer_metriques_risque, queue_historique
+
+@pytest.fixture
+def rendements():
+    # Colonnes d'effectifs différents (NaN en fin ou en début), sans égalités
+    generateur = np.random.default_rng(7)
+    valeurs = generateur.standard_t(4, size=(600, 5)) * 0.01
+    valeurs[450:, 1] = np.nan
+    valeurs[:590, 2] = np.nan
+    valeurs[::3, 3] = np.nan
+    return valeurs
+
+@pytest.mark.parametrize("alpha", [0.05, 0.01, 0.1, 0.5])
+def test_queue_historique_reference(rendements, alpha):
+    effectifs = (~np.isnan(rendements)).sum(axis=0)
+    var, cvar = queue_historique(rendements, effectifs, alpha)
+    for j in range(rendements.shape[1]):
+        r = rendements[~np.isnan(rendements[:, j]), j]
+        quantile = np.quantile(r, alpha)
+        assert var[j] == pytest.approx(-quantile, rel=1e-12)
+        assert cvar[j] == pytest.approx(-r[r <= quantile].mean(), rel=1e-12)
+
+def test_queue_historique_egalites():
+    # Égalités au quantile : la CVaR porte sur les floor(alpha × (n - 1)) + 1 plus petits rendements
+    r = np.array([-0.03, -0.02, -0.02, -0.02, 0.01, 0.02, 0.03, 0.04, 0.05, 0.06, 0.07])
+    alpha = 0.1
+    var, cvar = queue_historique(r[:, None], np.array([len(r)]), alpha)
+    rangs = int(np.floor(alpha * (len(r) - 1))) + 1
+    assert var[0] == pytest.approx(-np.quantile(r, alpha))
+    assert cvar[0] == pytest.approx(-np.sort(r)[:rangs].mean())
+
+def test_queue_historique_tete_seule(rendements):
+    # Seuls les plus mauvais rendements sont fournis, avec l'effectif total (cas de l'accumulateur en flux)
+    r = rendements[:, 0]
+    alpha = 0.05
+    tete = np.sort(r)[:40, None]
+    attendu = queue_historique(r[:, None], np.array([len(r)]), alpha)
+    obtenu = queue_historique(tete, np.array([len(r)]), alpha)
+    np.testing.assert_allclose(obtenu, attendu, rtol=1e-12)
+
+def test_queue_historique_effectif_insuffisant():
+    var, cvar = queue_historique(np.array([[0.01, np.nan], [np.nan, np.nan]]), np.array([1, 0]), 0.05)
+    assert np.isnan(var).all() and np.isnan(cvar).all()
+
+def _metriques_reference(r, niveau=0.95, periodes_par_an=252):
+    """Mesures de risque d'une série de rendements, calculées directement"""
+    alpha = 1 - niveau
+    valeur = (1 + r.fillna(0.0)).cumprod()
+    sommet = valeur.cummax()
+    duree, duree_max = 0, 0
+    for v, s in zip(valeur, sommet):
+        duree = 0 if v >= s else duree + 1
+        duree_max = max(duree_max, duree)
+
+    r = r.dropna()
+    quantile = np.quantile(r, alpha)
+    perf_annualisee = np.prod(1 + r) ** (periodes_par_an / len(r)) - 1
+    asymetrie, kurtosis = stats.skew(r), stats.kurtosis(r)
+
+    def cornish_fisher(z):
+        return (z + (z ** 2 - 1) * asymetrie / 6 + (z ** 3 - 3 * z) * kurtosis / 24
+                - (2 * z ** 3 - 5 * z) * asymetrie ** 2 / 36)
+
+    z_queue = stats.norm.ppf(alpha * (np.arange(200) + 0.5) / 200)
+    drawdown_max = (valeur / sommet - 1).min()
+    return {
+        "Max Drawdown": drawdown_max,
+        "Durée Max Drawdown (séances)": duree_max,
+        "VaR Historique 95%": -quantile,
+        "CVaR Historique 95%": -r[r <= quantile].mean(),
+        "VaR Cornish-Fisher 95%": -(r.mean() + r.std() * cornish_fisher(stats.norm.ppf(alpha))),
+        "CVaR Cornish-Fisher 95%": -(r.mean() + r.std() * cornish_fisher(z_queue).mean()),
+        "Ratio de Sortino": perf_annualisee / (np.sqrt((np.minimum(r, 0) ** 2).mean()) * np.sqrt(periodes_par_an)),
+        "Ratio de Calmar": perf_annualisee / abs(drawdown_max),
+    }
+
+def test_metriques_risque_reference(rendements):
+    returns = pd.DataFrame(rendements, columns=list("ABCDE"))
+    resultat = calculer_metriques_risque(returns)
+    attendu = pd.DataFrame({titre: _metriques_reference(returns[titre]) for titre in returns.columns}).T
+    assert list(resultat.columns) == list(attendu.columns)
+    pd.testing.assert_frame_equal(resultat, attendu, check_dtype=False, rtol=1e-10)
+
+def test_metriques_risque_performance_fournie(rendements):
+    # La performance annualisée fournie sert de numérateur aux ratios de Sortino et de Calmar
+    returns = pd.DataFrame(rendements, columns=list("ABCDE"))
+    perf = pd.Series([0.1, -0.05, 0.2, 0.0, 0.3], index=returns.columns)
+    resultat = calculer_metriques_risque(returns, perf_annualisee=perf)
+    reference = calculer_metriques_risque(returns)
+    perf_defaut = np.nanprod(1 + rendements, axis=0) ** (252 / (~np.isnan(rendements)).sum(axis=0)) - 1
+    for colonne in ("Ratio de Sortino", "Ratio de Calmar"):
+        np.testing.assert_allclose(resultat[colonne], reference[colonne] / perf_defaut * perf.to_numpy(), rtol=1e-12)
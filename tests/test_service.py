@@ -0,0 +1,140 @@
+# tests/test_service.py
+"""
+Tests du service d'analyse : cache LRU, invalidation par la version du stock et codes d'erreur HTTP.
+"""
+import json
+import threading
+import urllib.error
+import urllib.request
+import pandas as pd
+import pytest
+
+from benchmarks.donnees import generer_prix
+from traitement.stockage import StockPrix
+from service import CacheLRU, ServiceAnalyse, creer_serveur
+
+def test_cache_lru_succes_et_eviction():
+    cache = CacheLRU(capacite=2)
+    cache.ecrire("a", 1)
+    cache.ecrire("b", 2)
+    assert cache.lire("a") == (True, 1)      # "a" devient la plus récente
+    cache.ecrire("c", 3)                     # évince "b", la moins récemment utilisée
+    assert cache.lire("b") == (False, None)
+    assert cache.lire("a") == (True, 1)
+    assert cache.lire("c") == (True, 3)
+    assert len(cache) == 2
+    assert (cache.succes, cache.echecs) == (3, 1)
+
+@pytest.fixture
+def prix():
+    return generer_prix(6, nb_annees=2, part_introductions=0, part_radiations=0, taux_trous=0)
+
+@pytest.fixture
+def service(tmp_path, prix):
+    StockPrix(str(tmp_path / "prix")).ecrire(prix)
+    return ServiceAnalyse(dossier_stock=str(tmp_path / "prix"), fichier_csv=str(tmp_path / "absent.csv"))
+
+@pytest.fixture
+def url(service):
+    serveur = creer_serveur(service, port=0)
+    thread = threading.Thread(target=serveur.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{serveur.server_port}"
+    serveur.shutdown()
+    serveur.server_close()
+
+def _requete(url, chemin, corps=None):
+    """Statut et contenu JSON d'une requête GET (ou POST si un corps est fourni)"""
+    donnees = json.dumps(corps).encode("utf-8") if corps is not None else None
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url + chemin, data=donnees), timeout=30) as reponse:
+            return reponse.status, json.loads(reponse.read())
+    except urllib.error.HTTPError as erreur:
+        return erreur.code, json.loads(erreur.read())
+
+def test_reponses_en_cache(service, url, prix):
+    tickers = ",".join(prix.columns[1:3])
+    statut, premiere = _requete(url, f"/beta?tickers={tickers}")
+    assert statut == 200 and set(premiere) == set(prix.columns[1:3])
+    assert (service.cache.succes, service.cache.echecs) == (0, 1)
+
+    statut, seconde = _requete(url, f"/beta?tickers={tickers}")
+    assert statut == 200 and seconde == premiere
+    assert (service.cache.succes, service.cache.echecs) == (1, 1)
+
+def test_nouveaux_prix_invalident_le_cache(service, url, prix):
+    ticker = prix.columns[1]
+    _, avant = _requete(url, f"/statistiques?tickers={ticker}")
+    version = service.version
+    assert len(service.cache) == 1
+
+    date = prix.index[-1] + pd.offsets.BDay(1)
+    statut, sante = _requete(url, "/prix", {"dates": [str(date.date())],
+                                            "prix": {t: [float(prix[t].iloc[-1]) * 1.5] for t in prix.columns}})
+    assert statut == 200
+    assert sante["version"] != version and sante["derniere_date"] == str(date.date())
+    assert len(service.cache) == 0
+
+    # La même question est recalculée sur les nouvelles données
+    _, apres = _requete(url, f"/statistiques?tickers={ticker}")
+    assert apres[ticker]["Performance Totale"] != avant[ticker]["Performance Totale"]
+    assert service.cache.echecs == 2
+
+def test_mise_a_jour_externe_du_stock(service, prix):
+    service.interroger("/beta", {})
+    version = service.version
+    StockPrix(service.stock.dossier).ecrire(prix.iloc[:-10])
+    service.interroger("/beta", {})
+    assert service.version != version
+    assert service.contexte.prix.index[-1] == prix.index[-11]
+
+@pytest.mark.parametrize("chemin, statut", [
+    ("/inconnue", 404),
+    ("/beta?tickers=INCONNU", 404),
+    ("/optimisation", 400),
+    ("/optimisation?tickers=T00000,T00001&poids_min=abc", 400),
+])
+def test_erreurs_get(url, chemin, statut):
+    code, contenu = _requete(url, chemin)
+    assert code == statut
+    assert "erreur" in contenu
+
+def test_erreurs_post(url):
+    assert _requete(url, "/inconnue", {})[0] == 404
+    assert _requete(url, "/prix", {"dates": ["2030-01-01"]})[0] == 400
+
+    requete = urllib.request.Request(url + "/prix", data=b"{pas du json")
+    with pytest.raises(urllib.error.HTTPError) as erreur:
+        urllib.request.urlopen(requete, timeout=30)
+    assert erreur.value.code == 400
+
+def test_question_calculee_sur_un_seul_instantane(service, prix, monkeypatch):
+    ticker = prix.columns[1]
+    statistiques_titres = ServiceAnalyse.statistiques_titres
+
+    def ajout_concurrent(self, etat, parametres):
+        # Un POST /prix arrive pendant le calcul et remplace le contexte du service
+        date = prix.index[-1] + pd.offsets.BDay(1)
+        self.ajouter_prix(pd.DataFrame({t: [float(prix[t].iloc[-1]) * 1.5] for t in prix.columns},
+                                       index=pd.DatetimeIndex([date], name="Date")))
+        return statistiques_titres(self, etat, parametres)
+
+    monkeypatch.setattr(ServiceAnalyse, "statistiques_titres", ajout_concurrent)
+    version = service.actualiser().version
+    avant = service.interroger("/statistiques", {"tickers": ticker})
+    assert service.version != version
+    monkeypatch.setattr(ServiceAnalyse, "statistiques_titres", statistiques_titres)
+
+    # La réponse calculée sur l'ancien contexte n'est pas servie pour la nouvelle version
+    apres = service.interroger("/statistiques", {"tickers": ticker})
+    assert apres[ticker]["Performance Totale"] != avant[ticker]["Performance Totale"]
+    assert apres[ticker]["Performance Totale"] == pytest.approx(avant[ticker]["Performance Totale"] * 1.5 + 0.5, abs=1e-3)
+
+def test_erreur_interne(service, url, monkeypatch):
+    def echec(self, etat, parametres):
+        raise RuntimeError("solveur indisponible")
+
+    monkeypatch.setattr(ServiceAnalyse, "optimisation", echec)
+    code, contenu = _requete(url, "/optimisation?tickers=T00001")
+    assert code == 500
+    assert "solveur indisponible" in contenu["erreur"]
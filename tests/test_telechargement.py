@@ -0,0 +1,141 @@
+# tests/test_telechargement.py
+"""
+Tests du téléchargement par lots : découpage des lots en échec, nouveaux essais,
+limitation de débit et fusion dans le stock.
+"""
+import time
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.donnees import generer_prix
+from benchmarks.source_factice import ServeurPrixFactice
+from traitement.stockage import StockPrix
+from traitement.telechargement import ErreurSource, LimiteurDebit, SourceHTTP, telecharger_par_lots
+
+OPTIONS = dict(delai_initial=0.001, delai_max=0.01)
+
+@pytest.fixture
+def prix():
+    return generer_prix(39, nb_annees=1, part_introductions=0, part_radiations=0, taux_trous=0)
+
+@pytest.fixture
+def bornes(prix):
+    return prix.index[0], prix.index[-1] + pd.Timedelta(days=1)
+
+class SourceMemoire:
+    """Source en mémoire qui échoue pour certains tickers, pour les premiers essais de chaque lot ou pour les gros lots"""
+
+    def __init__(self, prix, defaillants=(), echecs_par_lot=0, taille_max=None, reessayable=True):
+        self.prix = prix
+        self.defaillants = set(defaillants)
+        self.echecs_par_lot = echecs_par_lot
+        self.taille_max = taille_max
+        self.reessayable = reessayable
+        self.appels = []
+        self._essais = {}
+        self._verrou = threading.Lock()
+
+    def __call__(self, tickers, date_debut, date_fin):
+        with self._verrou:
+            self.appels.append((tuple(tickers), time.monotonic()))
+            essai = self._essais[tuple(tickers)] = self._essais.get(tuple(tickers), 0) + 1
+        if self.defaillants & set(tickers):
+            raise ErreurSource("symbole défaillant", reessayable=self.reessayable)
+        if essai <= self.echecs_par_lot or (self.taille_max and len(tickers) > self.taille_max):
+            raise ErreurSource("service indisponible")
+        return self.prix.loc[date_debut:date_fin, list(tickers)]
+
+def test_decoupage_isole_les_tickers_defaillants(prix, bornes):
+    defaillants = [prix.columns[5], prix.columns[30]]
+    source = SourceMemoire(prix, defaillants=defaillants, reessayable=False)
+    data, echecs = telecharger_par_lots(list(prix.columns), *bornes, source, taille_lot=16, nb_threads=2, **OPTIONS)
+
+    assert set(echecs) == set(defaillants)
+    assert list(data.columns) == [t for t in prix.columns if t not in defaillants]
+    pd.testing.assert_frame_equal(data, prix[data.columns], check_freq=False)
+    # Erreur non réessayable : un seul appel par lot, et chaque lot défaillant est coupé en deux jusqu'au ticker
+    assert len(source.appels) == len(set(t for t, _ in source.appels))
+    assert [t for t, _ in source.appels].count((defaillants[0],)) == 1
+
+def test_nouveaux_essais_avant_decoupage(prix, bornes):
+    source = SourceMemoire(prix, echecs_par_lot=2)
+    data, echecs = telecharger_par_lots(list(prix.columns), *bornes, source, taille_lot=10, nb_threads=2,
+                                        tentatives=3, **OPTIONS)
+    assert echecs == {}
+    assert data.shape == prix.shape
+    # Trois essais par lot, aucun découpage
+    assert len(source.appels) == 3 * 4
+    assert {len(t) for t, _ in source.appels} == {10}
+
+def test_essais_epuises_puis_decoupage(prix, bornes):
+    # La source refuse les requêtes de plus de deux tickers
+    source = SourceMemoire(prix, taille_max=2)
+    data, echecs = telecharger_par_lots(list(prix.columns[:8]), *bornes, source, taille_lot=8, nb_threads=1,
+                                        tentatives=2, **OPTIONS)
+    assert echecs == {}
+    assert data.shape[1] == 8
+    # Lot de 8 : deux échecs, puis ses moitiés (deux échecs chacune), puis les quarts réussissent au premier essai
+    assert len(source.appels) == 2 + 2 * 2 + 4
+    assert [len(t) for t, _ in source.appels[:2]] == [8, 8]
+    assert {len(t) for t, _ in source.appels} == {8, 4, 2}
+
+def test_delai_retry_after_respecte(prix, bornes):
+    class SourceLimitee(SourceMemoire):
+        def __call__(self, tickers, date_debut, date_fin):
+            with self._verrou:
+                self.appels.append((tuple(tickers), time.monotonic()))
+                premier = len(self.appels) == 1
+            if premier:
+                raise ErreurSource("trop de requêtes", attente=0.2)
+            return self.prix.loc[date_debut:date_fin, list(tickers)]
+
+    source = SourceLimitee(prix)
+    telecharger_par_lots(list(prix.columns[:4]), *bornes, source, taille_lot=4, nb_threads=1, **OPTIONS)
+    assert source.appels[1][1] - source.appels[0][1] >= 0.2
+
+def test_limiteur_debit():
+    limiteur = LimiteurDebit(20)
+    debut = time.monotonic()
+    for _ in range(11):
+        limiteur.acquerir()
+    assert time.monotonic() - debut >= 0.45
+
+def test_debit_borne_entre_threads(prix, bornes):
+    source = SourceMemoire(prix)
+    telecharger_par_lots(list(prix.columns), *bornes, source, taille_lot=4, nb_threads=4, debit=25, **OPTIONS)
+    instants = np.sort([t for _, t in source.appels])
+    assert len(instants) == 10
+    # Dix appels à 25 par seconde au plus, tous threads confondus
+    assert instants[-1] - instants[0] >= 9 / 25 * 0.9
+    assert np.diff(instants).min() >= 1 / 25 * 0.5
+
+def test_fusions_par_paquets(tmp_path, prix, bornes, monkeypatch):
+    fusions = []
+    fusionner = StockPrix.fusionner
+    monkeypatch.setattr(StockPrix, "fusionner", lambda stock, data: (fusions.append(data.shape[1]), fusionner(stock, data)))
+
+    data, _ = telecharger_par_lots(list(prix.columns), *bornes, SourceMemoire(prix), taille_lot=2, nb_threads=1,
+                                   dossier_stock=str(tmp_path), **OPTIONS)
+
+    # 20 lots, mais une fusion seulement quand les lots en attente doublent le stock : 2, 2, 4, 8, 16, 8
+    assert fusions == [2, 2, 4, 8, 16, 8]
+    stock = StockPrix(str(tmp_path)).charger()
+    pd.testing.assert_frame_equal(stock[prix.columns], prix, check_freq=False)
+
+def test_source_factice_http(tmp_path, prix, bornes):
+    defaillant = prix.columns[7]
+    with ServeurPrixFactice(prix, latence=0.0, latence_par_ticker=0.0, taux_erreurs=0.2,
+                            tickers_defaillants=[defaillant], graine=1) as serveur:
+        data, echecs = telecharger_par_lots(list(prix.columns), *bornes, SourceHTTP(serveur.url), taille_lot=8,
+                                            nb_threads=4, tentatives=6, dossier_stock=str(tmp_path), **OPTIONS)
+        compteurs = dict(serveur.compteurs)
+
+    assert list(echecs) == [defaillant]
+    assert data.shape[1] == prix.shape[1] - 1
+    np.testing.assert_allclose(data.to_numpy(), prix[data.columns].to_numpy())
+    assert compteurs["erreurs"] > 0
+    # Connexions persistantes : au plus une connexion par thread et par reconnexion après erreur
+    assert compteurs["connexions"] < compteurs["requetes"]
+    assert set(StockPrix(str(tmp_path)).tickers) == set(data.columns)
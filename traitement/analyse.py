@@ -1,26 +1,42 @@
 import pandas as pd
 import numpy as np
+from traitement.contexte import ContexteMarche
+from traitement.risque import calculer_metriques_risque
+from traitement.periodes import calculer_rendements_periodiques, rendements_relatifs
+from utils.instrumentation import instrumenter
 
+@instrumenter
 def calculer_statistiques(data):
     """
     Calcule les statistiques pour chaque titre et l'indice.
     
     Args:
-        data (pandas.DataFrame): DataFrame des prix ajustés nettoyés
+        data (pandas.DataFrame ou ContexteMarche): Prix ajustés nettoyés ou contexte de marché partagé
     
     Returns:
         dict: Dictionnaire contenant tous les DataFrames des statistiques calculées
     """
     print("Calcul des statistiques...")
     
-    # Calcul des rendements quotidiens
-    returns = data.pct_change().dropna()
+    contexte = ContexteMarche.depuis(data)
+    data = contexte.prix
+    indice = contexte.indice
     
-    # Nombre d'années dans la période
-    nb_years = (data.index[-1] - data.index[0]).days / 365.25
+    # Rendements quotidiens (calculés une seule fois par le contexte)
+    returns = contexte.rendements
     
-    # Performance totale sur toute la période
-    perf_totale = (data.iloc[-1] / data.iloc[0]) - 1
+    # Fenêtre de cotation de chaque titre (premier et dernier prix connus)
+    validite = contexte.validite_prix
+    premieres = np.maximum(validite.premieres, 0)
+    dernieres = np.maximum(validite.dernieres, 0)
+    
+    # Nombre d'années dans la période de cotation de chaque titre
+    nb_years = pd.Series((data.index[dernieres] - data.index[premieres]).days / 365.25, index=data.columns)
+    
+    # Performance totale sur toute la période de cotation
+    valeurs = data.to_numpy()
+    colonnes = np.arange(data.shape[1])
+    perf_totale = pd.Series(valeurs[dernieres, colonnes] / valeurs[premieres, colonnes] - 1, index=data.columns)
     
     # Performance annualisée sur toute la période
     perf_annualisee = (1 + perf_totale) ** (1 / nb_years) - 1
@@ -31,28 +47,28 @@ def calculer_statistiques(data):
     # Ratio de Sharpe (en supposant un taux sans risque de 0) sur toute la période
     sharpe_ratio = perf_annualisee / vol_annualisee
     
-    # Vérifier si l'indice '^STOXX50E' est dans les colonnes
-    if "^STOXX50E" in perf_totale.index:
+    # Vérifier si l'indice est dans les colonnes
+    if indice in perf_totale.index:
         # Performance relative par rapport à l'indice sur toute la période
-        perf_relative = perf_totale - perf_totale["^STOXX50E"]
+        perf_relative = perf_totale - perf_totale[indice]
         
         # Performance annualisée relative par rapport à l'indice
-        perf_annualisee_relative = perf_annualisee - perf_annualisee["^STOXX50E"]
+        perf_annualisee_relative = perf_annualisee - perf_annualisee[indice]
     else:
-        print("L'indice '^STOXX50E' n'est pas dans les données")
+        print(f"L'indice '{indice}' n'est pas dans les données")
         perf_relative = None
         perf_annualisee_relative = None
     
-    # Performances annuelles
-    annual_returns = returns.resample('Y').apply(lambda x: (1 + x).prod() - 1)
-    annual_returns.index = annual_returns.index.year  # Convertir les dates en années
+    # Performances mensuelles, trimestrielles et annuelles (sommes de log-rendements en une passe)
+    perf_periodes = calculer_rendements_periodiques(returns)
+    annual_returns = perf_periodes["annuelle"]
     
-    # Performances annuelles relatives par rapport à l'indice
-    if "^STOXX50E" in annual_returns.columns:
-        annual_returns_relative = annual_returns.subtract(annual_returns["^STOXX50E"], axis=0)
+    # Performances par période relatives à l'indice
+    if indice in annual_returns.columns:
+        perf_relatives = {frequence: rendements_relatifs(perf, indice) for frequence, perf in perf_periodes.items()}
     else:
-        print("L'indice '^STOXX50E' n'est pas dans les rendements annuels")
-        annual_returns_relative = None
+        print(f"L'indice '{indice}' n'est pas dans les rendements annuels")
+        perf_relatives = dict.fromkeys(perf_periodes)
     
     # Résumé des statistiques globales
     stats_globales = pd.DataFrame({
@@ -64,6 +80,9 @@ def calculer_statistiques(data):
         "Performance Annualisée Relative": perf_annualisee_relative
     })
     
+    # Drawdowns, VaR/CVaR, Sortino et Calmar de tous les titres en une passe vectorisée
+    stats_globales = stats_globales.join(calculer_metriques_risque(returns, perf_annualisee=perf_annualisee))
+    
     # Arrondir pour une meilleure lisibilité
     stats_globales = stats_globales.round(4)
     
@@ -72,8 +91,12 @@ def calculer_statistiques(data):
         "prix": data,
         "rendements": returns,
         "stats_globales": stats_globales,
+        "perf_mensuelle": perf_periodes["mensuelle"],
+        "perf_mensuelle_relative": perf_relatives["mensuelle"],
+        "perf_trimestrielle": perf_periodes["trimestrielle"],
+        "perf_trimestrielle_relative": perf_relatives["trimestrielle"],
         "perf_annuelle": annual_returns,
-        "perf_annuelle_relative": annual_returns_relative
+        "perf_annuelle_relative": perf_relatives["annuelle"]
     }
     
     print("Calcul des statistiques terminé")
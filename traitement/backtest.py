@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from traitement.contexte import ContexteMarche
+from traitement.covariance import estimer_covariance
+from traitement.optimisation import optimiser_portefeuille, selectionner_meilleurs_titres
+from utils.instrumentation import instrumenter
+
+# Fréquences de rebalancement acceptées (alias pandas de fin de période)
+FREQUENCES = {"mensuel": "ME", "trimestriel": "QE"}
+
+# Prix partagés par les processus de travail, transmis une seule fois à leur démarrage
+_PRIX = None
+
+def _initialiser_prix(prix):
+    global _PRIX
+    _PRIX = prix
+
+def _statistiques_fenetre(prix_fenetre):
+    """Ratio de Sharpe de chaque titre sur la fenêtre, avec les définitions de calculer_statistiques"""
+    returns = prix_fenetre.pct_change(fill_method=None)
+    nb_years = (prix_fenetre.index[-1] - prix_fenetre.index[0]).days / 365.25
+    perf_totale = (prix_fenetre.iloc[-1] / prix_fenetre.iloc[0]) - 1
+    perf_annualisee = (1 + perf_totale) ** (1 / nb_years) - 1
+    vol_annualisee = returns.std() * np.sqrt(252)
+    return {"stats_globales": pd.DataFrame({"Sharpe Ratio": perf_annualisee / vol_annualisee})}
+
+def _rebalancer(debut, fin, n, poids_min, contrainte, methode_covariance):
+    """
+    Sélection et optimisation sur la fenêtre [debut, fin] uniquement (aucune donnée postérieure).
+
+    Returns:
+        pandas.Series: Poids du portefeuille, indexés par titre
+    """
+    prix_fenetre = _PRIX.loc[debut:fin]
+    titres = selectionner_meilleurs_titres(_statistiques_fenetre(prix_fenetre), n=n)
+    rendements = prix_fenetre[titres].pct_change(fill_method=None).dropna()
+
+    poids = optimiser_portefeuille(rendements.mean(), estimer_covariance(rendements, methode=methode_covariance),
+                                   poids_min=poids_min, contrainte=contrainte)
+    if poids is None:
+        poids = np.full(len(titres), 1 / len(titres))
+    return pd.Series(poids, index=titres)
+
+@instrumenter
+def executer_backtest(data, frequence="mensuel", fenetre=252, n=10, poids_min=0.01, contrainte=True,
+                      methode_covariance="echantillon", nb_processus=1):
+    """
+    Backtest glissant (walk-forward) de la stratégie Sharpe + optimisation du portefeuille.
+
+    À chaque date de rebalancement, les titres sont sélectionnés et optimisés sur
+    les `fenetre` dernières séances seulement ; les poids obtenus sont appliqués à
+    partir de la séance suivante jusqu'au rebalancement suivant, en laissant les
+    poids dériver avec les prix. Les rendements hors échantillon de toutes les
+    périodes sont ensuite calculés en une seule passe vectorisée. Les
+    rebalancements étant indépendants, ils peuvent être répartis sur plusieurs
+    processus.
+
+    Args:
+        data (pandas.DataFrame ou ContexteMarche): Prix ajustés nettoyés ou contexte de marché partagé
+        frequence (str): "mensuel" ou "trimestriel"
+        fenetre (int): Nombre de séances de l'historique utilisé à chaque rebalancement
+        n (int): Nombre de titres retenus selon le ratio de Sharpe
+        poids_min (float): Poids minimum par actif si contrainte=True
+        contrainte (bool): Applique le poids minimum lors de l'optimisation
+        methode_covariance (str): Estimateur de covariance (voir estimer_covariance)
+        nb_processus (int): Nombre de processus pour les rebalancements
+
+    Returns:
+        dict: "rendements" et "prix" (portefeuille et indice), "poids" (par date de rebalancement), "stats"
+    """
+    print("Backtest walk-forward...")
+
+    contexte = ContexteMarche.depuis(data)
+    prix = contexte.prix
+    univers = prix.drop(columns=contexte.indice) if contexte.a_indice else prix
+    dates = prix.index
+
+    # Dernière séance de chaque période, dès que l'historique couvre une fenêtre complète
+    fins_periode = pd.Series(dates, index=dates).resample(FREQUENCES[frequence]).last().dropna()
+    positions = dates.get_indexer(pd.DatetimeIndex(fins_periode.values))
+    positions = positions[positions >= fenetre]
+    if len(positions) == 0:
+        raise ValueError("Historique trop court pour la fenêtre demandée.")
+    rebalancements = dates[positions]
+    taches = [(dates[p - fenetre], dates[p], n, poids_min, contrainte, methode_covariance) for p in positions]
+
+    if nb_processus > 1:
+        with ProcessPoolExecutor(max_workers=nb_processus, initializer=_initialiser_prix, initargs=(univers,)) as pool:
+            poids = list(pool.map(_rebalancer, *zip(*taches)))
+    else:
+        _initialiser_prix(univers)
+        try:
+            poids = [_rebalancer(*tache) for tache in taches]
+        finally:
+            _initialiser_prix(None)
+
+    table_poids = pd.DataFrame(poids, index=rebalancements).fillna(0.0)
+    table_poids.index.name = "Date"
+
+    # Rendements hors échantillon : chaque séance utilise les poids du dernier rebalancement strictement antérieur
+    returns = univers.pct_change(fill_method=None).loc[rebalancements[0]:].iloc[1:]
+    returns = returns[table_poids.columns].fillna(0.0)
+    periode = np.searchsorted(rebalancements.values, returns.index.values, side="left") - 1
+
+    # Dérive des poids : valeur de chaque ligne = poids initial × croissance cumulée depuis le rebalancement
+    croissance = (1 + returns).groupby(periode).cumprod()
+    poids_initiaux = table_poids.to_numpy()[periode]
+    valeur = (poids_initiaux * croissance.to_numpy()).sum(axis=1)
+    valeur_precedente = pd.Series(valeur).groupby(periode).shift(1).fillna(1.0).to_numpy()
+
+    rendements = pd.DataFrame({"Portefeuille": valeur / valeur_precedente - 1}, index=returns.index)
+    if contexte.a_indice:
+        rendements[contexte.indice] = contexte.prix_indice.pct_change(fill_method=None).reindex(returns.index)
+    prix_backtest = (1 + rendements.fillna(0.0)).cumprod()
+
+    nb_years = (rendements.index[-1] - rebalancements[0]).days / 365.25
+    perf_totale = prix_backtest.iloc[-1] - 1
+    perf_annualisee = (1 + perf_totale) ** (1 / nb_years) - 1
+    vol_annualisee = rendements.std() * np.sqrt(252)
+    stats = pd.DataFrame({
+        "Performance Totale": perf_totale,
+        "Performance Annualisée": perf_annualisee,
+        "Volatilité Annualisée": vol_annualisee,
+        "Sharpe Ratio": perf_annualisee / vol_annualisee,
+    }).round(4)
+
+    print(f"Backtest terminé : {len(rebalancements)} rebalancements")
+    return {
+        "rendements": rendements,
+        "prix": prix_backtest,
+        "poids": table_poids,
+        "stats": stats,
+    }
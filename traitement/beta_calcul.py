@@ -1,40 +1,117 @@
-import os
 import pandas as pd
 import numpy as np
+from traitement.contexte import ContexteMarche
+from utils.export import exporter_tableau_excel
+from utils.instrumentation import instrumenter
 
-def calculer_beta(data, save_path):
+def calculer_regressions(returns, index_returns, periodes_par_an=252, taille_bloc=256, validite=None):
+    """
+    Régresse les rendements de tous les titres sur ceux de l'indice en une seule passe.
+    
+    Les sommes nécessaires (effectifs, sommes, carrés et produits croisés) sont
+    obtenues par un produit matriciel par bloc de colonnes, sur la fenêtre
+    commune à chaque titre et à l'indice : les valeurs manquantes sont ignorées
+    paire par paire, ce qui permet de traiter des titres aux historiques
+    différents. Chaque bloc est converti en float64 au moment du calcul, si bien
+    que les sommes sont accumulées en float64 même pour des rendements stockés
+    en float32, sans copie complète du panel.
+    
+    Args:
+        returns (pandas.DataFrame): Rendements des titres (dates × tickers)
+        index_returns (pandas.Series): Rendements de l'indice sur les mêmes dates
+        periodes_par_an (int): Nombre de périodes par an pour l'annualisation
+        taille_bloc (int): Nombre de colonnes converties à la fois
+        validite (MasqueValidite, optional): Bitmap des rendements présents (recalculé depuis les NaN sinon)
+    
+    Returns:
+        pandas.DataFrame: Beta, alpha annualisé, R², volatilité résiduelle annualisée,
+        t-stats du beta et de l'alpha et nombre d'observations pour chaque titre
+    """
+    x = index_returns.reindex(returns.index).to_numpy(dtype=np.float64)
+    masque_x = ~np.isnan(x)
+    x0 = np.where(masque_x, x, 0.0)
+    
+    # [1, x, x²] (limités aux dates où l'indice est connu) contre [masque, y, y²] :
+    # quelques produits matriciels par bloc fournissent toutes les sommes paire par paire
+    gauche = np.column_stack([masque_x.astype(np.float64), x0, x0 * x0])
+    
+    nb = returns.shape[1]
+    n, somme_x, somme_xx, somme_y, somme_xy, somme_yy = np.empty((6, nb))
+    for debut in range(0, nb, taille_bloc):
+        fin = min(debut + taille_bloc, nb)
+        y = returns.iloc[:, debut:fin].to_numpy(dtype=np.float64, copy=True)
+        masque_y = validite.bloc(debut, fin) if validite is not None else ~np.isnan(y)
+        y[~masque_y] = 0.0
+        
+        sommes_masque = gauche.T @ masque_y.astype(np.float64)
+        sommes_y = gauche[:, :2].T @ y
+        n[debut:fin], somme_x[debut:fin], somme_xx[debut:fin] = sommes_masque
+        somme_y[debut:fin], somme_xy[debut:fin] = sommes_y
+        np.square(y, out=y)
+        somme_yy[debut:fin] = gauche[:, 0] @ y
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        moyenne_x = somme_x / n
+        moyenne_y = somme_y / n
+        variance_x = somme_xx / n - moyenne_x ** 2
+        variance_y = somme_yy / n - moyenne_y ** 2
+        covariance = somme_xy / n - moyenne_x * moyenne_y
+        
+        variance_x = np.where(variance_x > 0, variance_x, np.nan)
+        beta = covariance / variance_x
+        alpha = moyenne_y - beta * moyenne_x
+        r2 = covariance ** 2 / (variance_x * variance_y)
+        
+        # Variance résiduelle non biaisée (2 paramètres estimés)
+        somme_carres_residus = np.maximum(n * (variance_y - beta * covariance), 0.0)
+        variance_residuelle = somme_carres_residus / (n - 2)
+        erreur_beta = np.sqrt(variance_residuelle / (n * variance_x))
+        erreur_alpha = np.sqrt(variance_residuelle * (1 / n + moyenne_x ** 2 / (n * variance_x)))
+        
+        resultats = pd.DataFrame({
+            "Beta": beta,
+            "Alpha Annualisé": alpha * periodes_par_an,
+            "R²": r2,
+            "Volatilité Résiduelle": np.sqrt(variance_residuelle * periodes_par_an),
+            "t-stat Beta": beta / erreur_beta,
+            "t-stat Alpha": alpha / erreur_alpha,
+            "Observations": n.astype(int),
+        }, index=returns.columns)
+    
+    return resultats
+
+@instrumenter
+def calculer_beta(data, save_path, journal=None):
     """
     Calcule le beta de chaque titre par rapport à l'indice et exporte les résultats en Excel.
     
     Args:
-        data (pandas.DataFrame): DataFrame des prix ajustés nettoyés.
+        data (pandas.DataFrame ou ContexteMarche): Prix ajustés nettoyés ou contexte de marché partagé.
         save_path (str): Chemin où enregistrer le fichier Excel.
+        journal (JournalExport, optional): Journal où enregistrer la durée d'écriture.
     
     Returns:
         pandas.DataFrame: Tableau des bêtas calculés.
     """
     print("Calcul des bêtas...")
     
-    # Calcul des rendements quotidiens
-    returns = data.pct_change().dropna()
+    contexte = ContexteMarche.depuis(data)
+    indice = contexte.indice
+    
+    # Rendements quotidiens (calculés une seule fois par le contexte)
+    returns = contexte.rendements
     
     # Vérifier si l'indice est présent
-    if "^STOXX50E" not in returns.columns:
-        raise ValueError("L'indice '^STOXX50E' n'est pas dans les données.")
+    if not contexte.a_indice:
+        raise ValueError(f"L'indice '{indice}' n'est pas dans les données.")
     
     # Rendements de l'indice
-    index_returns = returns["^STOXX50E"]
-    
-    betas = {}
-    for ticker in returns.columns:
-        if ticker != "^STOXX50E":
-            covariance = np.cov(returns[ticker], index_returns)[0, 1]
-            variance_index = np.var(index_returns)
-            betas[ticker] = covariance / variance_index if variance_index != 0 else np.nan
+    index_returns = contexte.rendements_indice
     
-    # Convertir en DataFrame
-    beta_df = pd.DataFrame(list(betas.items()), columns=["Titre", "Beta"])
-    beta_df.set_index("Titre", inplace=True)
+    # Régression de tous les titres sur l'indice en un seul calcul matriciel
+    # (l'indice est retiré du résultat plutôt que du panel, ce qui évite d'en copier toutes les colonnes)
+    beta_df = calculer_regressions(returns, index_returns, validite=contexte.validite).drop(index=indice)
+    beta_df.index.name = "Titre"
     
     # Trouver le titre avec le plus gros et le plus faible beta
     max_beta_ticker = beta_df["Beta"].idxmax()
@@ -44,8 +121,7 @@ def calculer_beta(data, save_path):
     print(f"Titre avec le plus petit beta : {min_beta_ticker} ({beta_df.loc[min_beta_ticker, 'Beta']:.2f})")
     
     # Sauvegarde en Excel
-    os.makedirs(os.path.dirname(save_path), exist_ok=True)
-    beta_df.to_excel(save_path)
+    exporter_tableau_excel(beta_df, save_path, journal=journal)
     print(f"Résultats enregistrés dans {save_path}")
     
     return beta_df
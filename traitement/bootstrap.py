@@ -0,0 +1,161 @@
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from traitement.analyse import calculer_statistiques
+from traitement.contexte import ContexteMarche
+from traitement.optimisation import optimiser_portefeuille, selectionner_meilleurs_titres
+from utils.instrumentation import instrumenter
+
+# Matrice des rendements partagée, attachée une fois par processus de travail
+_RENDEMENTS = None
+_MEMOIRE = None
+
+def _attacher_rendements(nom, forme):
+    """Initialiseur des processus : vue NumPy sur la mémoire partagée, sans copie ni pickle du DataFrame"""
+    global _RENDEMENTS, _MEMOIRE
+    _MEMOIRE = shared_memory.SharedMemory(name=nom)
+    _RENDEMENTS = np.ndarray(forme, dtype=np.float64, buffer=_MEMOIRE.buf)
+
+def _indices_blocs(rng, nb_dates, taille_bloc):
+    """Indices d'un tirage par blocs circulaires : des blocs consécutifs de taille fixe, à départs aléatoires"""
+    nb_blocs = -(-nb_dates // taille_bloc)
+    departs = rng.integers(0, nb_dates, size=nb_blocs)
+    indices = (departs[:, None] + np.arange(taille_bloc)) % nb_dates
+    return indices.ravel()[:nb_dates]
+
+def _executer_tirages(graines, taille_bloc, nb_years, colonnes_optimisation, poids_min, contrainte):
+    """
+    Exécute une série de tirages, chacun avec son propre générateur dérivé de sa graine.
+
+    Returns:
+        tuple: (ratios de Sharpe : tirages × titres, poids optimaux : tirages × titres optimisés)
+    """
+    rendements = _RENDEMENTS
+    nb_dates = rendements.shape[0]
+    sharpes = np.empty((len(graines), rendements.shape[1]))
+    poids = np.full((len(graines), len(colonnes_optimisation)), np.nan)
+
+    for i, graine in enumerate(graines):
+        rng = np.random.default_rng(graine)
+        echantillon = rendements[_indices_blocs(rng, nb_dates, taille_bloc)]
+
+        # Mêmes définitions que calculer_statistiques (rendements manquants hors fenêtre de cotation ignorés)
+        perf_totale = np.nanprod(1 + echantillon, axis=0) - 1
+        perf_annualisee = (1 + perf_totale) ** (1 / nb_years) - 1
+        vol_annualisee = np.nanstd(echantillon, axis=0, ddof=1) * np.sqrt(252)
+        sharpes[i] = perf_annualisee / vol_annualisee
+
+        selection = _dates_completes(echantillon[:, colonnes_optimisation])
+        resultat = optimiser_portefeuille(selection.mean(axis=0), np.cov(selection, rowvar=False),
+                                          poids_min=poids_min, contrainte=contrainte)
+        if resultat is not None:
+            poids[i] = resultat
+
+    return sharpes, poids
+
+def _dates_completes(selection):
+    """Lignes où tous les titres du portefeuille ont un rendement"""
+    return selection[~np.isnan(selection).any(axis=1)]
+
+def _intervalles(tirages, estimation, index, niveau):
+    """Tableau des intervalles de confiance par percentiles"""
+    alpha = (1 - niveau) / 2
+    return pd.DataFrame({
+        "Estimation": estimation,
+        "Médiane": np.nanmedian(tirages, axis=0),
+        f"IC Bas {niveau:.0%}": np.nanquantile(tirages, alpha, axis=0),
+        f"IC Haut {niveau:.0%}": np.nanquantile(tirages, 1 - alpha, axis=0),
+        "Écart-type": np.nanstd(tirages, axis=0, ddof=1),
+    }, index=index)
+
+@instrumenter
+def bootstrap_statistiques(data, stats=None, titres_optimisation=None, nb_tirages=1000, taille_bloc=20,
+                           niveau=0.95, poids_min=0.01, contrainte=True, nb_processus=None, graine=0):
+    """
+    Estime par bootstrap par blocs la stabilité des ratios de Sharpe et des poids optimaux.
+
+    Chaque tirage rééchantillonne des blocs de dates consécutives (ce qui conserve
+    l'autocorrélation de court terme), recalcule le ratio de Sharpe de chaque titre
+    puis réoptimise le portefeuille des titres sélectionnés. Les tirages sont
+    répartis sur un pool de processus qui lisent la matrice des rendements en
+    mémoire partagée. Chaque tirage reçoit sa propre graine dérivée de `graine`,
+    si bien que les résultats ne dépendent pas du nombre de processus.
+
+    Args:
+        data (pandas.DataFrame ou ContexteMarche): Prix ajustés nettoyés ou contexte de marché partagé
+        stats (dict, optional): Statistiques déjà calculées, utilisées pour les estimations ponctuelles
+        titres_optimisation (list, optional): Titres du portefeuille (par défaut les 10 meilleurs Sharpe)
+        nb_tirages (int): Nombre de tirages bootstrap
+        taille_bloc (int): Taille des blocs de dates consécutives
+        niveau (float): Niveau de confiance des intervalles
+        poids_min (float): Poids minimum par actif si contrainte=True
+        contrainte (bool): Applique le poids minimum lors de l'optimisation
+        nb_processus (int, optional): Nombre de processus (tous les cœurs par défaut, 1 pour tout exécuter sur place)
+        graine (int): Graine maîtresse pour la reproductibilité
+
+    Returns:
+        dict: "sharpe" et "poids" (intervalles de confiance), "tirages_sharpe" et "tirages_poids" (tirages bruts)
+    """
+    global _RENDEMENTS
+    print(f"Bootstrap de {nb_tirages} tirages...")
+
+    contexte = ContexteMarche.depuis(data)
+    if stats is None:
+        stats = calculer_statistiques(contexte)
+    if titres_optimisation is None:
+        titres_optimisation = list(selectionner_meilleurs_titres(stats, n=10))
+
+    rendements = contexte.rendements
+    colonnes = list(rendements.columns)
+    colonnes_optimisation = [colonnes.index(t) for t in titres_optimisation]
+    # Durée de la fenêtre de cotation de chaque titre, comme dans calculer_statistiques
+    fenetres = contexte.validite_prix.fenetres().reindex(colonnes)
+    nb_years = ((fenetres["Dernière Date"] - fenetres["Première Date"]).dt.days / 365.25).to_numpy()
+    nb_processus = nb_processus or os.cpu_count() or 1
+
+    # Une graine indépendante par tirage, regroupées en lots pour limiter les échanges entre processus
+    graines = np.random.SeedSequence(graine).spawn(nb_tirages)
+    taille_lot = max(1, -(-nb_tirages // (nb_processus * 4)))
+    lots = [graines[i:i + taille_lot] for i in range(0, nb_tirages, taille_lot)]
+    parametres = (taille_bloc, nb_years, colonnes_optimisation, poids_min, contrainte)
+
+    valeurs = np.ascontiguousarray(rendements.to_numpy(dtype=np.float64))
+    if nb_processus == 1:
+        _RENDEMENTS = valeurs
+        try:
+            resultats = [_executer_tirages(lot, *parametres) for lot in lots]
+        finally:
+            _RENDEMENTS = None
+    else:
+        memoire = shared_memory.SharedMemory(create=True, size=max(valeurs.nbytes, 1))
+        try:
+            np.ndarray(valeurs.shape, dtype=np.float64, buffer=memoire.buf)[:] = valeurs
+            with ProcessPoolExecutor(max_workers=nb_processus, initializer=_attacher_rendements,
+                                     initargs=(memoire.name, valeurs.shape)) as pool:
+                futures = [pool.submit(_executer_tirages, lot, *parametres) for lot in lots]
+                resultats = [future.result() for future in futures]
+        finally:
+            memoire.close()
+            memoire.unlink()
+
+    tirages_sharpe = np.vstack([r[0] for r in resultats])
+    tirages_poids = np.vstack([r[1] for r in resultats])
+
+    # Estimations ponctuelles : Sharpe du calcul complet, poids optimisés sur l'historique complet
+    selection = _dates_completes(valeurs[:, colonnes_optimisation])
+    poids_point = optimiser_portefeuille(selection.mean(axis=0), np.cov(selection, rowvar=False),
+                                         poids_min=poids_min, contrainte=contrainte)
+    if poids_point is None:
+        poids_point = np.full(len(colonnes_optimisation), np.nan)
+
+    resultat = {
+        "sharpe": _intervalles(tirages_sharpe, stats["stats_globales"]["Sharpe Ratio"].reindex(colonnes).to_numpy(), colonnes, niveau),
+        "poids": _intervalles(tirages_poids, poids_point, titres_optimisation, niveau),
+        "tirages_sharpe": pd.DataFrame(tirages_sharpe, columns=colonnes),
+        "tirages_poids": pd.DataFrame(tirages_poids, columns=titres_optimisation),
+    }
+
+    print("Bootstrap terminé")
+    return resultat
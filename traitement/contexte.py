@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+from functools import cached_property
+from traitement.validite import MasqueValidite
+
+# Indice de référence utilisé par défaut dans tout le projet
+INDICE_DEFAUT = "^STOXX50E"
+
+# Précisions de stockage des panels de prix et de rendements. En float32, les
+# sommes, moyennes et covariances restent accumulées en float64 (par blocs de
+# colonnes) par les fonctions de calcul ; seul le stockage est réduit de moitié.
+PRECISIONS = {"float64": np.float64, "float32": np.float32}
+
+def convertir_precision(df, precision=None):
+    """
+    Convertit un panel numérique dans la précision de stockage demandée.
+
+    Args:
+        df (pandas.DataFrame): Panel de prix ou de rendements
+        precision (str, optional): "float64" ou "float32" (None conserve le type actuel)
+
+    Returns:
+        pandas.DataFrame: Le panel lui-même s'il est déjà dans cette précision, sinon une copie convertie
+    """
+    if precision is None:
+        return df
+    if precision not in PRECISIONS:
+        raise ValueError(f"Précision inconnue : {precision} (choix : {', '.join(PRECISIONS)})")
+    return df.astype(PRECISIONS[precision], copy=False)
+
+class ContexteMarche:
+    """
+    Contexte de données de marché partagé entre les étapes du traitement.
+
+    Les prix sont fournis à la construction ; les rendements, les rendements
+    logarithmiques et les séries de l'indice sont dérivés à la première demande
+    puis conservés, de sorte que chaque série n'est calculée qu'une seule fois
+    par exécution, quel que soit le nombre de fonctions qui l'utilisent.
+
+    Args:
+        prix (pandas.DataFrame): DataFrame des prix ajustés nettoyés
+        indice (str): Ticker de l'indice de référence
+        precision (str, optional): Précision de stockage des prix et rendements
+            ("float64" ou "float32", None conserve celle des prix fournis)
+    """
+
+    def __init__(self, prix, indice=INDICE_DEFAUT, precision=None):
+        self.prix = convertir_precision(prix, precision)
+        self.indice = indice
+
+    @classmethod
+    def depuis(cls, data, indice=INDICE_DEFAUT):
+        """
+        Retourne un contexte à partir d'un DataFrame de prix ou d'un contexte existant.
+
+        Args:
+            data (pandas.DataFrame ou ContexteMarche): Prix ajustés ou contexte déjà construit
+            indice (str): Ticker de l'indice, utilisé seulement si data est un DataFrame
+
+        Returns:
+            ContexteMarche: Le contexte lui-même s'il est fourni, sinon un nouveau contexte
+        """
+        if isinstance(data, cls):
+            return data
+        return cls(data, indice=indice)
+
+    @cached_property
+    def rendements(self):
+        """
+        Rendements quotidiens simples, dans la précision de stockage des prix.
+
+        Un rendement est manquant dès que l'un des deux prix l'est : aucun prix
+        n'est comblé ici (les trous courts l'ont été par nettoyer_donnees), si
+        bien qu'un titre n'a de rendements que sur sa fenêtre de cotation.
+        """
+        valeurs = self.prix.to_numpy()
+        # Une seule allocation : division puis soustraction sur place
+        rendements = np.divide(valeurs[1:], valeurs[:-1])
+        rendements -= 1
+        return pd.DataFrame(rendements, index=self.prix.index[1:], columns=self.prix.columns, copy=False)
+
+    @cached_property
+    def validite_prix(self):
+        """Bitmap des prix présents et fenêtre de cotation de chaque titre"""
+        return MasqueValidite.depuis(self.prix)
+
+    @cached_property
+    def validite(self):
+        """Bitmap des rendements présents, utilisé pour les calculs paire par paire"""
+        return MasqueValidite.depuis(self.rendements)
+
+    @cached_property
+    def rendements_log(self):
+        """Rendements quotidiens logarithmiques"""
+        return np.log1p(self.rendements)
+
+    @property
+    def a_indice(self):
+        """Indique si l'indice de référence fait partie des données"""
+        return self.indice in self.prix.columns
+
+    @cached_property
+    def prix_indice(self):
+        """Prix de l'indice de référence (None s'il est absent)"""
+        return self.prix[self.indice] if self.a_indice else None
+
+    @cached_property
+    def rendements_indice(self):
+        """Rendements quotidiens de l'indice de référence (None s'il est absent)"""
+        return self.rendements[self.indice] if self.a_indice else None
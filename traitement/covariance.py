@@ -0,0 +1,261 @@
+import numpy as np
+import pandas as pd
+
+class CovarianceFactorielle:
+    """
+    Matrice de covariance sous forme factorielle : Σ = B F B' + diag(D).
+
+    Seuls les facteurs sont conservés (B : actifs × k, F : k × k, D : actifs),
+    soit O(actifs × k) en mémoire au lieu de O(actifs²). Les produits Σw et les
+    résolutions Σx = b se font sans jamais construire la matrice complète, ce
+    qui permet de passer l'objet directement à optimiser_portefeuille.
+
+    Args:
+        expositions (numpy.ndarray): Expositions des actifs aux facteurs (actifs × k)
+        cov_facteurs (numpy.ndarray): Covariance des facteurs (k × k)
+        variances_specifiques (numpy.ndarray): Variances résiduelles propres à chaque actif
+        actifs (list, optional): Noms des actifs
+    """
+
+    def __init__(self, expositions, cov_facteurs, variances_specifiques, actifs=None):
+        self.expositions = np.asarray(expositions, dtype=np.float64)
+        self.cov_facteurs = np.asarray(cov_facteurs, dtype=np.float64)
+        self.variances_specifiques = np.asarray(variances_specifiques, dtype=np.float64)
+        self.actifs = list(actifs) if actifs is not None else list(range(len(self.variances_specifiques)))
+
+    @property
+    def shape(self):
+        n = len(self.variances_specifiques)
+        return (n, n)
+
+    def __matmul__(self, poids):
+        """Produit Σw en O(actifs × k)"""
+        return self.expositions @ (self.cov_facteurs @ (self.expositions.T @ poids)) + self.variances_specifiques * poids
+
+    def diagonale(self):
+        """Variances totales des actifs"""
+        return np.einsum("ij,jk,ik->i", self.expositions, self.cov_facteurs, self.expositions) + self.variances_specifiques
+
+    def resoudre(self, b):
+        """
+        Résout Σx = b par la formule de Woodbury, en ne factorisant qu'une matrice k × k.
+        """
+        inv_d = 1.0 / self.variances_specifiques
+        b_sur_d = inv_d * b
+        noyau = np.linalg.inv(self.cov_facteurs) + self.expositions.T @ (inv_d[:, None] * self.expositions)
+        correction = np.linalg.solve(noyau, self.expositions.T @ b_sur_d)
+        return b_sur_d - inv_d * (self.expositions @ correction)
+
+    def dense(self):
+        """Matrice de covariance complète (à réserver aux petits univers)"""
+        valeurs = self.expositions @ self.cov_facteurs @ self.expositions.T + np.diag(self.variances_specifiques)
+        return pd.DataFrame(valeurs, index=self.actifs, columns=self.actifs)
+
+def covariance_echantillon(rendements):
+    """
+    Covariance empirique des rendements.
+
+    Args:
+        rendements (pandas.DataFrame): Rendements quotidiens (dates × actifs)
+
+    Returns:
+        pandas.DataFrame: Matrice de covariance
+    """
+    return rendements.cov()
+
+def _rendements_masques(rendements, validite=None, poids=None):
+    """
+    Rendements en float64 centrés sur la moyenne (éventuellement pondérée) de
+    chaque actif sur sa fenêtre de cotation, valeurs manquantes mises à zéro.
+
+    Returns:
+        tuple: (valeurs centrées, masque des valeurs présentes en float64, ou None si le panel est complet)
+    """
+    x = rendements.to_numpy(dtype=np.float64, copy=True)
+    masque = validite.extraire(slice(None)) if validite is not None else ~np.isnan(x)
+    poids = np.ones(len(x)) if poids is None else poids
+    if masque.all():
+        x -= (poids / poids.sum()) @ x
+        return x, None
+    x[~masque] = 0.0
+    m = masque.astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x -= np.where(masque, (poids @ x) / (poids @ m), 0.0)
+    return x, m
+
+def _covariance_par_paires(x, m, poids=None):
+    """
+    Covariance de chaque paire d'actifs sur leurs dates communes (division par
+    la somme des poids de ces dates), à partir de _rendements_masques.
+
+    Returns:
+        tuple: (matrice de covariance, somme des poids des dates communes de chaque paire)
+    """
+    poids = np.ones(len(x)) if poids is None else poids
+    xp = x * poids[:, None]
+    if m is None:
+        n = np.full((x.shape[1], x.shape[1]), poids.sum())
+        return xp.T @ x / n, n
+
+    n = (m * poids[:, None]).T @ m
+    somme = xp.T @ m
+    with np.errstate(divide="ignore", invalid="ignore"):
+        covariance = (xp.T @ x - somme * somme.T / n) / n
+    # Paires sans date commune : aucune information, covariance nulle
+    covariance[n == 0] = 0.0
+    return covariance, n
+
+def _semi_definie_positive(valeurs):
+    """
+    Projette une covariance estimée paire par paire sur les matrices semi-définies
+    positives (valeurs propres négatives ramenées à zéro).
+    """
+    valeurs_propres, vecteurs = np.linalg.eigh(valeurs)
+    if valeurs_propres.min() >= 0:
+        return valeurs
+    return (vecteurs * np.maximum(valeurs_propres, 0.0)) @ vecteurs.T
+
+def covariance_ledoit_wolf(rendements, validite=None):
+    """
+    Covariance de Ledoit-Wolf : mélange de la covariance empirique et d'une cible
+    diagonale de variance moyenne, avec l'intensité de rétrécissement optimale.
+
+    La matrice reste bien conditionnée même lorsque le nombre d'actifs
+    approche ou dépasse le nombre de dates. En présence de valeurs manquantes,
+    chaque paire est estimée sur ses dates communes (comme covariance_echantillon)
+    plutôt que sur les seules dates où tous les actifs sont cotés, puis la
+    matrice est ramenée à une matrice semi-définie positive avant rétrécissement.
+
+    Args:
+        rendements (pandas.DataFrame): Rendements quotidiens (dates × actifs)
+        validite (MasqueValidite, optional): Bitmap des rendements présents (recalculé depuis les NaN sinon)
+
+    Returns:
+        pandas.DataFrame: Matrice de covariance rétrécie
+    """
+    x, m = _rendements_masques(rendements, validite)
+    p = x.shape[1]
+    cov_empirique, n = _covariance_par_paires(x, m)
+    if m is not None:
+        cov_empirique = _semi_definie_positive(cov_empirique)
+    trace_par_actif = np.diag(cov_empirique)
+    mu = trace_par_actif.sum() / p
+
+    # Estimateurs de Ledoit-Wolf (2004) de la dispersion et de la distance à la cible,
+    # avec l'effectif de chaque paire
+    x2 = x ** 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dispersion = ((x2.T @ x2) / n - cov_empirique ** 2) / n
+    beta = np.where(n > 0, dispersion, 0.0).sum() / p
+    delta = ((cov_empirique ** 2).sum() - 2 * mu * trace_par_actif.sum() + p * mu ** 2) / p
+    beta = min(beta, delta)
+    intensite = 0.0 if beta == 0 else beta / delta
+
+    valeurs = (1 - intensite) * cov_empirique
+    valeurs[np.diag_indices(p)] += intensite * mu
+    return pd.DataFrame(valeurs, index=rendements.columns, columns=rendements.columns)
+
+def covariance_ewma(rendements, lambda_=0.94, validite=None):
+    """
+    Covariance à pondération exponentielle (RiskMetrics), qui privilégie les dates récentes.
+
+    En présence de valeurs manquantes, chaque paire est estimée sur ses dates
+    communes, les poids étant renormalisés sur ces dates.
+
+    Args:
+        rendements (pandas.DataFrame): Rendements quotidiens (dates × actifs)
+        lambda_ (float): Facteur de décroissance des poids (0.94 pour des données quotidiennes)
+        validite (MasqueValidite, optional): Bitmap des rendements présents (recalculé depuis les NaN sinon)
+
+    Returns:
+        pandas.DataFrame: Matrice de covariance
+    """
+    poids = lambda_ ** np.arange(len(rendements) - 1, -1, -1, dtype=np.float64)
+    poids /= poids.sum()
+
+    x, m = _rendements_masques(rendements, validite, poids=poids)
+    valeurs, _ = _covariance_par_paires(x, m, poids=poids)
+    if m is not None:
+        valeurs = _semi_definie_positive(valeurs)
+    return pd.DataFrame(valeurs, index=rendements.columns, columns=rendements.columns)
+
+def covariance_factorielle(rendements, rendements_indice, nb_facteurs_supplementaires=0, validite=None):
+    """
+    Modèle factoriel : l'indice est le premier facteur, éventuellement complété par
+    les premières composantes principales des résidus.
+
+    Chaque actif est régressé sur l'indice sur sa propre fenêtre de cotation,
+    et sa variance spécifique est estimée sur ces mêmes dates ; seules les dates
+    où l'indice manque sont écartées. Les composantes principales sont extraites
+    des résidus, les résidus manquants étant pris nuls.
+
+    Args:
+        rendements (pandas.DataFrame): Rendements quotidiens (dates × actifs)
+        rendements_indice (pandas.Series): Rendements de l'indice, premier facteur (voir calculer_beta)
+        nb_facteurs_supplementaires (int): Nombre de facteurs statistiques ajoutés à l'indice
+        validite (MasqueValidite, optional): Bitmap des rendements présents (recalculé depuis les NaN sinon)
+
+    Returns:
+        CovarianceFactorielle: Covariance sous forme factorielle
+    """
+    indice = rendements_indice.reindex(rendements.index)
+    lignes = indice.notna().to_numpy()
+    # Le bitmap ne décrit que le panel complet : il est recalculé si des dates sont écartées
+    x, m = _rendements_masques(rendements[lignes], validite if lignes.all() else None)
+    facteurs = indice[lignes].to_numpy(dtype=np.float64)[:, None]
+    facteurs = facteurs - facteurs.mean(axis=0)
+    m = np.ones_like(x) if m is None else m
+
+    # Expositions à l'indice, chaque actif sur ses propres dates (moyennes comprises)
+    n = m.sum(axis=0)
+    somme_f = facteurs[:, 0] @ m
+    with np.errstate(divide="ignore", invalid="ignore"):
+        moyenne_f = somme_f / n
+        variance_f = (facteurs[:, 0] ** 2) @ m - somme_f * moyenne_f
+        expositions = ((facteurs[:, 0] @ x) / variance_f)[:, None]
+    expositions[~np.isfinite(expositions)] = 0.0
+    residus = (x - (facteurs - moyenne_f[None, :]) * expositions.T) * m
+
+    if nb_facteurs_supplementaires > 0:
+        # Facteurs statistiques : premières composantes principales des résidus
+        u, s, vt = np.linalg.svd(residus, full_matrices=False)
+        composantes = u[:, :nb_facteurs_supplementaires] * s[:nb_facteurs_supplementaires]
+        facteurs = np.hstack([facteurs, composantes])
+        expositions = np.hstack([expositions, vt[:nb_facteurs_supplementaires].T])
+        residus = residus - (composantes @ vt[:nb_facteurs_supplementaires]) * m
+
+    cov_facteurs = facteurs.T @ facteurs / (len(facteurs) - 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        variances_specifiques = np.where(n > 1, (residus ** 2).sum(axis=0) / (n - 1), np.nan)
+    # Plancher pour les actifs entièrement expliqués par les facteurs (l'indice lui-même, par exemple)
+    variances_specifiques = np.maximum(variances_specifiques, 1e-10 * np.nanmax(variances_specifiques))
+    return CovarianceFactorielle(expositions, cov_facteurs, variances_specifiques, actifs=rendements.columns)
+
+# Estimateurs disponibles, sélectionnables par leur nom
+ESTIMATEURS = {
+    "echantillon": covariance_echantillon,
+    "ledoit_wolf": covariance_ledoit_wolf,
+    "ewma": covariance_ewma,
+    "factorielle": covariance_factorielle,
+}
+
+def estimer_covariance(rendements, methode="echantillon", rendements_indice=None, **options):
+    """
+    Estime la covariance des rendements avec l'estimateur choisi.
+
+    Args:
+        rendements (pandas.DataFrame): Rendements quotidiens (dates × actifs)
+        methode (str): "echantillon", "ledoit_wolf", "ewma" ou "factorielle"
+        rendements_indice (pandas.Series, optional): Rendements de l'indice, requis pour "factorielle"
+        **options: Paramètres propres à l'estimateur (lambda_, nb_facteurs_supplementaires)
+
+    Returns:
+        pandas.DataFrame ou CovarianceFactorielle: Covariance estimée
+    """
+    if methode not in ESTIMATEURS:
+        raise ValueError(f"Méthode de covariance inconnue : {methode} (choix : {', '.join(ESTIMATEURS)})")
+    if methode == "factorielle":
+        if rendements_indice is None:
+            raise ValueError("Le modèle factoriel nécessite les rendements de l'indice.")
+        return covariance_factorielle(rendements, rendements_indice, **options)
+    return ESTIMATEURS[methode](rendements, **options)
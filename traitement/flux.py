@@ -0,0 +1,321 @@
+import numpy as np
+import pandas as pd
+from traitement.contexte import INDICE_DEFAUT
+from traitement.risque import assembler_metriques_risque, queue_historique
+from traitement.periodes import rendements_depuis_sommes_mensuelles, rendements_relatifs
+
+def _fusionner_moments(n_a, moments_a, n_b, moments_b):
+    """
+    Fusionne les moyennes et sommes des puissances des écarts (ordres 2 à 4) de
+    deux échantillons, colonne par colonne (Pébay, 2008).
+
+    Returns:
+        tuple: (moyenne, M2, M3, M4) de l'échantillon réuni
+    """
+    moyenne_a, m2_a, m3_a, m4_a = moments_a
+    moyenne_b, m2_b, m3_b, m4_b = moments_b
+    n_a, n_b = n_a.astype(np.float64), n_b.astype(np.float64)
+    n = n_a + n_b
+    with np.errstate(divide="ignore", invalid="ignore"):
+        delta = moyenne_b - moyenne_a
+        d = np.where(n > 0, delta / n, 0.0)
+        moyenne = moyenne_a + n_b * d
+        m2 = m2_a + m2_b + delta * d * n_a * n_b
+        m3 = m3_a + m3_b + delta * d ** 2 * n_a * n_b * (n_a - n_b) + 3 * d * (n_a * m2_b - n_b * m2_a)
+        m4 = (m4_a + m4_b + delta * d ** 3 * n_a * n_b * (n_a ** 2 - n_a * n_b + n_b ** 2)
+              + 6 * d ** 2 * (n_a ** 2 * m2_b + n_b ** 2 * m2_a) + 4 * d * (n_a * m3_b - n_b * m3_a))
+    return moyenne, m2, m3, m4
+
+class AccumulateurStatistiques:
+    """
+    Statistiques de calculer_statistiques tenues à jour au fil de l'arrivée des prix.
+
+    Les prix sont ajoutés ligne par ligne ou par blocs ; l'accumulateur ne
+    conserve, pour chaque ticker, que le premier et le dernier prix connus
+    (et leurs dates), l'effectif, la moyenne et les sommes des puissances des
+    écarts de ses rendements jusqu'à l'ordre 4 (fusion de Pébay pour les
+    blocs), la somme des carrés des rendements négatifs, la valeur, le sommet
+    et le drawdown courants, les sommes mensuelles des log-rendements et les
+    taille_queue plus mauvais rendements. Chaque ajout coûte donc O(tickers)
+    par ligne (en moyenne pour la queue), sans relire l'historique, et resultat() reproduit tous les
+    tableaux de calculer_statistiques (mesures de risque et performances
+    mensuelles, trimestrielles et annuelles comprises), à l'exception des
+    panels de prix et de rendements, qui ne sont pas conservés.
+
+    La VaR et la CVaR historiques n'ont besoin que des plus mauvais
+    rendements : elles restent exactes tant que la queue (alpha × effectif
+    + 2 rendements) tient dans taille_queue, soit près de 80 ans de séances
+    à 95 % avec la valeur par défaut ; au-delà, elles valent NaN.
+
+    Les prix attendus sont des prix nettoyés (voir nettoyer_donnees). Comme
+    dans ContexteMarche, un rendement manque dès que l'un de ses deux prix
+    manque : chaque ticker n'est compté que sur sa fenêtre de cotation. Un
+    ticker absent des premiers blocs est ajouté à l'état dès qu'il apparaît ;
+    un ticker absent d'un bloc y est considéré comme non coté.
+
+    Args:
+        indice (str): Ticker de l'indice de référence
+        periodes_par_an (int): Nombre de séances par an pour l'annualisation de la volatilité
+        niveau (float): Niveau de confiance des VaR et CVaR
+        taille_queue (int): Nombre de plus mauvais rendements conservés par ticker pour la VaR historique
+    """
+
+    def __init__(self, indice=INDICE_DEFAUT, periodes_par_an=252, niveau=0.95, taille_queue=1000):
+        self.indice = indice
+        self.periodes_par_an = periodes_par_an
+        self.niveau = niveau
+        self.taille_queue = taille_queue
+        self.colonnes = None
+        self.derniere_date = None
+        self._nom_dates = "Date"
+        self._dernier_prix = None
+        self._premier_prix = None
+        self._premiere_date = None
+        self._dernier_valide = None
+        self._date_dernier_valide = None
+        self._lignes = 0
+        self._n = None
+        self._moments = None
+        self._carres_negatifs = None
+        self._valeur = None
+        self._sommet = None
+        self._drawdown_max = None
+        self._dernier_sommet = None
+        self._duree_max = None
+        self._queue = None
+        self._lignes_queue = 0
+        self._sommes_mensuelles = {}
+        self._effectifs_mensuels = {}
+
+    def _initialiser(self, colonnes):
+        self.colonnes = []
+        self._dernier_prix = np.empty(0)
+        self._premier_prix = np.empty(0)
+        self._premiere_date = np.empty(0, dtype="datetime64[ns]")
+        self._dernier_valide = np.empty(0)
+        self._date_dernier_valide = np.empty(0, dtype="datetime64[ns]")
+        self._n = np.empty(0, dtype=np.int64)
+        self._moments = tuple(np.empty(0) for _ in range(4))
+        self._carres_negatifs = np.empty(0)
+        self._valeur = np.empty(0)
+        self._sommet = np.empty(0)
+        self._drawdown_max = np.empty(0)
+        self._dernier_sommet = np.empty(0, dtype=np.int64)
+        self._duree_max = np.empty(0, dtype=np.int64)
+        # Tampon de 2 × taille_queue lignes, ramené aux taille_queue plus petites valeurs lorsqu'il est plein
+        self._queue = np.empty((2 * self.taille_queue, 0))
+        self._etendre(colonnes)
+
+    def _etendre(self, colonnes):
+        """
+        Ajoute des tickers à l'état : aucun prix ni rendement connu, moments nuls.
+
+        Comme dans calculer_statistiques, où les rendements d'avant la cotation
+        comptent pour 0, la valeur d'un ticker ajouté en cours de flux est restée
+        à 1, son propre sommet, jusqu'à la dernière ligne déjà intégrée.
+        """
+        nb = len(colonnes)
+        ajouts = {
+            "_dernier_prix": np.full(nb, np.nan),
+            "_premier_prix": np.full(nb, np.nan),
+            "_premiere_date": np.full(nb, np.datetime64("NaT"), dtype="datetime64[ns]"),
+            "_dernier_valide": np.full(nb, np.nan),
+            "_date_dernier_valide": np.full(nb, np.datetime64("NaT"), dtype="datetime64[ns]"),
+            "_n": np.zeros(nb, dtype=np.int64),
+            "_carres_negatifs": np.zeros(nb),
+            "_valeur": np.ones(nb),
+            "_sommet": np.full(nb, 1.0 if self._lignes else 0.0),
+            "_drawdown_max": np.zeros(nb),
+            "_dernier_sommet": np.full(nb, max(self._lignes - 1, 0), dtype=np.int64),
+            "_duree_max": np.zeros(nb, dtype=np.int64),
+        }
+        for nom, valeurs in ajouts.items():
+            setattr(self, nom, np.concatenate([getattr(self, nom), valeurs]))
+        self._moments = tuple(np.concatenate([moment, np.zeros(nb)]) for moment in self._moments)
+        self._queue = np.hstack([self._queue, np.full((len(self._queue), nb), np.inf)])
+        for mois in self._sommes_mensuelles:
+            self._sommes_mensuelles[mois] = np.concatenate([self._sommes_mensuelles[mois], np.zeros(nb)])
+            self._effectifs_mensuels[mois] = np.concatenate([self._effectifs_mensuels[mois], np.zeros(nb, dtype=np.int64)])
+        self.colonnes += list(colonnes)
+
+    def _mettre_a_jour_fenetres(self, valeurs, dates):
+        """Premier et dernier prix connus de chaque ticker (fenêtre de cotation)"""
+        presents = ~np.isnan(valeurs)
+        colonnes = np.flatnonzero(presents.any(axis=0))
+        if not len(colonnes):
+            return
+        premieres = presents[:, colonnes].argmax(axis=0)
+        dernieres = len(valeurs) - 1 - presents[::-1, colonnes].argmax(axis=0)
+
+        nouvelles = np.isnan(self._premier_prix[colonnes])
+        self._premier_prix[colonnes[nouvelles]] = valeurs[premieres[nouvelles], colonnes[nouvelles]]
+        self._premiere_date[colonnes[nouvelles]] = dates[premieres[nouvelles]]
+        self._dernier_valide[colonnes] = valeurs[dernieres, colonnes]
+        self._date_dernier_valide[colonnes] = dates[dernieres]
+
+    def ajouter(self, prix):
+        """
+        Intègre de nouvelles lignes de prix, postérieures aux précédentes.
+
+        Args:
+            prix (pandas.DataFrame ou pandas.Series): Nouvelles lignes de prix
+                (une Series représente une seule ligne, sa date étant son nom)
+        """
+        if isinstance(prix, pd.Series):
+            prix = prix.to_frame().T
+            prix.index.name = self._nom_dates
+        if prix.empty:
+            return
+        prix = prix.sort_index()
+        dates = pd.DatetimeIndex(prix.index)
+
+        if self.colonnes is None:
+            # Première ligne : elle sert de base aux rendements
+            self._initialiser(prix.columns)
+            self._nom_dates = prix.index.name
+            premiere = prix.iloc[:1].to_numpy(dtype=np.float64)
+            self._mettre_a_jour_fenetres(premiere, dates[:1].to_numpy())
+            self._dernier_prix = premiere[0]
+            self.derniere_date = dates[0]
+            prix, dates = prix.iloc[1:], dates[1:]
+            if prix.empty:
+                return
+
+        if dates[0] <= self.derniere_date:
+            raise ValueError("Les nouveaux prix doivent être postérieurs aux prix déjà intégrés.")
+
+        # Tickers apparus en cours de flux (introductions en bourse) : ajoutés à l'état
+        connues = set(self.colonnes)
+        nouvelles = [colonne for colonne in prix.columns if colonne not in connues]
+        if nouvelles:
+            self._etendre(nouvelles)
+
+        # Rendements du bloc, raccordés au dernier prix : manquants si l'un des deux prix manque
+        valeurs = prix.reindex(columns=self.colonnes).to_numpy(dtype=np.float64)
+        self._mettre_a_jour_fenetres(valeurs, dates.to_numpy())
+        bloc = np.vstack([self._dernier_prix, valeurs])
+        rendements = bloc[1:] / bloc[:-1] - 1
+        presents = ~np.isnan(rendements)
+
+        # Fusion des moments du bloc avec les moments accumulés, ticker par ticker
+        nb = presents.sum(axis=0)
+        zeros = np.where(presents, rendements, 0.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            moyenne_bloc = np.where(nb > 0, zeros.sum(axis=0) / nb, 0.0)
+        ecarts = np.where(presents, rendements - moyenne_bloc, 0.0)
+        moments_bloc = (moyenne_bloc, (ecarts ** 2).sum(axis=0), (ecarts ** 3).sum(axis=0), (ecarts ** 4).sum(axis=0))
+        self._moments = _fusionner_moments(self._n, self._moments, nb, moments_bloc)
+        self._n = self._n + nb
+        self._carres_negatifs += np.square(np.minimum(zeros, 0.0)).sum(axis=0)
+
+        # Drawdowns : valeur (rendements manquants comptés pour 0), sommet et position du dernier sommet
+        valeur = self._valeur * np.cumprod(1 + zeros, axis=0)
+        sommet = np.maximum(self._sommet, np.maximum.accumulate(valeur, axis=0))
+        self._drawdown_max = np.minimum(self._drawdown_max, (valeur / sommet - 1).min(axis=0))
+        lignes = self._lignes + np.arange(len(valeur))[:, None]
+        dernier_sommet = np.maximum(self._dernier_sommet,
+                                    np.maximum.accumulate(np.where(valeur >= sommet, lignes, 0), axis=0))
+        self._duree_max = np.maximum(self._duree_max, (lignes - dernier_sommet).max(axis=0))
+        self._valeur, self._sommet, self._dernier_sommet = valeur[-1], sommet[-1], dernier_sommet[-1]
+        self._lignes += len(valeur)
+
+        # Queue gauche : le tampon contient toujours les taille_queue plus petits rendements de chaque ticker
+        nouveaux = np.where(presents, rendements, np.inf)
+        while len(nouveaux):
+            if self._lignes_queue == len(self._queue):
+                self._queue[:self.taille_queue] = np.partition(self._queue, self.taille_queue - 1, axis=0)[:self.taille_queue]
+                self._queue[self.taille_queue:] = np.inf
+                self._lignes_queue = self.taille_queue
+            morceau = nouveaux[:len(self._queue) - self._lignes_queue]
+            self._queue[self._lignes_queue:self._lignes_queue + len(morceau)] = morceau
+            self._lignes_queue += len(morceau)
+            nouveaux = nouveaux[len(morceau):]
+
+        # Sommes mensuelles des log-rendements, rendements manquants ignorés
+        mois = np.asarray(dates.year * 12 + dates.month - 1)
+        log_rendements = np.log1p(zeros)
+        for code in np.unique(mois):
+            lignes_mois = mois == code
+            self._sommes_mensuelles[code] = self._sommes_mensuelles.get(code, 0.0) + log_rendements[lignes_mois].sum(axis=0)
+            self._effectifs_mensuels[code] = self._effectifs_mensuels.get(code, 0) + presents[lignes_mois].sum(axis=0)
+
+        self._dernier_prix = bloc[-1]
+        self.derniere_date = dates[-1]
+
+    def _metriques_risque(self, perf_annualisee):
+        """Mesures de risque de calculer_metriques_risque, à partir des agrégats tenus à jour"""
+        n = self._n
+        moyenne, m2, m3, m4 = self._moments
+        alpha = 1 - self.niveau
+
+        # Queue historique exacte seulement si tous les rendements nécessaires ont été conservés
+        exacts = (n <= self.taille_queue) | (np.floor(alpha * (n - 1)) + 2 <= self.taille_queue)
+        queue = self._queue[:self._lignes_queue]
+        queue = np.where(np.isinf(queue), np.nan, queue)
+        var_historique, cvar_historique = queue_historique(queue, np.where(exacts, n, self.taille_queue), alpha)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            moments = (n, moyenne, m2 / n, m3 / n, m4 / n)
+            semi_variance = self._carres_negatifs / n
+        return assembler_metriques_risque(
+            pd.Index(self.colonnes), moments, semi_variance, (self._drawdown_max, self._duree_max),
+            (np.where(exacts, var_historique, np.nan), np.where(exacts, cvar_historique, np.nan)),
+            perf_annualisee=perf_annualisee.to_numpy(dtype=np.float64), niveau=self.niveau,
+            periodes_par_an=self.periodes_par_an)
+
+    def resultat(self):
+        """
+        Retourne les statistiques à jour, au format de calculer_statistiques.
+
+        Returns:
+            dict: Dictionnaire des tableaux de calculer_statistiques (stats_globales, perf_mensuelle,
+                perf_trimestrielle, perf_annuelle et leurs versions relatives), sans les prix ni les rendements
+        """
+        if not self._sommes_mensuelles:
+            raise ValueError("Au moins deux lignes de prix sont nécessaires pour calculer les statistiques.")
+
+        colonnes = pd.Index(self.colonnes)
+        # Nombre d'années dans la période de cotation de chaque titre
+        nb_years = pd.Series((self._date_dernier_valide - self._premiere_date) / np.timedelta64(1, "D") / 365.25,
+                             index=colonnes)
+
+        perf_totale = pd.Series(self._dernier_valide / self._premier_prix - 1, index=colonnes)
+        perf_annualisee = (1 + perf_totale) ** (1 / nb_years) - 1
+        with np.errstate(divide="ignore", invalid="ignore"):
+            variance = np.where(self._n > 1, self._moments[1] / (self._n - 1), np.nan)
+        vol_annualisee = pd.Series(np.sqrt(variance) * np.sqrt(self.periodes_par_an), index=colonnes)
+        sharpe_ratio = perf_annualisee / vol_annualisee
+
+        if self.indice in colonnes:
+            perf_relative = perf_totale - perf_totale[self.indice]
+            perf_annualisee_relative = perf_annualisee - perf_annualisee[self.indice]
+        else:
+            perf_relative = None
+            perf_annualisee_relative = None
+
+        # Performances mensuelles, trimestrielles et annuelles depuis les sommes mensuelles
+        mois = np.array(sorted(self._sommes_mensuelles))
+        perf_periodes = rendements_depuis_sommes_mensuelles(
+            mois, np.array([self._sommes_mensuelles[m] for m in mois]),
+            np.array([self._effectifs_mensuels[m] for m in mois]), colonnes, nom=self._nom_dates)
+        perf_relatives = {frequence: rendements_relatifs(perf, self.indice) for frequence, perf in perf_periodes.items()}
+
+        stats_globales = pd.DataFrame({
+            "Performance Totale": perf_totale,
+            "Performance Annualisée": perf_annualisee,
+            "Volatilité Annualisée": vol_annualisee,
+            "Sharpe Ratio": sharpe_ratio,
+            "Performance Relative": perf_relative,
+            "Performance Annualisée Relative": perf_annualisee_relative
+        })
+        stats_globales = stats_globales.join(self._metriques_risque(perf_annualisee)).round(4)
+
+        return {
+            "stats_globales": stats_globales,
+            "perf_mensuelle": perf_periodes["mensuelle"],
+            "perf_mensuelle_relative": perf_relatives["mensuelle"],
+            "perf_trimestrielle": perf_periodes["trimestrielle"],
+            "perf_trimestrielle_relative": perf_relatives["trimestrielle"],
+            "perf_annuelle": perf_periodes["annuelle"],
+            "perf_annuelle_relative": perf_relatives["annuelle"]
+        }
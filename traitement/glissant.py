@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+from traitement.contexte import ContexteMarche
+from utils.instrumentation import instrumenter
+
+def _sommes_cumulees(valeurs):
+    """Sommes cumulées précédées d'une ligne de zéros (C[t] = somme des t premières lignes)"""
+    cumul = np.zeros((valeurs.shape[0] + 1,) + valeurs.shape[1:])
+    np.cumsum(valeurs, axis=0, out=cumul[1:])
+    return cumul
+
+def _fenetre(cumul, fenetre):
+    """
+    Sommes sur une fenêtre glissante à partir des sommes cumulées.
+
+    Chaque nouvelle date ajoute la ligne entrante et retire la ligne sortante
+    (S[t] = C[t] - C[t - fenetre]), soit un coût constant par date et par titre.
+    Sans fenêtre, on obtient la somme sur une fenêtre croissante.
+    """
+    if fenetre is None:
+        return cumul[1:]
+    sommes = cumul[1:].copy()
+    sommes[fenetre:] -= cumul[1:-fenetre]
+    return sommes
+
+def _moments_glissants(returns, index_returns, fenetres, exclure=None, taille_bloc=256, validite=None):
+    """
+    Calcule bêtas et corrélations à l'indice sur plusieurs fenêtres glissantes.
+
+    Les rendements sont centrés sur leur moyenne globale avant accumulation afin
+    de limiter les erreurs d'arrondi des sommes cumulées ; les valeurs
+    manquantes sont ignorées paire par paire comme dans calculer_regressions.
+    Les titres sont traités par blocs de colonnes convertis en float64 : les
+    sommes cumulées restent en float64 et la mémoire de travail est bornée par
+    la taille du bloc, tandis que les résultats sont rangés dans la précision
+    de stockage des rendements.
+
+    Args:
+        exclure (str, optional): Colonne ignorée (l'indice), sans copier le reste du panel
+        validite (MasqueValidite, optional): Bitmap des rendements présents (recalculé depuis les NaN sinon)
+    """
+    positions = np.array([i for i, titre in enumerate(returns.columns) if titre != exclure], dtype=np.intp)
+    colonnes = returns.columns[positions]
+    dtype = np.float32 if (returns.dtypes == np.float32).all() else np.float64
+    x_complet = index_returns.reindex(returns.index).to_numpy(dtype=np.float64)[:, None]
+    x_centre = x_complet - np.nanmean(x_complet)
+
+    sorties = {fenetre: {"beta": np.empty((len(returns), len(positions)), dtype=dtype),
+                         "correlation": np.empty((len(returns), len(positions)), dtype=dtype)}
+               for fenetre in fenetres}
+
+    for debut in range(0, len(positions), taille_bloc):
+        fin = min(debut + taille_bloc, len(positions))
+        y = returns.iloc[:, positions[debut:fin]].to_numpy(dtype=np.float64, copy=True)
+
+        presents = validite.extraire(positions[debut:fin]) if validite is not None else ~np.isnan(y)
+        masque = presents & ~np.isnan(x_complet)
+        y = np.where(masque, y - np.nanmean(y, axis=0), 0.0)
+        x = np.where(masque, x_centre, 0.0)
+
+        # Sommes cumulées des effectifs, sommes, carrés et produits croisés
+        cumuls = {
+            "n": _sommes_cumulees(masque.astype(np.float64)),
+            "x": _sommes_cumulees(x),
+            "y": _sommes_cumulees(y),
+            "xx": _sommes_cumulees(x * x),
+            "yy": _sommes_cumulees(y * y),
+            "xy": _sommes_cumulees(x * y),
+        }
+
+        for fenetre in fenetres:
+            s = {cle: _fenetre(cumul, fenetre) for cle, cumul in cumuls.items()}
+            n = s["n"]
+            min_obs = fenetre if fenetre is not None else 2
+            with np.errstate(divide="ignore", invalid="ignore"):
+                covariance = s["xy"] - s["x"] * s["y"] / n
+                variance_x = s["xx"] - s["x"] ** 2 / n
+                variance_y = s["yy"] - s["y"] ** 2 / n
+                sorties[fenetre]["beta"][:, debut:fin] = np.where(n >= min_obs, covariance / variance_x, np.nan)
+                sorties[fenetre]["correlation"][:, debut:fin] = np.where(n >= min_obs, covariance / np.sqrt(variance_x * variance_y), np.nan)
+
+    resultats = {}
+    for fenetre in fenetres:
+        cle = fenetre if fenetre is not None else "expansive"
+        resultats[cle] = {
+            nom: pd.DataFrame(valeurs, index=returns.index, columns=colonnes, copy=False)
+            for nom, valeurs in sorties[fenetre].items()
+        }
+    return resultats
+
+@instrumenter
+def calculer_statistiques_glissantes(data, fenetres=(60, 120, 252), expansive=True):
+    """
+    Calcule les bêtas et corrélations à l'indice de chaque titre, à chaque date.
+
+    Args:
+        data (pandas.DataFrame ou ContexteMarche): Prix ajustés nettoyés ou contexte de marché partagé
+        fenetres (tuple): Tailles des fenêtres glissantes en jours de bourse
+        expansive (bool): Ajoute aussi une fenêtre croissante depuis le début de l'historique
+
+    Returns:
+        dict: Pour chaque fenêtre (taille ou "expansive"), un dictionnaire
+        {"beta": DataFrame, "correlation": DataFrame} de dimensions dates × titres
+    """
+    print("Calcul des statistiques glissantes...")
+
+    contexte = ContexteMarche.depuis(data)
+    if not contexte.a_indice:
+        raise ValueError(f"L'indice '{contexte.indice}' n'est pas dans les données.")
+
+    returns = contexte.rendements
+    toutes_fenetres = list(fenetres) + ([None] if expansive else [])
+    resultats = _moments_glissants(returns, contexte.rendements_indice, toutes_fenetres, exclure=contexte.indice,
+                                   validite=contexte.validite)
+
+    print("Calcul des statistiques glissantes terminé")
+    return resultats
+
+def calculer_beta_glissant(data, fenetre=252):
+    """
+    Calcule le beta glissant de chaque titre par rapport à l'indice.
+
+    Args:
+        data (pandas.DataFrame ou ContexteMarche): Prix ajustés nettoyés ou contexte de marché partagé
+        fenetre (int, optional): Taille de la fenêtre en jours (None pour une fenêtre croissante)
+
+    Returns:
+        pandas.DataFrame: Bêtas glissants (dates × titres)
+    """
+    contexte = ContexteMarche.depuis(data)
+    returns = contexte.rendements
+    cle = fenetre if fenetre is not None else "expansive"
+    return _moments_glissants(returns, contexte.rendements_indice, [fenetre], exclure=contexte.indice,
+                              validite=contexte.validite)[cle]["beta"]
+
+def calculer_correlation_glissante(data, fenetre=252):
+    """
+    Calcule la corrélation glissante de chaque titre avec l'indice.
+
+    Args:
+        data (pandas.DataFrame ou ContexteMarche): Prix ajustés nettoyés ou contexte de marché partagé
+        fenetre (int, optional): Taille de la fenêtre en jours (None pour une fenêtre croissante)
+
+    Returns:
+        pandas.DataFrame: Corrélations glissantes (dates × titres)
+    """
+    contexte = ContexteMarche.depuis(data)
+    returns = contexte.rendements
+    cle = fenetre if fenetre is not None else "expansive"
+    return _moments_glissants(returns, contexte.rendements_indice, [fenetre], exclure=contexte.indice,
+                              validite=contexte.validite)[cle]["correlation"]
@@ -1,24 +1,96 @@
 # traitement/matrice_correlation.py
+import numpy as np
 import pandas as pd
+from traitement.contexte import ContexteMarche
+from utils.instrumentation import instrumenter
 
+def _bloc_centre(returns, debut, fin, complet, validite=None):
+    """
+    Colonnes [debut, fin) en float64, centrées sur leur moyenne, valeurs manquantes mises à zéro.
+
+    Returns:
+        tuple: (valeurs centrées, masque des valeurs présentes en float64, ou None si le panel est complet)
+    """
+    y = returns.iloc[:, debut:fin].to_numpy(dtype=np.float64, copy=True)
+    if complet:
+        y -= y.mean(axis=0)
+        return y, None
+    masque = validite.bloc(debut, fin) if validite is not None else ~np.isnan(y)
+    y -= np.nanmean(y, axis=0)
+    y[~masque] = 0.0
+    return y, masque.astype(np.float64)
+
+def correlation_par_paires(returns, taille_bloc=512, validite=None):
+    """
+    Matrice de corrélation de Pearson par blocs de colonnes, accumulée en float64.
+
+    Les colonnes sont converties en float64 et centrées bloc par bloc : la
+    mémoire de travail reste de l'ordre de dates × taille_bloc, quelle que soit
+    la précision de stockage des rendements. Les produits croisés sont obtenus
+    par produits matriciels ; en présence de valeurs manquantes, chaque paire
+    est calculée sur ses dates communes (comme DataFrame.corr), d'après le
+    bitmap de validité lorsqu'il est fourni.
+
+    Args:
+        returns (pandas.DataFrame): Rendements (dates × tickers)
+        taille_bloc (int): Nombre de colonnes converties à la fois
+        validite (MasqueValidite, optional): Bitmap des rendements présents (recalculé depuis les NaN sinon)
+
+    Returns:
+        numpy.ndarray: Matrice de corrélation (tickers × tickers)
+    """
+    nb = returns.shape[1]
+    complet = validite.complet if validite is not None else not returns.isna().to_numpy().any()
+    bornes = [(debut, min(debut + taille_bloc, nb)) for debut in range(0, nb, taille_bloc)]
+    correlation = np.empty((nb, nb))
+
+    for i, (debut_i, fin_i) in enumerate(bornes):
+        y_i, m_i = _bloc_centre(returns, debut_i, fin_i, complet, validite)
+        for debut_j, fin_j in bornes[i:]:
+            y_j, m_j = (y_i, m_i) if debut_j == debut_i else _bloc_centre(returns, debut_j, fin_j, complet, validite)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                if complet:
+                    variance_i = np.einsum("ij,ij->j", y_i, y_i)[:, None]
+                    variance_j = np.einsum("ij,ij->j", y_j, y_j)[None, :]
+                    bloc = (y_i.T @ y_j) / np.sqrt(variance_i * variance_j)
+                else:
+                    # Sommes restreintes, pour chaque paire, aux dates où les deux titres sont cotés
+                    n = m_i.T @ m_j
+                    somme_i = y_i.T @ m_j
+                    somme_j = m_i.T @ y_j
+                    covariance = y_i.T @ y_j - somme_i * somme_j / n
+                    variance_i = np.square(y_i).T @ m_j - somme_i ** 2 / n
+                    variance_j = m_i.T @ np.square(y_j) - somme_j ** 2 / n
+                    bloc = np.where(n >= 2, covariance / np.sqrt(variance_i * variance_j), np.nan)
+            correlation[debut_i:fin_i, debut_j:fin_j] = bloc
+            correlation[debut_j:fin_j, debut_i:fin_i] = bloc.T
+
+    diagonale = np.diag(correlation).copy()
+    np.fill_diagonal(correlation, np.where(np.isnan(diagonale), np.nan, 1.0))
+    return correlation
+
+@instrumenter
 def calculer_matrice_correlation(data):
     """
     Calcule la matrice de corrélation entre les rendements des titres et de l'indice.
     
     Args:
-        data (pandas.DataFrame): DataFrame des rendements des titres
+        data (pandas.DataFrame ou ContexteMarche): Prix ajustés nettoyés ou contexte de marché partagé
     
     Returns:
         pandas.DataFrame: Matrice de corrélation entre les titres et l'indice
     """
-    # Calcul des rendements quotidiens
-    returns = data.pct_change().dropna()
+    contexte = ContexteMarche.depuis(data)
     
-    # Matrice de corrélation
-    correlation_matrix = returns.corr()
+    # Rendements quotidiens (calculés une seule fois par le contexte)
+    returns = contexte.rendements
     
-    # Corrélation avec l'indice '^STOXX50E'
-    correlation_index = correlation_matrix["^STOXX50E"].drop("^STOXX50E", errors="ignore")
+    # Matrice de corrélation (accumulée en float64 par blocs de colonnes)
+    correlation_matrix = pd.DataFrame(correlation_par_paires(returns, validite=contexte.validite),
+                                      index=returns.columns, columns=returns.columns)
+    
+    # Corrélation avec l'indice
+    correlation_index = correlation_matrix[contexte.indice].drop(contexte.indice, errors="ignore")
     
     # Titre le moins et le plus corrélé à l'indice
     min_corr_ticker = correlation_index.idxmin()
@@ -28,3 +100,74 @@ def calculer_matrice_correlation(data):
     mean_corr = correlation_index.mean()
     
     return correlation_matrix, min_corr_ticker, max_corr_ticker, mean_corr
+
+@instrumenter
+def ordonner_matrice_correlation(correlation_matrix, nb_clusters=None, methode="average"):
+    """
+    Regroupe les titres par classification hiérarchique de leurs corrélations.
+    
+    La distance utilisée est d = √((1 - ρ) / 2) ; l'ordre des feuilles du
+    dendrogramme place les titres corrélés côte à côte.
+    
+    Args:
+        correlation_matrix (pandas.DataFrame): Matrice de corrélation
+        nb_clusters (int, optional): Nombre de groupes à former (un groupe par titre si None)
+        methode (str): Méthode de liaison de scipy.cluster.hierarchy.linkage
+    
+    Returns:
+        pandas.DataFrame: Une ligne par titre, dans l'ordre du dendrogramme, avec sa position et son groupe
+    """
+    # Import différé : scipy n'est chargé que pour la classification
+    from scipy.cluster.hierarchy import linkage, leaves_list, fcluster
+    from scipy.spatial.distance import squareform
+    
+    valeurs = correlation_matrix.to_numpy(dtype=np.float64)
+    distances = np.sqrt(np.clip((1 - np.nan_to_num(valeurs)) / 2, 0, 1))
+    np.fill_diagonal(distances, 0)
+    liaison = linkage(squareform(distances, checks=False), method=methode)
+    
+    ordre = leaves_list(liaison)
+    titres = correlation_matrix.index[ordre]
+    if nb_clusters is not None:
+        groupes = fcluster(liaison, nb_clusters, criterion="maxclust")[ordre]
+    else:
+        groupes = np.arange(1, len(ordre) + 1)
+    
+    return pd.DataFrame({"Position": np.arange(len(ordre)), "Groupe": groupes}, index=pd.Index(titres, name="Titre"))
+
+def agreger_par_blocs(correlation_matrix, ordre):
+    """
+    Agrège une matrice de corrélation en blocs, par groupe de titres.
+    
+    Chaque bloc contient la corrélation moyenne entre les titres de deux groupes
+    (hors diagonale pour un groupe avec lui-même), calculée par un seul produit
+    matriciel avec la matrice d'appartenance aux groupes.
+    
+    Args:
+        correlation_matrix (pandas.DataFrame): Matrice de corrélation
+        ordre (pandas.DataFrame): Résultat de ordonner_matrice_correlation
+    
+    Returns:
+        pandas.DataFrame: Matrice groupes × groupes des corrélations moyennes, dans l'ordre du dendrogramme
+    """
+    groupes = pd.unique(ordre["Groupe"])
+    position_groupe = {g: i for i, g in enumerate(groupes)}
+    indices_groupes = ordre["Groupe"].map(position_groupe).to_numpy()
+    
+    valeurs = np.nan_to_num(correlation_matrix.loc[ordre.index, ordre.index].to_numpy(dtype=np.float64))
+    appartenance = np.zeros((len(ordre), len(groupes)))
+    appartenance[np.arange(len(ordre)), indices_groupes] = 1.0
+    
+    sommes = appartenance.T @ valeurs @ appartenance
+    effectifs = appartenance.sum(axis=0)
+    paires = np.outer(effectifs, effectifs)
+    
+    # Retirer la diagonale (corrélation d'un titre avec lui-même) des blocs diagonaux
+    diagonale_par_groupe = appartenance.T @ np.diag(valeurs)
+    sommes[np.diag_indices(len(groupes))] -= diagonale_par_groupe
+    paires[np.diag_indices(len(groupes))] -= effectifs
+    with np.errstate(divide="ignore", invalid="ignore"):
+        moyennes = np.where(paires > 0, sommes / paires, 1.0)
+    
+    etiquettes = [f"Groupe {g} ({int(n)})" for g, n in zip(groupes, effectifs)]
+    return pd.DataFrame(moyennes, index=etiquettes, columns=etiquettes)
@@ -1,42 +1,229 @@
+import os
+import numpy as np
 import pandas as pd
-import yfinance as yf
 from datetime import datetime
+from traitement.stockage import StockPrix
+from traitement.telechargement import telecharger_par_lots
+from traitement.contexte import convertir_precision
+from utils.instrumentation import instrumenter
 
-def telecharger_donnees(tickers, date_debut="2015-01-01", date_fin="2025-01-01", fichier_sortie="data/donnees.csv"):
+def telecharger_yahoo(tickers, date_debut, date_fin):
     """
-    Télécharge les données de prix des tickers spécifiés et les enregistre dans un fichier CSV.
+    Source de prix par défaut : télécharge les prix ajustés depuis Yahoo Finance.
+    
+    Toute fonction de même signature peut la remplacer (source locale, fichier, etc.).
+    
+    Args:
+        tickers (list): Liste des tickers à télécharger
+        date_debut (str ou datetime): Date de début (incluse)
+        date_fin (str ou datetime): Date de fin (exclue)
+    
+    Returns:
+        pandas.DataFrame: DataFrame des prix ajustés (dates × tickers)
+    """
+    # Import différé : yfinance n'est chargé que lorsqu'un téléchargement est demandé
+    import yfinance as yf
+    
+    data = yf.download(list(tickers), start=date_debut, end=date_fin, auto_adjust=False, progress=False)["Adj Close"]
+    if isinstance(data, pd.Series):
+        data = data.to_frame(tickers[0])
+    return data
+
+@instrumenter
+def telecharger_donnees(tickers, date_debut="2015-01-01", date_fin="2025-01-01", fichier_sortie=None, dossier_stock="data/prix",
+                        source=telecharger_yahoo, taille_lot=100, nb_threads=4, debit=2):
+    """
+    Télécharge les données de prix des tickers spécifiés et les enregistre dans le stock de prix.
+    
+    Les tickers sont téléchargés par lots concurrents, avec un débit borné et
+    des nouveaux essais par lot (voir telecharger_par_lots) ; chaque lot est
+    écrit dans le stock dès qu'il est terminé.
     
     Args:
         tickers (list): Liste des tickers Yahoo Finance à télécharger
         date_debut (str): Date de début au format YYYY-MM-DD
         date_fin (str): Date de fin au format YYYY-MM-DD
-        fichier_sortie (str): Chemin du fichier CSV de sortie
+        fichier_sortie (str, optional): Chemin d'un fichier CSV à écrire en plus du stock
+        dossier_stock (str): Dossier du stock de prix binaire
+        source (callable): Fonction (tickers, date_debut, date_fin) -> DataFrame des prix
+        taille_lot (int): Nombre de tickers par appel à la source
+        nb_threads (int): Nombre d'appels simultanés
+        debit (float): Nombre maximal d'appels par seconde
     
     Returns:
         pandas.DataFrame: DataFrame contenant les prix ajustés
     """
-    print(f"Téléchargement des données pour {len(tickers)} tickers...")
-    data = yf.download(tickers, start=date_debut, end=date_fin, auto_adjust=False)
-    data = data["Adj Close"]
+    data, _ = telecharger_par_lots(tickers, date_debut, date_fin, source, taille_lot=taille_lot, nb_threads=nb_threads,
+                                   debit=debit, dossier_stock=dossier_stock)
+    print(f"Données sauvegardées dans {dossier_stock}")
     
-    # Sauvegarde des données brutes
-    data.to_csv(fichier_sortie)
-    print(f"Données sauvegardées dans {fichier_sortie}")
+    if fichier_sortie:
+        data.to_csv(fichier_sortie)
+        print(f"Données exportées dans {fichier_sortie}")
     
     return data
 
-def nettoyer_donnees(df):
+@instrumenter
+def mettre_a_jour_donnees(tickers, date_debut="2015-01-01", date_fin=None, dossier_stock="data/prix", source=telecharger_yahoo,
+                          taille_lot=100, nb_threads=4, debit=2):
+    """
+    Met à jour le stock de prix en ne téléchargeant que les données manquantes.
+    
+    Pour chaque ticker déjà présent, seules les dates postérieures à sa dernière
+    valeur connue sont demandées ; les nouveaux tickers sont téléchargés depuis
+    date_debut. Les tickers partageant la même date de reprise sont regroupés,
+    puis téléchargés par lots concurrents (voir telecharger_par_lots). Le
+    résultat fusionné est écrit de manière atomique dans le stock.
+    
+    Args:
+        tickers (list): Liste des tickers à maintenir à jour
+        date_debut (str): Date de début pour les tickers absents du stock
+        date_fin (str, optional): Date de fin (exclue), aujourd'hui par défaut
+        dossier_stock (str): Dossier du stock de prix binaire
+        source (callable): Fonction (tickers, date_debut, date_fin) -> DataFrame des prix
+        taille_lot (int): Nombre de tickers par appel à la source
+        nb_threads (int): Nombre d'appels simultanés
+        debit (float): Nombre maximal d'appels par seconde
+    
+    Returns:
+        pandas.DataFrame: DataFrame des prix à jour
+    """
+    stock = StockPrix(dossier_stock)
+    existant = stock.charger() if stock.existe() else pd.DataFrame()
+    date_fin = pd.Timestamp(date_fin) if date_fin is not None else pd.Timestamp(datetime.today().date())
+    
+    # Regrouper les tickers par date de reprise du téléchargement
+    groupes = {}
+    for ticker in tickers:
+        derniere_date = existant[ticker].last_valid_index() if ticker in existant.columns else None
+        reprise = derniere_date + pd.Timedelta(days=1) if derniere_date is not None else pd.Timestamp(date_debut)
+        if reprise < date_fin:
+            groupes.setdefault(reprise, []).append(ticker)
+    
+    if not groupes:
+        print("Stock de prix déjà à jour")
+        return existant
+    
+    nouveaux = []
+    for reprise, groupe in sorted(groupes.items()):
+        print(f"Téléchargement de {len(groupe)} tickers à partir du {reprise.date()}...")
+        morceau, _ = telecharger_par_lots(groupe, reprise, date_fin, source, taille_lot=taille_lot, nb_threads=nb_threads,
+                                          debit=debit)
+        if morceau.empty:
+            continue
+        morceau.index = pd.DatetimeIndex(morceau.index)
+        morceau = morceau[morceau.index >= reprise].dropna(how="all")
+        if not morceau.empty:
+            nouveaux.append(morceau)
+    
+    if not nouveaux:
+        print("Aucune nouvelle donnée disponible")
+        return existant
+    
+    # Fusion : les valeurs déjà stockées sont conservées, les nouvelles dates et les nouveaux tickers sont ajoutés
+    data = existant.astype("float64")
+    for morceau in nouveaux:
+        data = data.combine_first(morceau.astype("float64"))
+    data = data.sort_index()
+    data.index.name = "Date"
+    
+    stock.ecrire(data)
+    print(f"Stock de prix mis à jour : {data.shape[0]} dates, {data.shape[1]} tickers")
+    return data
+
+@instrumenter
+def charger_donnees(tickers=None, dossier_stock="data/prix", fichier_csv="data/donnees.csv", precision=None):
+    """
+    Charge les prix depuis le stock binaire, en le créant à partir du CSV si nécessaire.
+    
+    Le CSV n'est lu (et converti) que lorsque le stock n'existe pas encore ou
+    qu'il est plus ancien que le CSV ; les exécutions suivantes lisent
+    directement le stock, sans analyse de texte ni inférence de dates.
+    
+    Args:
+        tickers (list, optional): Tickers à charger (tous si None)
+        dossier_stock (str): Dossier du stock de prix binaire
+        fichier_csv (str): Fichier CSV historique utilisé pour la conversion initiale
+        precision (str, optional): Précision de stockage en mémoire ("float32" divise la mémoire par deux ;
+            None conserve le float64 du stock, lu par projection mémoire)
+    
+    Returns:
+        pandas.DataFrame: DataFrame contenant les prix ajustés
+    """
+    stock = StockPrix(dossier_stock)
+    
+    csv_plus_recent = (
+        os.path.exists(fichier_csv)
+        and (not stock.existe() or os.path.getmtime(fichier_csv) > stock.date_modification())
+    )
+    if csv_plus_recent:
+        print(f"Conversion de {fichier_csv} vers le stock {dossier_stock}")
+        stock.ecrire(pd.read_csv(fichier_csv, index_col=0, parse_dates=True))
+    
+    if not stock.existe():
+        raise FileNotFoundError(f"Aucune donnée disponible dans {dossier_stock} ni dans {fichier_csv}")
+    
+    print(f"Chargement des données depuis {dossier_stock}")
+    return convertir_precision(stock.charger(tickers), precision)
+
+def _combler_trous(valeurs, limite):
+    """
+    Comble sur place, par le dernier prix connu, les trous d'au plus `limite` dates situés entre deux cotations.
+
+    Pour chaque valeur manquante, les positions de la cotation précédente et de
+    la suivante sont obtenues par maximum et minimum cumulés ; la longueur du
+    trou en découle sans boucle sur les dates ni sur les titres.
+
+    Returns:
+        tuple: (nombre de valeurs comblées, nombre de valeurs laissées manquantes à l'intérieur des fenêtres de cotation)
+    """
+    nb_dates = len(valeurs)
+    presents = ~np.isnan(valeurs)
+    lignes = np.arange(nb_dates, dtype=np.int32)[:, None]
+
+    precedente = np.where(presents, lignes, -1)
+    np.maximum.accumulate(precedente, axis=0, out=precedente)
+    suivante = np.where(presents, lignes, nb_dates)[::-1]
+    suivante = np.minimum.accumulate(suivante, axis=0)[::-1]
+
+    interieur = ~presents & (precedente >= 0) & (suivante < nb_dates)
+    a_combler = interieur & (suivante - precedente - 1 <= limite)
+    dates_trous, titres_trous = np.nonzero(a_combler)
+    valeurs[dates_trous, titres_trous] = valeurs[precedente[dates_trous, titres_trous], titres_trous]
+    return len(dates_trous), int(np.count_nonzero(interieur)) - len(dates_trous)
+
+@instrumenter
+def nettoyer_donnees(df, limite_comblement=5, taille_bloc=512):
     """
     Nettoie les données en gérant les valeurs manquantes.
     
+    Chaque titre n'est conservé que sur sa fenêtre de cotation (de son premier
+    à son dernier prix connu) : rien n'est inventé avant une introduction ni
+    après une radiation. À l'intérieur de la fenêtre, les trous courts (jours
+    fériés propres à une place, cotations manquantes) sont comblés par le
+    dernier prix connu ; les trous plus longs restent manquants et sont ignorés
+    par les calculs, qui travaillent paire par paire sur les valeurs présentes
+    (voir MasqueValidite).
+    
     Args:
         df (pandas.DataFrame): DataFrame à nettoyer
+        limite_comblement (int): Longueur maximale (en dates) d'un trou comblé
+        taille_bloc (int): Nombre de colonnes traitées à la fois
     
     Returns:
-        pandas.DataFrame: DataFrame nettoyé
+        pandas.DataFrame: DataFrame nettoyé, dans la précision des données reçues
     """
-    # Gestion des valeurs manquantes (forward fill puis backward fill)
-    df_nettoye = df.ffill().bfill()
+    valeurs = df.to_numpy(copy=True)
+    comblees, masquees, introduits = 0, 0, 0
+    for debut in range(0, valeurs.shape[1], taille_bloc):
+        # Vue sur les colonnes du bloc : le comblement s'applique directement au tableau complet
+        bloc = valeurs[:, debut:debut + taille_bloc]
+        n_comblees, n_masquees = _combler_trous(bloc, limite_comblement)
+        comblees += n_comblees
+        masquees += n_masquees
+        introduits += int(np.count_nonzero(np.isnan(bloc[0])))
+    df_nettoye = pd.DataFrame(valeurs, index=df.index, columns=df.columns, copy=False)
     
-    print("Nettoyage des données terminé")
+    print(f"Nettoyage des données terminé : {comblees} valeurs comblées, {masquees} valeurs masquées "
+          f"(trous de plus de {limite_comblement} dates), {introduits} titres sans cotation à la première date")
     return df_nettoye
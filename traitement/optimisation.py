@@ -1,9 +1,13 @@
+import os
+import time
 import numpy as np
 import pandas as pd
-import scipy.optimize as sco
 from traitement.analyse import calculer_statistiques
-from visualisation.graphiques import graphique_performance_cumulee
-from utils.export import exporter_statistiques_excel
+from traitement.contexte import ContexteMarche
+from traitement.covariance import CovarianceFactorielle, estimer_covariance
+from traitement.risque import calculer_metriques_risque
+from utils.export import ouvrir_classeur, ecrire_feuille
+from utils.instrumentation import instrumenter
 
 def selectionner_meilleurs_titres(df_stats, n=10):
     """Sélectionne les n meilleurs titres selon le ratio de Sharpe."""
@@ -13,56 +17,236 @@ def selectionner_meilleurs_titres(df_stats, n=10):
     meilleurs_titres = df_sharpe.nlargest(n, 'Sharpe Ratio').index.values
     return meilleurs_titres
 
-def optimiser_portefeuille(rendements, cov_matrix, poids_min=0.01, contrainte=True):
-    """Optimise les pondérations du portefeuille pour maximiser le Sharpe Ratio, avec un poids minimum par actif si contrainte=True."""
-    nb_actifs = len(rendements)
-    
-    def sharpe_ratio(weights):
-        port_return = np.sum(weights * rendements)
-        port_volatility = np.sqrt(np.dot(weights.T, np.dot(cov_matrix, weights)))
-        # Éviter la division par zéro
-        if port_volatility < 1e-8:  # Seuil numérique plus sûr
-            return 0
-        return -port_return / port_volatility  # On minimise donc on met un "-"
+def rendements_portefeuille(rendements, poids):
+    """
+    Rendements quotidiens d'un portefeuille à poids fixes, renormalisés chaque jour sur les titres cotés.
+
+    Un titre sans rendement à une date (avant son introduction, après sa
+    radiation) n'est pas compté comme une position non investie : les poids
+    des titres cotés ce jour-là sont ramenés à une somme de 1. Une date sans
+    aucun titre coté a un rendement nul.
+
+    Args:
+        rendements (pandas.DataFrame): Rendements quotidiens des titres (dates × titres)
+        poids (numpy.ndarray): Poids du portefeuille, dans l'ordre des colonnes
+
+    Returns:
+        pandas.Series: Rendements quotidiens du portefeuille
+    """
+    valeurs = rendements.to_numpy(dtype=np.float64)
+    presents = ~np.isnan(valeurs)
+    poids = np.asarray(poids, dtype=np.float64)
+    investi = presents @ poids
+    with np.errstate(divide="ignore", invalid="ignore"):
+        resultat = np.where(investi > 0, np.where(presents, valeurs, 0.0) @ poids / investi, 0.0)
+    return pd.Series(resultat, index=rendements.index)
+
+def _en_tableau(cov_matrix):
+    """Convertit la covariance en tableau NumPy, en conservant telle quelle une covariance factorielle"""
+    if isinstance(cov_matrix, CovarianceFactorielle):
+        return cov_matrix
+    return np.asarray(cov_matrix, dtype=np.float64)
+
+def _sharpe_negatif_et_gradient(poids, rendements, cov_matrix):
+    """
+    Opposé du ratio de Sharpe et son gradient analytique, calculés ensemble sur des tableaux NumPy.
+    
+    Avec r = μ'w, v = w'Σw et s = √v : f = -r/s et ∇f = -(μ/s - r·Σw/s³),
+    soit un seul produit matrice-vecteur par évaluation.
+    """
+    cov_poids = cov_matrix @ poids
+    port_return = rendements @ poids
+    port_volatility = np.sqrt(poids @ cov_poids)
+    # Éviter la division par zéro
+    if port_volatility < 1e-8:  # Seuil numérique plus sûr
+        return 0.0, np.zeros_like(poids)
+    valeur = -port_return / port_volatility  # On minimise donc on met un "-"
+    gradient = -(rendements / port_volatility - port_return * cov_poids / port_volatility ** 3)
+    return valeur, gradient
+
+def portefeuille_tangent(rendements, cov_matrix):
+    """
+    Portefeuille de Sharpe maximal sans contrainte de bornes, en forme fermée (w ∝ Σ⁻¹μ).
+    
+    Returns:
+        numpy.ndarray: Poids normalisés à 1, ou None si Σ est singulière ou si Σ⁻¹μ ne définit pas un portefeuille de Sharpe positif
+    """
+    try:
+        if isinstance(cov_matrix, CovarianceFactorielle):
+            direction = cov_matrix.resoudre(rendements)
+        else:
+            direction = np.linalg.solve(cov_matrix, rendements)
+    except np.linalg.LinAlgError:
+        return None
+    total = direction.sum()
+    if not np.isfinite(total) or total <= 0:
+        return None
+    return direction / total
+
+def optimiser_portefeuille(rendements, cov_matrix, poids_min=0.01, contrainte=True, forme_fermee=True):
+    """
+    Optimise les pondérations du portefeuille pour maximiser le Sharpe Ratio, avec un poids minimum par actif si contrainte=True.
+    
+    Si le portefeuille tangent en forme fermée respecte déjà les bornes, il est
+    retourné directement et le solveur itératif n'est pas appelé. Sinon, SLSQP
+    reçoit l'objectif et son gradient analytique en un seul appel.
+    
+    cov_matrix peut être une CovarianceFactorielle : les produits Σw et la
+    résolution de la forme fermée passent alors par les facteurs, sans
+    construire la matrice complète.
+    """
+    mu = np.asarray(rendements, dtype=np.float64)
+    sigma = _en_tableau(cov_matrix)
+    nb_actifs = len(mu)
+    borne_min = poids_min if contrainte else 0
+    
+    # Chemin rapide : aucune borne active, la solution analytique est l'optimum
+    if forme_fermee:
+        poids = portefeuille_tangent(mu, sigma)
+        if poids is not None and np.all(poids >= borne_min) and np.all(poids <= 1):
+            return poids
     
     # Contraintes : somme des poids = 1
-    constraints = ({'type': 'eq', 'fun': lambda x: np.sum(x) - 1})
+    constraints = ({'type': 'eq', 'fun': lambda x: np.sum(x) - 1, 'jac': lambda x: np.ones(nb_actifs)})
     
     # Si contrainte est activée, on impose un poids minimum pour chaque actif
-    if contrainte:
-        bounds = tuple((poids_min, 1) for _ in range(nb_actifs))  # Poids entre 0.01 et 1
-    else:
-        bounds = tuple((0, 1) for _ in range(nb_actifs))  # Poids entre 0 et 1, sans contrainte de poids minimum
+    bounds = tuple((borne_min, 1) for _ in range(nb_actifs))
     
     # Répartition initiale uniforme
-    init_guess = nb_actifs * [1. / nb_actifs]  # Répartition initiale uniforme
+    init_guess = np.full(nb_actifs, 1. / nb_actifs)
     
-    # Optimisation
-    opt_result = sco.minimize(sharpe_ratio, init_guess, method='SLSQP', bounds=bounds, constraints=constraints)
+    # Optimisation (objectif et gradient analytique calculés ensemble) ; scipy n'est chargé qu'ici
+    import scipy.optimize as sco
+    opt_result = sco.minimize(_sharpe_negatif_et_gradient, init_guess, args=(mu, sigma), jac=True,
+                              method='SLSQP', bounds=bounds, constraints=constraints)
     
     return opt_result.x if opt_result.success else None
 
-def executer_optimisation(df_rendements):
-    """Exécute toutes les étapes de l'optimisation et exporte les résultats."""
-    # Calculer les statistiques, qui retourne un dictionnaire
-    df_stats = calculer_statistiques(df_rendements)
-    
-    # Identifier l'indice (STOXX50E) pour référence ultérieure
-    indice = None
-    for col in df_rendements.columns:
-        if "^STOXX50E" in col:
-            indice = col
-            break
+def _minimiser_variance(sigma, bornes, poids_initiaux, rendements=None, cible=None, methode="SLSQP"):
+    """
+    Minimise la variance w'Σw sous contrainte de budget (et de rendement cible si fourni).
+    
+    Le gradient (2Σw) et la hessienne (2Σ) sont fournis analytiquement au solveur.
+    methode="qp" utilise la formulation quadratique de trust-constr (contraintes
+    linéaires et hessienne exacte) au lieu de SLSQP.
+    """
+    import scipy.optimize as sco
+    
+    nb_actifs = len(poids_initiaux)
+    
+    # Mise à l'échelle : des variances de l'ordre de 1e-4 passeraient sous la tolérance de SLSQP
+    sigma = sigma / np.mean(np.diag(sigma))
+    
+    def variance(w):
+        sigma_w = sigma @ w
+        return w @ sigma_w, 2 * sigma_w
+    
+    def hessienne(w):
+        return 2 * sigma
+    
+    if methode == "qp":
+        lignes = [np.ones(nb_actifs)]
+        valeurs = [1.0]
+        if cible is not None:
+            lignes.append(rendements)
+            valeurs.append(cible)
+        contraintes = sco.LinearConstraint(np.array(lignes), valeurs, valeurs)
+        limites = sco.Bounds([b[0] for b in bornes], [b[1] for b in bornes])
+        resultat = sco.minimize(variance, poids_initiaux, jac=True, hess=hessienne, method="trust-constr",
+                                bounds=limites, constraints=[contraintes])
+    else:
+        contraintes = [{'type': 'eq', 'fun': lambda w: np.sum(w) - 1, 'jac': lambda w: np.ones(nb_actifs)}]
+        if cible is not None:
+            contraintes.append({'type': 'eq', 'fun': lambda w: rendements @ w - cible, 'jac': lambda w: rendements})
+        resultat = sco.minimize(variance, poids_initiaux, jac=True, method="SLSQP", bounds=bornes, constraints=contraintes)
+    
+    return resultat.x if resultat.success else None
+
+@instrumenter
+def calculer_frontiere_efficiente(rendements, cov_matrix, nb_points=20, poids_min=0.0, methode="SLSQP"):
+    """
+    Calcule la frontière efficiente entre le portefeuille de variance minimale et celui de Sharpe maximal.
+    
+    Chaque point minimise la variance pour un rendement cible, en partant des
+    poids du point précédent : les cibles étant proches, le solveur converge en
+    quelques itérations. Les gradients et hessiennes sont analytiques.
+    
+    Args:
+        rendements (pandas.Series): Rendements moyens des actifs
+        cov_matrix (pandas.DataFrame): Matrice de covariance des actifs
+        nb_points (int): Nombre de points de la frontière
+        poids_min (float): Poids minimum par actif
+        methode (str): "SLSQP" ou "qp" (formulation quadratique trust-constr)
+    
+    Returns:
+        pandas.DataFrame: Une ligne par point avec rendement, volatilité, ratio de Sharpe et poids des actifs
+    """
+    mu = np.asarray(rendements, dtype=np.float64)
+    if isinstance(cov_matrix, CovarianceFactorielle):
+        # La hessienne exacte est dense : la frontière travaille sur la matrice complète
+        cov_matrix = cov_matrix.dense()
+    sigma = np.asarray(cov_matrix, dtype=np.float64)
+    nb_actifs = len(mu)
+    actifs = list(rendements.index) if hasattr(rendements, "index") else list(range(nb_actifs))
+    bornes = tuple((poids_min, 1) for _ in range(nb_actifs))
+    
+    # Extrémité basse : portefeuille de variance minimale
+    poids = _minimiser_variance(sigma, bornes, np.full(nb_actifs, 1. / nb_actifs), methode=methode)
+    if poids is None:
+        raise ValueError("Le calcul du portefeuille de variance minimale n'a pas convergé.")
+    
+    # Extrémité haute : portefeuille de Sharpe maximal (à défaut, le rendement maximal atteignable)
+    poids_sharpe = optimiser_portefeuille(rendements, cov_matrix, poids_min=poids_min, contrainte=poids_min > 0)
+    if poids_sharpe is not None:
+        rendement_max = mu @ poids_sharpe
+    else:
+        rendement_max = poids_min * mu.sum() + (1 - nb_actifs * poids_min) * mu.max()
+    
+    lignes = []
+    for cible in np.linspace(mu @ poids, rendement_max, nb_points):
+        # Démarrage à chaud depuis le point voisin
+        nouveaux_poids = _minimiser_variance(sigma, bornes, poids, rendements=mu, cible=cible, methode=methode)
+        if nouveaux_poids is None:
+            continue
+        poids = nouveaux_poids
+        volatilite = np.sqrt(poids @ sigma @ poids)
+        lignes.append([mu @ poids, volatilite, (mu @ poids) / volatilite if volatilite > 1e-8 else np.nan] + list(poids))
+    
+    return pd.DataFrame(lignes, columns=["Rendement", "Volatilité", "Sharpe Ratio"] + actifs)
+
+@instrumenter
+def executer_optimisation(df_rendements, stats=None, n=10, methode_covariance="echantillon", dossier_sortie="resultats", journal=None):
+    """
+    Exécute toutes les étapes de l'optimisation et exporte les résultats.
+    
+    Args:
+        df_rendements (pandas.DataFrame ou ContexteMarche): Prix ajustés nettoyés ou contexte de marché partagé
+        stats (dict, optional): Statistiques déjà calculées par calculer_statistiques, recalculées si absentes
+        n (int): Nombre de titres retenus selon le ratio de Sharpe
+        methode_covariance (str): Estimateur de covariance ("echantillon", "ledoit_wolf", "ewma" ou "factorielle")
+        dossier_sortie (str): Dossier où écrire portefeuille_optimise.xlsx
+        journal (JournalExport, optional): Journal où enregistrer la durée d'écriture du classeur
+    """
+    contexte = ContexteMarche.depuis(df_rendements)
+    df_prix = contexte.prix
+    df_rendements = contexte.rendements
+    
+    # Réutiliser les statistiques déjà calculées plutôt que de tout recalculer
+    df_stats = stats if stats is not None else calculer_statistiques(contexte)
+    
+    # Identifier l'indice pour référence ultérieure
+    indice = contexte.indice if contexte.a_indice else None
     
     # Sélection des meilleurs titres en utilisant les statistiques calculées
-    meilleurs_titres = selectionner_meilleurs_titres(df_stats, n=10)
+    meilleurs_titres = selectionner_meilleurs_titres(df_stats, n=n)
     
     # Filtrer les rendements pour les meilleurs titres
     df_rendements_selection = df_rendements[meilleurs_titres]
     
     # Optimisation sans contrainte (poids libres, y compris proches de 0)
     rendements_moyens = df_rendements_selection.mean()
-    cov_matrix = df_rendements_selection.cov()
+    cov_matrix = estimer_covariance(df_rendements_selection, methode=methode_covariance,
+                                    rendements_indice=contexte.rendements_indice)
     
     # Optimisation sans contrainte (sans contraintes sur les poids)
     poids_optimaux_sans_contrainte = optimiser_portefeuille(rendements_moyens, cov_matrix, contrainte=False)
@@ -88,12 +272,12 @@ def executer_optimisation(df_rendements):
     }, index=meilleurs_titres)
     
     # Calcul des performances du portefeuille optimisé sans contrainte
-    portfolio_returns_sans_contrainte = (df_rendements_selection * poids_optimaux_sans_contrainte).sum(axis=1)
+    portfolio_returns_sans_contrainte = rendements_portefeuille(df_rendements_selection, poids_optimaux_sans_contrainte)
     prix_portfolio_sans_contrainte = (1 + portfolio_returns_sans_contrainte).cumprod()
     prix_portfolio_sans_contrainte = prix_portfolio_sans_contrainte / prix_portfolio_sans_contrainte.iloc[0]
     
     # Calcul des performances du portefeuille optimisé avec contrainte
-    portfolio_returns_avec_contrainte = (df_rendements_selection * poids_optimaux_avec_contrainte).sum(axis=1)
+    portfolio_returns_avec_contrainte = rendements_portefeuille(df_rendements_selection, poids_optimaux_avec_contrainte)
     prix_portfolio_avec_contrainte = (1 + portfolio_returns_avec_contrainte).cumprod()
     prix_portfolio_avec_contrainte = prix_portfolio_avec_contrainte / prix_portfolio_avec_contrainte.iloc[0]
     
@@ -103,8 +287,10 @@ def executer_optimisation(df_rendements):
     
     # Si l'indice est disponible, ajouter également sa performance
     if indice is not None:
-        df_portfolio_sans_contrainte[indice] = df_stats['prix'][indice] / df_stats['prix'][indice].iloc[0]
-        df_portfolio_avec_contrainte[indice] = df_stats['prix'][indice] / df_stats['prix'][indice].iloc[0]
+        # Base 1 au premier prix connu de l'indice
+        prix_indice = df_stats['prix'][indice]
+        df_portfolio_sans_contrainte[indice] = prix_indice / prix_indice.dropna().iloc[0]
+        df_portfolio_avec_contrainte[indice] = prix_indice / prix_indice.dropna().iloc[0]
     
     # Appeler la fonction graphique_performance_cumulee avec les titres à afficher
     titres_a_afficher = ['Portfolio_Optimise_Sans_Contrainte', 'Portfolio_Optimise_Avec_Contrainte']
@@ -113,8 +299,8 @@ def executer_optimisation(df_rendements):
     
     # Calcul des statistiques pour chaque portefeuille
     def calculer_stats(portfolio_returns, prefix):
-        nb_years = (df_rendements.index[-1] - df_rendements.index[0]).days / 365.25
-        perf_totale = portfolio_returns.iloc[-1] - 1
+        nb_years = (df_prix.index[-1] - df_prix.index[0]).days / 365.25
+        perf_totale = (1 + portfolio_returns).prod() - 1
         perf_annualisee = (1 + perf_totale) ** (1 / nb_years) - 1
         vol_annualisee = portfolio_returns.std() * np.sqrt(252)
         sharpe_ratio = perf_annualisee / vol_annualisee
@@ -126,13 +312,18 @@ def executer_optimisation(df_rendements):
             var_index = df_rendements[indice].var()
             beta = cov_with_index / var_index
         
-        return pd.DataFrame({
+        nom = f'Portefeuille Optimisé {prefix}'
+        stats_portefeuille = pd.DataFrame({
             f'Performance Totale {prefix}': [perf_totale],
             f'Performance Annualisée {prefix}': [perf_annualisee],
             f'Volatilité Annualisée {prefix}': [vol_annualisee],
             f'Sharpe Ratio {prefix}': [sharpe_ratio],
             f'Beta (vs Indice) {prefix}': [beta if beta is not None else np.nan]
-        }, index=[f'Portefeuille Optimisé {prefix}'])
+        }, index=[nom])
+        
+        # Mesures de risque (drawdowns, VaR/CVaR, Sortino, Calmar), mêmes définitions que pour les titres
+        risque = calculer_metriques_risque(portfolio_returns.to_frame(nom), perf_annualisee=pd.Series({nom: perf_annualisee}))
+        return stats_portefeuille.join(risque.add_suffix(f' {prefix}'))
 
     stats_sans_contrainte = calculer_stats(portfolio_returns_sans_contrainte, 'Sans Contrainte')
     stats_avec_contrainte = calculer_stats(portfolio_returns_avec_contrainte, 'Avec Contrainte')
@@ -145,16 +336,20 @@ def executer_optimisation(df_rendements):
     print(df_resultats_avec_contrainte)
     
     # Export des résultats dans un fichier Excel
-    with pd.ExcelWriter("resultats/portefeuille_optimise.xlsx") as writer:
+    fichier_sortie = os.path.join(dossier_sortie, "portefeuille_optimise.xlsx")
+    debut_export = time.perf_counter()
+    with ouvrir_classeur(fichier_sortie) as writer:
         # Exporter la composition des portefeuilles
-        df_resultats_sans_contrainte.to_excel(writer, sheet_name="Composition_Sans_Contrainte")
-        df_resultats_avec_contrainte.to_excel(writer, sheet_name="Composition_Avec_Contrainte")
+        ecrire_feuille(writer, df_resultats_sans_contrainte, "Composition_Sans_Contrainte")
+        ecrire_feuille(writer, df_resultats_avec_contrainte, "Composition_Avec_Contrainte")
         # Exporter les statistiques des portefeuilles
-        stats_sans_contrainte.to_excel(writer, sheet_name="Statistiques_Sans_Contrainte")
-        stats_avec_contrainte.to_excel(writer, sheet_name="Statistiques_Avec_Contrainte")
+        ecrire_feuille(writer, stats_sans_contrainte, "Statistiques_Sans_Contrainte")
+        ecrire_feuille(writer, stats_avec_contrainte, "Statistiques_Avec_Contrainte")
         # Exporter les performances
-        df_portfolio_sans_contrainte.to_excel(writer, sheet_name="Perf_Sans_Contrainte")
-        df_portfolio_avec_contrainte.to_excel(writer, sheet_name="Perf_Avec_Contrainte")
+        ecrire_feuille(writer, df_portfolio_sans_contrainte, "Perf_Sans_Contrainte")
+        ecrire_feuille(writer, df_portfolio_avec_contrainte, "Perf_Avec_Contrainte")
+    if journal is not None:
+        journal.enregistrer("portefeuille_optimise", fichier_sortie, time.perf_counter() - debut_export)
     
     # Afficher les résultats
     print("\nStatistiques du portefeuille optimisé sans contrainte:")
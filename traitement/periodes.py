@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+
+# Fréquences calendaires : nombre de mois par période
+FREQUENCES = {
+    "mensuelle": 1,
+    "trimestrielle": 3,
+    "annuelle": 12,
+}
+
+def _sommes_par_groupe(valeurs, codes):
+    """
+    Somme des lignes consécutives de même code (index trié), en une passe.
+
+    Returns:
+        tuple: (codes des groupes, sommes par groupe (groupes × colonnes))
+    """
+    debuts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    return codes[debuts], np.add.reduceat(valeurs, debuts, axis=0)
+
+def _libelles(mois, frequence, nom):
+    """Libellés des périodes à partir du numéro de mois absolu (année * 12 + mois - 1) de leur premier mois"""
+    annees = mois // 12
+    if frequence == "annuelle":
+        return pd.Index(annees, name=nom)
+    if frequence == "trimestrielle":
+        return pd.Index([f"{a}T{m % 12 // 3 + 1}" for a, m in zip(annees, mois)], name=nom)
+    return pd.Index([f"{a}-{m % 12 + 1:02d}" for a, m in zip(annees, mois)], name=nom)
+
+def calculer_rendements_periodiques(returns, frequences=("mensuelle", "trimestrielle", "annuelle")):
+    """
+    Rendements composés par mois, trimestre et année, en une passe vectorisée.
+
+    Les rendements quotidiens sont convertis une fois en log-rendements
+    (float64), sommés par mois avec np.add.reduceat sur les lignes
+    consécutives de chaque mois, puis les sommes mensuelles sont regroupées en
+    trimestres et en années ; le rendement de la période est exp(somme) - 1.
+    Les rendements manquants sont ignorés ; une période sans aucun rendement
+    (hors fenêtre de cotation) vaut NaN.
+
+    Args:
+        returns (pandas.DataFrame): Rendements quotidiens (dates triées × tickers)
+        frequences (tuple): Fréquences à calculer, parmi "mensuelle", "trimestrielle" et "annuelle"
+
+    Returns:
+        dict: Un DataFrame (périodes × tickers) par fréquence
+    """
+    valeurs = returns.to_numpy(dtype=np.float64)
+    presents = ~np.isnan(valeurs)
+    log_rendements = np.log1p(np.where(presents, valeurs, 0.0))
+
+    # Numéro de mois absolu de chaque date : agrégation quotidienne → mensuelle en une passe
+    mois = np.asarray(returns.index.year * 12 + returns.index.month - 1)
+    mois_groupes, sommes_mensuelles = _sommes_par_groupe(log_rendements, mois)
+    _, effectifs_mensuels = _sommes_par_groupe(presents.astype(np.int64), mois)
+
+    return rendements_depuis_sommes_mensuelles(mois_groupes, sommes_mensuelles, effectifs_mensuels, returns.columns,
+                                               nom=returns.index.name, frequences=frequences)
+
+def rendements_depuis_sommes_mensuelles(mois, sommes_mensuelles, effectifs_mensuels, colonnes, nom=None,
+                                        frequences=("mensuelle", "trimestrielle", "annuelle")):
+    """
+    Rendements composés par période à partir des sommes mensuelles de log-rendements.
+
+    Les sommes mensuelles viennent d'une passe sur les rendements quotidiens
+    (calculer_rendements_periodiques) ou sont tenues à jour au fil de l'eau
+    (AccumulateurStatistiques).
+
+    Args:
+        mois (numpy.ndarray): Numéro de mois absolu (année * 12 + mois - 1) de chaque ligne, croissant
+        sommes_mensuelles (numpy.ndarray): Sommes des log-rendements du mois (mois × tickers)
+        effectifs_mensuels (numpy.ndarray): Nombre de rendements présents dans le mois (mois × tickers)
+        colonnes (pandas.Index): Tickers
+        nom (str, optional): Nom de l'index des périodes
+        frequences (tuple): Fréquences à calculer, parmi "mensuelle", "trimestrielle" et "annuelle"
+
+    Returns:
+        dict: Un DataFrame (périodes × tickers) par fréquence
+    """
+    resultats = {}
+    for frequence in frequences:
+        nb_mois = FREQUENCES[frequence]
+        if nb_mois == 1:
+            groupes, sommes, effectifs = mois, sommes_mensuelles, effectifs_mensuels
+        else:
+            # Regroupement des sommes mensuelles : premier mois de chaque période
+            codes = mois // nb_mois
+            groupes, sommes = _sommes_par_groupe(sommes_mensuelles, codes)
+            _, effectifs = _sommes_par_groupe(effectifs_mensuels, codes)
+            groupes = groupes * nb_mois
+        rendements = np.where(effectifs > 0, np.expm1(sommes), np.nan)
+        resultats[frequence] = pd.DataFrame(rendements, index=_libelles(groupes, frequence, nom), columns=colonnes)
+    return resultats
+
+def rendements_relatifs(rendements, indice):
+    """
+    Rendements de chaque période moins celui de l'indice.
+
+    Returns:
+        pandas.DataFrame: Rendements relatifs, None si l'indice est absent
+    """
+    if indice not in rendements.columns:
+        return None
+    return rendements.subtract(rendements[indice], axis=0)
@@ -0,0 +1,178 @@
+import numpy as np
+import pandas as pd
+from statistics import NormalDist
+
+# Nombre de points de la queue utilisés pour intégrer le quantile de Cornish-Fisher (CVaR)
+_POINTS_QUEUE = 200
+
+def _drawdowns(valeurs):
+    """
+    Drawdown maximal et durée maximale sous un précédent sommet, pour chaque colonne.
+
+    La valeur de chaque série est le produit cumulé des (1 + r), les rendements
+    manquants (hors fenêtre de cotation) comptant pour 0 ; le sommet courant est
+    son maximum cumulé.
+
+    Returns:
+        tuple: (drawdown maximal (négatif), durée maximale en séances)
+    """
+    valeur = np.cumprod(1 + np.nan_to_num(valeurs, nan=0.0), axis=0)
+    sommet = np.maximum.accumulate(valeur, axis=0)
+    drawdown_max = (valeur / sommet - 1).min(axis=0)
+
+    # Position du dernier sommet atteint : la durée sous l'eau est l'écart avec la date courante
+    lignes = np.arange(len(valeur))[:, None]
+    dernier_sommet = np.maximum.accumulate(np.where(valeur >= sommet, lignes, 0), axis=0)
+    duree_max = (lignes - dernier_sommet).max(axis=0)
+    return drawdown_max, duree_max
+
+def queue_historique(valeurs, effectifs, alpha):
+    """
+    VaR et CVaR historiques de chaque colonne, par sélection partielle.
+
+    Les valeurs manquantes sont placées en fin de colonne (+inf) ; une seule
+    partition amène les k plus petits rendements en tête de chaque colonne, et
+    seules ces k lignes sont triées. Le quantile est interpolé linéairement
+    (comme numpy.quantile) et la CVaR est la moyenne des
+    floor(alpha × (n - 1)) + 1 plus petits rendements, c'est-à-dire des
+    rendements inférieurs ou égaux au quantile tant qu'aucun rendement plus
+    grand ne lui est égal (en cas d'égalités, seuls ces rangs sont retenus).
+
+    Les k plus petits rendements suffisent : valeurs peut ne contenir que la
+    queue gauche de chaque colonne (voir AccumulateurStatistiques), effectifs
+    restant le nombre total de rendements.
+
+    Args:
+        valeurs (numpy.ndarray): Rendements (lignes × colonnes), NaN pour les valeurs manquantes
+        effectifs (numpy.ndarray): Nombre de rendements de chaque colonne
+        alpha (float): Probabilité de la queue (1 - niveau de confiance)
+
+    Returns:
+        tuple: (VaR, CVaR), en pertes positives
+    """
+    position = alpha * (effectifs - 1)
+    bas = np.floor(position).astype(int)
+    haut = np.minimum(bas + 1, np.maximum(effectifs - 1, 0))
+    k = int(haut.max()) + 1 if len(haut) else 1
+
+    x = np.where(np.isnan(valeurs), np.inf, valeurs)
+    if k < len(x):
+        x = np.partition(x, k, axis=0)[:k + 1]
+    tete = np.sort(x[:k + 1], axis=0)
+
+    colonnes = np.arange(tete.shape[1])
+    x_bas = tete[bas, colonnes]
+    x_haut = tete[haut, colonnes]
+    # Colonnes sans rendement : +inf partout, écartées ci-dessous
+    with np.errstate(invalid="ignore"):
+        quantile = x_bas + (position - bas) * (x_haut - x_bas)
+
+        # Moyenne des bas + 1 plus petits rendements (rangs 0 à bas)
+        rangs = np.arange(len(tete))[:, None]
+        queue = np.where(rangs <= bas, tete, 0.0).sum(axis=0) / (bas + 1)
+
+    invalides = effectifs < 2
+    return np.where(invalides, np.nan, -quantile), np.where(invalides, np.nan, -queue)
+
+def _quantile_cornish_fisher(z, asymetrie, kurtosis):
+    """Quantile corrigé de l'asymétrie et de l'excès de kurtosis (développement de Cornish-Fisher)"""
+    return (z + (z ** 2 - 1) * asymetrie / 6 + (z ** 3 - 3 * z) * kurtosis / 24
+            - (2 * z ** 3 - 5 * z) * asymetrie ** 2 / 36)
+
+def assembler_metriques_risque(colonnes, moments, semi_variance, drawdowns, queue, perf_annualisee=None,
+                               niveau=0.95, periodes_par_an=252):
+    """
+    Tableau des mesures de risque à partir des agrégats de chaque colonne.
+
+    Les agrégats (effectifs, moments, drawdowns, queue historique) sont ceux
+    d'une passe sur la matrice complète (calculer_metriques_risque) ou tenus
+    à jour au fil de l'eau (AccumulateurStatistiques) : les deux calculs
+    partagent ainsi les mêmes définitions.
+
+    Args:
+        colonnes (pandas.Index): Titres ou portefeuilles
+        moments (tuple): (effectifs, moyenne, m2, m3, m4), moments centrés divisés par l'effectif
+        semi_variance (numpy.ndarray): Moyenne des carrés des rendements négatifs (cible 0)
+        drawdowns (tuple): (drawdown maximal, durée maximale en séances)
+        queue (tuple): (VaR historique, CVaR historique), en pertes positives
+        perf_annualisee (numpy.ndarray): Performance annualisée, numérateur des ratios de Sortino et de Calmar
+        niveau (float): Niveau de confiance des VaR et CVaR
+        periodes_par_an (int): Nombre de périodes par an pour l'annualisation
+
+    Returns:
+        pandas.DataFrame: Une ligne par colonne
+    """
+    effectifs, moyenne, m2, m3, m4 = moments
+    drawdown_max, duree_max = drawdowns
+    var_historique, cvar_historique = queue
+    alpha = 1 - niveau
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ecart_type = np.sqrt(m2 * effectifs / (effectifs - 1))
+        asymetrie = m3 / m2 ** 1.5
+        kurtosis = m4 / m2 ** 2 - 3
+
+        # VaR de Cornish-Fisher, et CVaR comme moyenne du quantile corrigé sur la queue
+        normale = NormalDist()
+        z = normale.inv_cdf(alpha)
+        var_cf = -(moyenne + ecart_type * _quantile_cornish_fisher(z, asymetrie, kurtosis))
+        z_queue = np.array([normale.inv_cdf(alpha * (i + 0.5) / _POINTS_QUEUE) for i in range(_POINTS_QUEUE)])[:, None]
+        cvar_cf = -(moyenne + ecart_type * _quantile_cornish_fisher(z_queue, asymetrie, kurtosis).mean(axis=0))
+
+        # Volatilité des seuls rendements négatifs (cible 0), annualisée
+        sortino = perf_annualisee / (np.sqrt(semi_variance) * np.sqrt(periodes_par_an))
+        calmar = perf_annualisee / np.abs(drawdown_max)
+
+    return pd.DataFrame({
+        "Max Drawdown": drawdown_max,
+        "Durée Max Drawdown (séances)": duree_max,
+        f"VaR Historique {niveau:.0%}": var_historique,
+        f"CVaR Historique {niveau:.0%}": cvar_historique,
+        f"VaR Cornish-Fisher {niveau:.0%}": var_cf,
+        f"CVaR Cornish-Fisher {niveau:.0%}": cvar_cf,
+        "Ratio de Sortino": sortino,
+        "Ratio de Calmar": calmar,
+    }, index=colonnes)
+
+def calculer_metriques_risque(returns, perf_annualisee=None, niveau=0.95, periodes_par_an=252):
+    """
+    Calcule les mesures de risque de toutes les colonnes en une passe vectorisée.
+
+    Drawdown maximal et sa durée (maximum cumulé de la valeur), VaR et CVaR
+    historiques (sélection partielle des plus mauvais rendements), VaR et CVaR
+    de Cornish-Fisher (moments d'ordre 3 et 4), ratios de Sortino et de Calmar.
+    Toutes les opérations portent sur la matrice complète des rendements, sans
+    boucle sur les titres ; les sommes sont accumulées en float64 et les
+    rendements manquants ignorés.
+
+    Args:
+        returns (pandas.DataFrame): Rendements quotidiens (dates × titres ou portefeuilles)
+        perf_annualisee (pandas.Series, optional): Performance annualisée de chaque colonne, numérateur des
+            ratios de Sortino et de Calmar (par défaut déduite des rendements)
+        niveau (float): Niveau de confiance des VaR et CVaR
+        periodes_par_an (int): Nombre de périodes par an pour l'annualisation
+
+    Returns:
+        pandas.DataFrame: Une ligne par colonne de returns
+    """
+    valeurs = returns.to_numpy(dtype=np.float64)
+    presents = ~np.isnan(valeurs)
+    effectifs = presents.sum(axis=0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Moments centrés d'ordre 2 à 4
+        moyenne = np.nansum(valeurs, axis=0) / effectifs
+        ecarts = np.where(presents, valeurs - moyenne, 0.0)
+        m2 = (ecarts ** 2).sum(axis=0) / effectifs
+        m3 = (ecarts ** 3).sum(axis=0) / effectifs
+        m4 = (ecarts ** 4).sum(axis=0) / effectifs
+        semi_variance = np.square(np.where(presents, np.minimum(valeurs, 0.0), 0.0)).sum(axis=0) / effectifs
+
+        if perf_annualisee is None:
+            perf_annualisee = np.nanprod(1 + valeurs, axis=0) ** (periodes_par_an / effectifs) - 1
+        else:
+            perf_annualisee = pd.Series(perf_annualisee).reindex(returns.columns).to_numpy(dtype=np.float64)
+
+    return assembler_metriques_risque(returns.columns, (effectifs, moyenne, m2, m3, m4), semi_variance,
+                                      _drawdowns(valeurs), queue_historique(valeurs, effectifs, 1 - niveau),
+                                      perf_annualisee=perf_annualisee, niveau=niveau, periodes_par_an=periodes_par_an)
@@ -0,0 +1,147 @@
+import os
+import json
+import uuid
+import numpy as np
+import pandas as pd
+
+class StockPrix:
+    """
+    Stock de prix binaire en colonnes, lu par projection mémoire (memmap).
+
+    Les prix sont conservés dans une matrice float64 (dates × tickers) rangée
+    colonne par colonne (ordre Fortran) : chaque ticker occupe une zone contiguë
+    du fichier, si bien que charger 30 tickers sur 2 000 ne lit que ces 30
+    colonnes. Les dates sont stockées à part en datetime64.
+
+    Chaque écriture produit une nouvelle version des fichiers puis bascule le
+    pointeur ``stock.json`` de manière atomique : un lecteur voit toujours soit
+    l'ancienne version complète, soit la nouvelle.
+
+    Args:
+        dossier (str): Dossier du stock (créé à la première écriture)
+    """
+
+    FICHIER_POINTEUR = "stock.json"
+
+    def __init__(self, dossier="data/prix"):
+        self.dossier = dossier
+
+    @property
+    def chemin_pointeur(self):
+        return os.path.join(self.dossier, self.FICHIER_POINTEUR)
+
+    def existe(self):
+        """Indique si le stock contient déjà des données"""
+        return os.path.exists(self.chemin_pointeur)
+
+    def date_modification(self):
+        """Date de dernière écriture du stock (timestamp), None s'il n'existe pas"""
+        return os.path.getmtime(self.chemin_pointeur) if self.existe() else None
+
+    def _lire_pointeur(self):
+        with open(self.chemin_pointeur) as f:
+            return json.load(f)
+
+    def version(self):
+        """Identifiant de la version courante du stock (change à chaque écriture), None s'il n'existe pas"""
+        return self._lire_pointeur()["version"] if self.existe() else None
+
+    @property
+    def tickers(self):
+        """Liste des tickers présents dans le stock"""
+        return self._lire_pointeur()["tickers"]
+
+    def dates(self):
+        """Index des dates du stock"""
+        pointeur = self._lire_pointeur()
+        dates = np.load(os.path.join(self.dossier, pointeur["dates"]))
+        return pd.DatetimeIndex(dates, name="Date")
+
+    def charger(self, tickers=None):
+        """
+        Charge les prix du stock, éventuellement restreints à certains tickers.
+
+        Sans sélection, ou pour une plage contiguë de colonnes, le DataFrame
+        retourné s'appuie directement sur la projection mémoire, sans copie.
+
+        Args:
+            tickers (list, optional): Tickers à charger (tous si None)
+
+        Returns:
+            pandas.DataFrame: DataFrame des prix (dates × tickers)
+        """
+        pointeur = self._lire_pointeur()
+        tous_tickers = pointeur["tickers"]
+        valeurs = np.load(os.path.join(self.dossier, pointeur["valeurs"]), mmap_mode="r")
+        dates = pd.DatetimeIndex(np.load(os.path.join(self.dossier, pointeur["dates"])), name="Date")
+
+        if tickers is None:
+            return pd.DataFrame(valeurs, index=dates, columns=tous_tickers, copy=False)
+
+        position = {ticker: i for i, ticker in enumerate(tous_tickers)}
+        manquants = [t for t in tickers if t not in position]
+        if manquants:
+            raise KeyError(f"Tickers absents du stock : {manquants}")
+
+        colonnes = [position[t] for t in tickers]
+        if colonnes == list(range(colonnes[0], colonnes[0] + len(colonnes))):
+            # Plage contiguë : simple vue sur la projection mémoire
+            selection = valeurs[:, colonnes[0]:colonnes[0] + len(colonnes)]
+        else:
+            # Seules les colonnes demandées sont lues depuis le disque
+            selection = valeurs[:, colonnes]
+        return pd.DataFrame(selection, index=dates, columns=list(tickers), copy=False)
+
+    def fusionner(self, data):
+        """
+        Ajoute ou remplace des tickers dans le stock, de manière atomique.
+
+        Les colonnes fournies remplacent celles du même nom ; les autres tickers
+        du stock sont conservés, sur l'union des dates.
+
+        Args:
+            data (pandas.DataFrame): DataFrame des prix (index de dates, une colonne par ticker)
+        """
+        if self.existe():
+            existant = self.charger()
+            conserves = existant.drop(columns=[t for t in data.columns if t in existant.columns])
+            data = pd.concat([conserves, data], axis=1).sort_index()
+            data.index.name = "Date"
+        self.ecrire(data)
+
+    def ecrire(self, data):
+        """
+        Remplace le contenu du stock par les prix fournis, de manière atomique.
+
+        Args:
+            data (pandas.DataFrame): DataFrame des prix (index de dates, une colonne par ticker)
+        """
+        os.makedirs(self.dossier, exist_ok=True)
+        ancien = self._lire_pointeur() if self.existe() else None
+
+        version = uuid.uuid4().hex[:12]
+        fichier_valeurs = f"valeurs_{version}.npy"
+        fichier_dates = f"dates_{version}.npy"
+
+        valeurs = np.asfortranarray(data.to_numpy(dtype=np.float64))
+        np.save(os.path.join(self.dossier, fichier_valeurs), valeurs)
+        np.save(os.path.join(self.dossier, fichier_dates), pd.DatetimeIndex(data.index).to_numpy(dtype="datetime64[ns]"))
+
+        pointeur = {
+            "version": version,
+            "valeurs": fichier_valeurs,
+            "dates": fichier_dates,
+            "tickers": [str(t) for t in data.columns],
+        }
+        chemin_temporaire = self.chemin_pointeur + f".{version}.tmp"
+        with open(chemin_temporaire, "w") as f:
+            json.dump(pointeur, f)
+        os.replace(chemin_temporaire, self.chemin_pointeur)
+
+        # Suppression de l'ancienne version une fois la bascule effectuée
+        if ancien is not None:
+            for cle in ("valeurs", "dates"):
+                try:
+                    os.remove(os.path.join(self.dossier, ancien[cle]))
+                except OSError:
+                    pass
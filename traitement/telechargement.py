@@ -0,0 +1,222 @@
+import json
+import time
+import random
+import threading
+import http.client
+from urllib.parse import urlparse, urlencode
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import pandas as pd
+from traitement.stockage import StockPrix
+from utils.instrumentation import instrumenter
+
+class ErreurSource(Exception):
+    """
+    Échec d'un appel à une source de prix.
+
+    Args:
+        message (str): Description de l'erreur
+        reessayable (bool): Indique si un nouvel essai a des chances d'aboutir (limitation de débit, erreur serveur)
+        attente (float, optional): Délai demandé par la source avant un nouvel essai (Retry-After), en secondes
+    """
+
+    def __init__(self, message, reessayable=True, attente=None):
+        super().__init__(message)
+        self.reessayable = reessayable
+        self.attente = attente
+
+class LimiteurDebit:
+    """
+    Limite le nombre d'appels par seconde, partagé entre les threads (seau à jetons).
+
+    Args:
+        debit (float): Nombre d'appels autorisés par seconde (None : pas de limite)
+        rafale (int): Nombre d'appels pouvant partir immédiatement après une période d'inactivité
+    """
+
+    def __init__(self, debit, rafale=1):
+        self.debit = debit
+        self.rafale = rafale
+        self._jetons = float(rafale)
+        self._dernier = time.monotonic()
+        self._verrou = threading.Lock()
+
+    def acquerir(self):
+        """Bloque jusqu'à ce qu'un appel soit autorisé"""
+        if not self.debit:
+            return
+        while True:
+            with self._verrou:
+                maintenant = time.monotonic()
+                self._jetons = min(self.rafale, self._jetons + (maintenant - self._dernier) * self.debit)
+                self._dernier = maintenant
+                if self._jetons >= 1:
+                    self._jetons -= 1
+                    return
+                attente = (1 - self._jetons) / self.debit
+            time.sleep(attente)
+
+class SourceHTTP:
+    """
+    Source de prix servie en HTTP/JSON, avec une connexion persistante par thread.
+
+    La source répond à GET {url}/prix?tickers=A,B&debut=...&fin=... par
+    {"dates": [...], "prix": {ticker: [...]}} (même format que POST /prix du
+    service d'analyse). Les réponses 429 et 5xx sont signalées comme
+    réessayables, avec le délai Retry-After éventuel.
+
+    Args:
+        url (str): Adresse de base de la source (http://hote:port)
+        delai_max (float): Délai maximal d'une requête, en secondes
+    """
+
+    def __init__(self, url, delai_max=30):
+        adresse = urlparse(url)
+        self.hote = adresse.hostname
+        self.port = adresse.port or 80
+        self.chemin = adresse.path.rstrip("/")
+        self.delai_max = delai_max
+        self._local = threading.local()
+
+    def _connexion(self):
+        if getattr(self._local, "connexion", None) is None:
+            self._local.connexion = http.client.HTTPConnection(self.hote, self.port, timeout=self.delai_max)
+        return self._local.connexion
+
+    def __call__(self, tickers, date_debut, date_fin):
+        requete = f"{self.chemin}/prix?" + urlencode({
+            "tickers": ",".join(tickers),
+            "debut": str(pd.Timestamp(date_debut).date()),
+            "fin": str(pd.Timestamp(date_fin).date()),
+        })
+        connexion = self._connexion()
+        try:
+            connexion.request("GET", requete)
+            reponse = connexion.getresponse()
+            corps = reponse.read()
+        except (OSError, http.client.HTTPException) as erreur:
+            # Connexion rompue : elle sera rouverte au prochain essai
+            connexion.close()
+            self._local.connexion = None
+            raise ErreurSource(f"Connexion à la source impossible : {erreur}") from erreur
+
+        if reponse.status != 200:
+            attente = reponse.getheader("Retry-After")
+            raise ErreurSource(f"Réponse {reponse.status} de la source",
+                               reessayable=reponse.status == 429 or reponse.status >= 500,
+                               attente=float(attente) if attente else None)
+        contenu = json.loads(corps)
+        return pd.DataFrame(contenu["prix"], index=pd.DatetimeIndex(contenu["dates"], name="Date"), dtype=float)
+
+def _decouper(tickers, taille_lot):
+    return [tickers[i:i + taille_lot] for i in range(0, len(tickers), taille_lot)]
+
+def _telecharger_lot(source, lot, date_debut, date_fin, limiteur, tentatives, delai_initial, delai_max):
+    """
+    Télécharge un lot en réessayant avec un délai exponentiel (et aléatoire) entre les essais.
+
+    Returns:
+        pandas.DataFrame: Prix du lot (dates × tickers)
+    """
+    for essai in range(tentatives):
+        limiteur.acquerir()
+        try:
+            return source(lot, date_debut, date_fin)
+        except Exception as erreur:
+            reessayable = getattr(erreur, "reessayable", True)
+            if not reessayable or essai == tentatives - 1:
+                raise
+            attente = getattr(erreur, "attente", None)
+            if attente is None:
+                attente = min(delai_max, delai_initial * 2 ** essai) * (1 + random.random() / 2)
+            time.sleep(attente)
+
+@instrumenter
+def telecharger_par_lots(tickers, date_debut, date_fin, source, taille_lot=100, nb_threads=4, debit=None,
+                         tentatives=4, delai_initial=1.0, delai_max=30.0, dossier_stock=None):
+    """
+    Télécharge un grand univers par lots concurrents, en isolant les tickers en échec.
+
+    Les tickers sont découpés en lots envoyés en parallèle sur un pool de
+    threads, au plus debit appels par seconde au total. Chaque lot est
+    réessayé avec un délai exponentiel ; un lot qui échoue encore est coupé en
+    deux et chaque moitié est relancée, si bien qu'un symbole défaillant ne
+    fait perdre que lui-même. Chaque lot terminé est fusionné dans le stock de
+    prix (si dossier_stock est fourni) sans attendre les autres.
+
+    Args:
+        tickers (list): Tickers à télécharger
+        date_debut (str ou datetime): Date de début (incluse)
+        date_fin (str ou datetime): Date de fin (exclue)
+        source (callable): Fonction (tickers, date_debut, date_fin) -> DataFrame des prix, comme telecharger_yahoo
+        taille_lot (int): Nombre de tickers par appel à la source
+        nb_threads (int): Nombre d'appels simultanés
+        debit (float, optional): Nombre maximal d'appels par seconde, tous threads confondus
+        tentatives (int): Nombre d'essais par lot avant de le découper
+        delai_initial (float): Délai avant le deuxième essai, doublé ensuite, en secondes
+        delai_max (float): Délai maximal entre deux essais, en secondes
+        dossier_stock (str, optional): Stock de prix où fusionner les lots terminés
+
+    Returns:
+        tuple: (DataFrame des prix téléchargés, dict des tickers en échec avec la raison)
+    """
+    tickers = list(dict.fromkeys(tickers))
+    limiteur = LimiteurDebit(debit)
+    stock = StockPrix(dossier_stock) if dossier_stock is not None else None
+    morceaux, echecs = [], {}
+    en_attente, nb_fusionnes = [], 0
+
+    def fusionner_en_attente():
+        nonlocal en_attente, nb_fusionnes
+        if stock is None or not en_attente:
+            return
+        stock.fusionner(pd.concat(en_attente, axis=1).sort_index())
+        nb_fusionnes += sum(m.shape[1] for m in en_attente)
+        en_attente = []
+
+    print(f"Téléchargement de {len(tickers)} tickers par lots de {taille_lot} ({nb_threads} en parallèle)...")
+    with ThreadPoolExecutor(max_workers=nb_threads) as pool:
+        def soumettre(lot):
+            return pool.submit(_telecharger_lot, source, lot, date_debut, date_fin, limiteur, tentatives,
+                               delai_initial, delai_max)
+
+        en_cours = {soumettre(lot): lot for lot in _decouper(tickers, taille_lot)}
+        while en_cours:
+            termines, _ = wait(en_cours, return_when=FIRST_COMPLETED)
+            for tache in termines:
+                lot = en_cours.pop(tache)
+                try:
+                    morceau = tache.result()
+                except Exception as erreur:
+                    if len(lot) > 1:
+                        # Découpage du lot pour isoler le ou les tickers défaillants
+                        milieu = len(lot) // 2
+                        for moitie in (lot[:milieu], lot[milieu:]):
+                            en_cours[soumettre(moitie)] = moitie
+                    else:
+                        echecs[lot[0]] = str(erreur)
+                    continue
+
+                if morceau is None:
+                    morceau = pd.DataFrame()
+                elif isinstance(morceau, pd.Series):
+                    morceau = morceau.to_frame(lot[0])
+                morceau = morceau.reindex(columns=lot)
+                morceau = morceau.loc[:, morceau.notna().any().to_numpy()]
+                for ticker in lot:
+                    if ticker not in morceau.columns:
+                        echecs[ticker] = "absent de la réponse"
+                if morceau.empty:
+                    continue
+                morceau.index = pd.DatetimeIndex(morceau.index, name="Date")
+                morceaux.append(morceau)
+                en_attente.append(morceau)
+                if sum(m.shape[1] for m in en_attente) >= nb_fusionnes:
+                    fusionner_en_attente()
+                print(f"Lot de {len(lot)} tickers terminé ({sum(m.shape[1] for m in morceaux)}/{len(tickers)})")
+
+    fusionner_en_attente()
+    if echecs:
+        print(f"{len(echecs)} tickers en échec : {', '.join(sorted(echecs)[:20])}{' ...' if len(echecs) > 20 else ''}")
+    data = pd.concat(morceaux, axis=1).sort_index() if morceaux else pd.DataFrame()
+    data.index.name = "Date"
+    return data.reindex(columns=[t for t in tickers if t in data.columns]), echecs
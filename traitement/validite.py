@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+
+# Tables par valeur d'octet : nombre de bits à 1, position du premier et du dernier bit à 1
+# (le bit de poids fort correspond à la date la plus ancienne), pour exploiter le bitmap sans le décompresser
+_BITS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1)
+_BITS_PAR_OCTET = _BITS.sum(axis=1)
+_PREMIER_BIT = _BITS.argmax(axis=1)
+_DERNIER_BIT = 7 - _BITS[:, ::-1].argmax(axis=1)
+
+class MasqueValidite:
+    """
+    Bitmap des valeurs présentes d'un panel (dates × tickers), un bit par valeur.
+
+    Le masque est compressé colonne par colonne le long des dates (np.packbits),
+    soit 8 fois moins de mémoire qu'un masque booléen. Les fonctions de calcul
+    en décompressent un bloc de colonnes à la fois (bloc) pour ignorer les
+    valeurs manquantes paire par paire ; l'effectif et la fenêtre de cotation
+    (premières et dernières dates présentes) de chaque ticker sont calculés une
+    fois à la construction.
+
+    Args:
+        bits (numpy.ndarray): Bitmap compressé (ceil(dates / 8) × tickers, uint8)
+        index (pandas.Index): Dates du panel
+        colonnes (pandas.Index): Tickers du panel
+    """
+
+    def __init__(self, bits, index, colonnes):
+        self.bits = bits
+        self.index = index
+        self.colonnes = colonnes
+        self.effectifs = _BITS_PAR_OCTET[bits].sum(axis=0)
+
+        # Fenêtre de cotation : premier et dernier bit à 1 de chaque colonne
+        self.premieres = np.full(len(colonnes), -1)
+        self.dernieres = np.full(len(colonnes), -1)
+        colonnes_non_vides = np.flatnonzero(self.effectifs)
+        if len(colonnes_non_vides):
+            octets = bits[:, colonnes_non_vides]
+            premier_octet = (octets != 0).argmax(axis=0)
+            dernier_octet = len(octets) - 1 - (octets[::-1] != 0).argmax(axis=0)
+            lignes = np.arange(len(colonnes_non_vides))
+            self.premieres[colonnes_non_vides] = premier_octet * 8 + _PREMIER_BIT[octets[premier_octet, lignes]]
+            self.dernieres[colonnes_non_vides] = dernier_octet * 8 + _DERNIER_BIT[octets[dernier_octet, lignes]]
+
+    @classmethod
+    def depuis(cls, df, taille_bloc=1024):
+        """
+        Construit le bitmap des valeurs non manquantes d'un DataFrame, bloc de colonnes par bloc.
+
+        Args:
+            df (pandas.DataFrame): Panel de prix ou de rendements
+            taille_bloc (int): Nombre de colonnes traitées à la fois
+
+        Returns:
+            MasqueValidite: Bitmap du panel
+        """
+        nb = df.shape[1]
+        bits = np.empty(((len(df) + 7) // 8, nb), dtype=np.uint8)
+        for debut in range(0, nb, taille_bloc):
+            fin = min(debut + taille_bloc, nb)
+            bits[:, debut:fin] = np.packbits(df.iloc[:, debut:fin].notna().to_numpy(), axis=0)
+        return cls(bits, df.index, df.columns)
+
+    @property
+    def complet(self):
+        """Indique si aucune valeur ne manque"""
+        return bool((self.effectifs == len(self.index)).all())
+
+    def bloc(self, debut, fin):
+        """
+        Masque booléen décompressé des colonnes [debut, fin).
+
+        Returns:
+            numpy.ndarray: Masque (dates × (fin - debut)), True pour les valeurs présentes
+        """
+        return self.extraire(slice(debut, fin))
+
+    def extraire(self, positions):
+        """
+        Masque booléen décompressé des colonnes demandées.
+
+        Args:
+            positions (slice ou numpy.ndarray): Positions des colonnes
+
+        Returns:
+            numpy.ndarray: Masque (dates × colonnes), True pour les valeurs présentes
+        """
+        return np.unpackbits(self.bits[:, positions], axis=0, count=len(self.index)).astype(bool)
+
+    def fenetres(self):
+        """
+        Fenêtre de cotation de chaque ticker.
+
+        Returns:
+            pandas.DataFrame: Première et dernière date présentes et nombre de valeurs, par ticker
+        """
+        def dates(positions):
+            valeurs = self.index[np.maximum(positions, 0)]
+            return pd.Series(valeurs, index=self.colonnes).where(positions >= 0)
+
+        return pd.DataFrame({
+            "Première Date": dates(self.premieres),
+            "Dernière Date": dates(self.dernieres),
+            "Observations": self.effectifs,
+        }, index=self.colonnes)
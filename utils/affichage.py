@@ -1,7 +1,10 @@
+import os
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+from visualisation.rendu import parametres_heatmap
+from traitement.matrice_correlation import ordonner_matrice_correlation, agreger_par_blocs
+from utils.instrumentation import instrumenter
 
+@instrumenter
 def afficher_statistiques(stats):
     """
     Affiche les statistiques principales dans la console.
@@ -47,21 +50,39 @@ def afficher_statistiques(stats):
     print("\n" + "="*50)
 
 # utils/affichage.py
-import matplotlib.pyplot as plt
-import seaborn as sns
-import os
+# matplotlib et seaborn ne sont importés que dans les fonctions de tracé, pour que
+# l'affichage des statistiques en console ne charge pas les bibliothèques graphiques
 
-def afficher_matrice_correlation(correlation_matrix, save_path=None):
+@instrumenter
+def afficher_matrice_correlation(correlation_matrix, save_path=None, ordre=None, seuil_groupee=50):
     """
-    Affiche et sauvegarde la matrice de corrélation sous forme de heatmap.
+    Sauvegarde la matrice de corrélation sous forme de heatmap.
+
+    Le rendu est non interactif : aucune fenêtre n'est ouverte. Les annotations,
+    la rastérisation et la résolution sont adaptées à la taille de la matrice.
+    Au-delà de seuil_groupee titres, la vue groupée par classification est utilisée.
 
     Args:
         correlation_matrix (pandas.DataFrame): Matrice de corrélation
         save_path (str, optional): Chemin du fichier pour sauvegarder l’image (PNG/PDF)
+        ordre (pandas.DataFrame, optional): Ordre déjà calculé par ordonner_matrice_correlation
+        seuil_groupee (int): Nombre de titres à partir duquel la vue groupée est utilisée
     """
+    if len(correlation_matrix) > seuil_groupee:
+        return afficher_matrice_correlation_groupee(correlation_matrix, save_path=save_path, ordre=ordre)
+    if ordre is not None:
+        correlation_matrix = correlation_matrix.loc[ordre.index, ordre.index]
+    
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    
+    parametres = parametres_heatmap(len(correlation_matrix))
+    
     plt.figure(figsize=(12, 10))  # Augmenter la taille de la figure
-    sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', fmt='.2f', cbar=True, 
-                linewidths=0.5, annot_kws={"size": 8})  # Réduire la taille des nombres
+    ax = sns.heatmap(correlation_matrix, annot=parametres["annot"], cmap='coolwarm', fmt='.2f', cbar=True, 
+                     linewidths=parametres["linewidths"], annot_kws={"size": 8})  # Réduire la taille des nombres
+    if parametres["rasterized"]:
+        ax.collections[0].set_rasterized(True)
     plt.xticks(rotation=45, ha='right', fontsize=9)  # Incliner les étiquettes pour éviter les chevauchements
     plt.yticks(fontsize=9)
     plt.title('Matrice de Corrélation des Rendements', fontsize=14)
@@ -69,7 +90,61 @@ def afficher_matrice_correlation(correlation_matrix, save_path=None):
     # Sauvegarder l'image si un chemin est spécifié
     if save_path:
         os.makedirs(os.path.dirname(save_path), exist_ok=True)
-        plt.savefig(save_path, bbox_inches='tight', dpi=300)  # Sauvegarde en haute qualité
+        plt.savefig(save_path, bbox_inches='tight', dpi=parametres["dpi"])
         print(f"Matrice de corrélation sauvegardée sous {save_path}")
 
-    plt.show()
\ No newline at end of file
+    plt.close()
+
+@instrumenter
+def afficher_matrice_correlation_groupee(correlation_matrix, save_path=None, ordre=None, seuil_blocs=200, nb_blocs=50):
+    """
+    Sauvegarde une vue de la matrice de corrélation adaptée aux grands univers.
+
+    Les titres sont réordonnés par classification hiérarchique ; au-delà de
+    seuil_blocs titres, la matrice est agrégée en nb_blocs groupes (corrélation
+    moyenne entre groupes). Le tracé passe par imshow sur un tableau
+    précalculé, sans texte par cellule.
+
+    Args:
+        correlation_matrix (pandas.DataFrame): Matrice de corrélation
+        save_path (str, optional): Chemin du fichier pour sauvegarder l’image (PNG/PDF)
+        ordre (pandas.DataFrame, optional): Ordre déjà calculé par ordonner_matrice_correlation
+        seuil_blocs (int): Nombre de titres à partir duquel la matrice est agrégée en blocs
+        nb_blocs (int): Nombre de groupes de la vue agrégée
+    """
+    nb_titres = len(correlation_matrix)
+    agreger = nb_titres > seuil_blocs
+    if ordre is None or (agreger and ordre["Groupe"].nunique() > nb_blocs):
+        ordre = ordonner_matrice_correlation(correlation_matrix, nb_clusters=nb_blocs if agreger else None)
+    
+    if agreger:
+        matrice = agreger_par_blocs(correlation_matrix, ordre)
+        titre = f'Matrice de Corrélation des Rendements ({nb_titres} titres, {len(matrice)} groupes)'
+    else:
+        matrice = correlation_matrix.loc[ordre.index, ordre.index]
+        titre = f'Matrice de Corrélation des Rendements ({nb_titres} titres, ordonnés par groupe)'
+    import matplotlib.pyplot as plt
+    
+    parametres = parametres_heatmap(len(matrice))
+    
+    fig, ax = plt.subplots(figsize=(12, 10))
+    image = ax.imshow(matrice.to_numpy(dtype=float), cmap='coolwarm', vmin=-1, vmax=1, interpolation='nearest')
+    fig.colorbar(image, ax=ax)
+    
+    # Étiquettes seulement si elles restent lisibles
+    if len(matrice) <= 60:
+        ax.set_xticks(range(len(matrice)))
+        ax.set_xticklabels(matrice.columns, rotation=90, fontsize=6)
+        ax.set_yticks(range(len(matrice)))
+        ax.set_yticklabels(matrice.index, fontsize=6)
+    else:
+        ax.set_xticks([])
+        ax.set_yticks([])
+    ax.set_title(titre, fontsize=14)
+    
+    if save_path:
+        os.makedirs(os.path.dirname(save_path), exist_ok=True)
+        fig.savefig(save_path, bbox_inches='tight', dpi=parametres["dpi"])
+        print(f"Matrice de corrélation sauvegardée sous {save_path}")
+    
+    plt.close(fig)
@@ -1,36 +1,236 @@
 import pandas as pd
 import os
+import math
+import time
+import importlib.util
+from utils.instrumentation import instrumenter
 
-def exporter_statistiques_excel(stats, fichier_sortie):
+# Moteur xlsx en écriture continue (mémoire constante), si disponible
+MOTEUR_EXCEL = "xlsxwriter" if importlib.util.find_spec("xlsxwriter") else None
+
+# Bibliothèque Parquet, si disponible (sinon repli sur CSV)
+PARQUET_DISPONIBLE = bool(importlib.util.find_spec("pyarrow") or importlib.util.find_spec("fastparquet"))
+
+class JournalExport:
+    """
+    Journal des artefacts écrits au cours d'une exécution : format, chemin, durée d'écriture et taille.
+    """
+
+    def __init__(self):
+        self.entrees = []
+
+    def enregistrer(self, artefact, chemin, duree):
+        taille = os.path.getsize(chemin) if os.path.exists(chemin) else 0
+        self.entrees.append({
+            "Artefact": artefact,
+            "Format": os.path.splitext(chemin)[1].lstrip("."),
+            "Chemin": chemin,
+            "Durée (s)": round(duree, 4),
+            "Taille (Ko)": round(taille / 1024, 1),
+        })
+
+    def to_frame(self):
+        return pd.DataFrame(self.entrees)
+
+    def afficher(self):
+        if self.entrees:
+            print("\nTemps d'écriture par artefact :")
+            print(self.to_frame().to_string(index=False))
+
+def _creer_dossier(fichier_sortie):
+    """Crée le dossier de sortie s'il n'existe pas"""
+    dossier_sortie = os.path.dirname(fichier_sortie)
+    if dossier_sortie and not os.path.exists(dossier_sortie):
+        os.makedirs(dossier_sortie)
+
+def ouvrir_classeur(fichier_sortie):
+    """
+    Ouvre un classeur Excel en écriture, en mode mémoire constante si xlsxwriter est installé.
+    
+    En mode mémoire constante, chaque ligne est écrite sur disque dès qu'elle
+    est complète : les feuilles doivent donc être écrites ligne par ligne,
+    avec ecrire_feuille.
+    
+    Args:
+        fichier_sortie (str): Chemin du fichier Excel de sortie
+    
+    Returns:
+        pandas.ExcelWriter: Classeur à utiliser dans un bloc with
+    """
+    _creer_dossier(fichier_sortie)
+    if MOTEUR_EXCEL == "xlsxwriter":
+        return pd.ExcelWriter(fichier_sortie, engine="xlsxwriter", engine_kwargs={"options": {"constant_memory": True}})
+    return pd.ExcelWriter(fichier_sortie)
+
+def ecrire_feuille(writer, df, nom_feuille):
+    """
+    Écrit un DataFrame dans une feuille du classeur, ligne par ligne.
+    
+    DataFrame.to_excel écrit les cellules colonne par colonne, ce qui est
+    incompatible avec le mode mémoire constante de xlsxwriter (seule la dernière
+    ligne ouverte peut recevoir des cellules) ; les lignes sont donc écrites ici
+    dans l'ordre. Avec un autre moteur, DataFrame.to_excel est utilisé.
+    
+    Args:
+        writer (pandas.ExcelWriter): Classeur ouvert par ouvrir_classeur
+        df (pandas.DataFrame): Tableau à écrire (index en première colonne)
+        nom_feuille (str): Nom de la feuille
+    """
+    if writer.engine != "xlsxwriter":
+        df.to_excel(writer, sheet_name=nom_feuille)
+        return
+    
+    feuille = writer.book.add_worksheet(nom_feuille)
+    format_date = writer.book.add_format({"num_format": "yyyy-mm-dd"})
+    feuille.write_row(0, 0, [df.index.name or ""] + [str(c) for c in df.columns])
+    
+    # Valeurs converties en scalaires Python, cellules vides pour les valeurs manquantes ou infinies
+    colonnes = [[None if isinstance(v, float) and not math.isfinite(v) else v for v in df[c].tolist()] for c in df.columns]
+    dates = isinstance(df.index, pd.DatetimeIndex)
+    for i, (etiquette, *ligne) in enumerate(zip(df.index, *colonnes), start=1):
+        if dates:
+            feuille.write_datetime(i, 0, etiquette.to_pydatetime(), format_date)
+        else:
+            feuille.write(i, 0, etiquette)
+        feuille.write_row(i, 1, ligne)
+
+def exporter_tableau_excel(df, fichier_sortie, nom_feuille="Sheet1", journal=None):
+    """
+    Exporte un tableau seul dans un classeur Excel d'une feuille.
+
+    Args:
+        df (pandas.DataFrame): Tableau à exporter (index en première colonne)
+        fichier_sortie (str): Chemin du fichier Excel de sortie
+        nom_feuille (str): Nom de la feuille
+        journal (JournalExport, optional): Journal où enregistrer la durée d'écriture
+    """
+    debut = time.perf_counter()
+    with ouvrir_classeur(fichier_sortie) as writer:
+        ecrire_feuille(writer, df, nom_feuille)
+    if journal is not None:
+        journal.enregistrer(os.path.splitext(os.path.basename(fichier_sortie))[0], fichier_sortie, time.perf_counter() - debut)
+
+@instrumenter
+def exporter_panel(panel, fichier_sortie, journal=None):
+    """
+    Exporte une série complète (dates × tickers) en Parquet, sans échantillonnage.
+    
+    Sans bibliothèque Parquet, le panel est écrit en CSV à la place.
+    
+    Args:
+        panel (pandas.DataFrame): Panel à exporter
+        fichier_sortie (str): Chemin du fichier .parquet de sortie
+        journal (JournalExport, optional): Journal où enregistrer la durée d'écriture
+    
+    Returns:
+        str: Chemin du fichier effectivement écrit
+    """
+    _creer_dossier(fichier_sortie)
+    debut = time.perf_counter()
+    if PARQUET_DISPONIBLE:
+        panel.to_parquet(fichier_sortie)
+    else:
+        fichier_sortie = os.path.splitext(fichier_sortie)[0] + ".csv"
+        panel.to_csv(fichier_sortie)
+    if journal is not None:
+        journal.enregistrer(os.path.splitext(os.path.basename(fichier_sortie))[0], fichier_sortie, time.perf_counter() - debut)
+    return fichier_sortie
+
+@instrumenter
+def exporter_statistiques_excel(stats, fichier_sortie, journal=None):
     """
     Exporte toutes les statistiques dans un fichier Excel avec plusieurs feuilles.
     
+    Les tableaux de synthèse vont dans le classeur Excel ; les prix et rendements
+    complets sont écrits à côté en Parquet (prix.parquet, rendements.parquet).
+    
     Args:
         stats (dict): Dictionnaire contenant les différentes statistiques
         fichier_sortie (str): Chemin du fichier Excel de sortie
+        journal (JournalExport, optional): Journal où enregistrer les durées d'écriture
     """
-    # Créer le dossier de sortie s'il n'existe pas
-    dossier_sortie = os.path.dirname(fichier_sortie)
-    if dossier_sortie and not os.path.exists(dossier_sortie):
-        os.makedirs(dossier_sortie)
-        
+    debut = time.perf_counter()
+    
     # Exportation en Excel avec plusieurs feuilles
-    with pd.ExcelWriter(fichier_sortie) as writer:
+    with ouvrir_classeur(fichier_sortie) as writer:
         # Feuille 1: Statistiques globales
-        stats["stats_globales"].to_excel(writer, sheet_name="Stats Globales")
+        ecrire_feuille(writer, stats["stats_globales"], "Stats Globales")
         
         # Feuille 2: Performances annuelles
-        stats["perf_annuelle"].to_excel(writer, sheet_name="Performances Annuelles")
+        ecrire_feuille(writer, stats["perf_annuelle"], "Performances Annuelles")
         
         # Feuille 3: Performances annuelles relatives
-        stats["perf_annuelle_relative"].to_excel(writer, sheet_name="Perf Annuelles Relatives")
+        if stats["perf_annuelle_relative"] is not None:
+            ecrire_feuille(writer, stats["perf_annuelle_relative"], "Perf Annuelles Relatives")
         
-        # Feuille 4: Données de prix (limité aux 100 premières et 100 dernières lignes pour éviter les fichiers trop volumineux)
-        prix = stats["prix"]
-        if len(prix) > 200:
-            prix_sample = pd.concat([prix.head(100), prix.tail(100)])
-            prix_sample.to_excel(writer, sheet_name="Prix Ajustés (échantillon)")
-        else:
-            prix.to_excel(writer, sheet_name="Prix Ajustés")
+        # Feuilles 4 à 7: Performances trimestrielles et mensuelles, et relatives
+        for cle, feuille in (("perf_trimestrielle", "Performances Trimestrielles"),
+                             ("perf_trimestrielle_relative", "Perf Trimestrielles Relatives"),
+                             ("perf_mensuelle", "Performances Mensuelles"),
+                             ("perf_mensuelle_relative", "Perf Mensuelles Relatives")):
+            if stats.get(cle) is not None:
+                ecrire_feuille(writer, stats[cle], feuille)
     
+    if journal is not None:
+        journal.enregistrer("statistiques", fichier_sortie, time.perf_counter() - debut)
     print(f"Statistiques exportées dans {fichier_sortie}")
+    
+    # Séries complètes en Parquet, sans échantillonnage
+    dossier_sortie = os.path.dirname(fichier_sortie)
+    for nom in ("prix", "rendements"):
+        if nom in stats:
+            chemin = exporter_panel(stats[nom], os.path.join(dossier_sortie, f"{nom}.parquet"), journal=journal)
+            print(f"Série complète '{nom}' exportée dans {chemin}")
+
+@instrumenter
+def exporter_statistiques_glissantes_excel(resultats, fichier_sortie, journal=None):
+    """
+    Exporte les bêtas et corrélations glissants dans un fichier Excel, une feuille par fenêtre et par mesure.
+    
+    Args:
+        resultats (dict): Résultat de calculer_statistiques_glissantes
+        fichier_sortie (str): Chemin du fichier Excel de sortie
+        journal (JournalExport, optional): Journal où enregistrer la durée d'écriture
+    """
+    debut = time.perf_counter()
+    with ouvrir_classeur(fichier_sortie) as writer:
+        for fenetre, panels in resultats.items():
+            suffixe = f"{fenetre}j" if fenetre != "expansive" else "expansive"
+            ecrire_feuille(writer, panels["beta"], f"Beta {suffixe}")
+            ecrire_feuille(writer, panels["correlation"], f"Correlation {suffixe}")
+    
+    if journal is not None:
+        journal.enregistrer("statistiques_glissantes", fichier_sortie, time.perf_counter() - debut)
+    print(f"Statistiques glissantes exportées dans {fichier_sortie}")
+
+def exporter_ordre_correlation(ordre, fichier_sortie):
+    """
+    Exporte l'ordre des titres et leurs groupes issus de ordonner_matrice_correlation.
+    
+    Le fichier CSV peut être relu avec pd.read_csv(fichier, index_col=0) puis
+    passé à afficher_matrice_correlation pour réutiliser l'ordre sans recalcul.
+    
+    Args:
+        ordre (pandas.DataFrame): Ordre et groupes des titres
+        fichier_sortie (str): Chemin du fichier CSV de sortie
+    """
+    _creer_dossier(fichier_sortie)
+    ordre.to_csv(fichier_sortie)
+    print(f"Ordre de la matrice de corrélation exporté dans {fichier_sortie}")
+
+@instrumenter
+def exporter_statistiques_glissantes_parquet(resultats, dossier_sortie, journal=None):
+    """
+    Exporte chaque panel de bêtas et corrélations glissants dans son propre fichier Parquet.
+    
+    Args:
+        resultats (dict): Résultat de calculer_statistiques_glissantes
+        dossier_sortie (str): Dossier de sortie (beta_60j.parquet, correlation_60j.parquet, ...)
+        journal (JournalExport, optional): Journal où enregistrer les durées d'écriture
+    """
+    for fenetre, panels in resultats.items():
+        suffixe = f"{fenetre}j" if fenetre != "expansive" else "expansive"
+        for nom, panel in panels.items():
+            exporter_panel(panel, os.path.join(dossier_sortie, f"{nom}_{suffixe}.parquet"), journal=journal)
+    
+    print(f"Statistiques glissantes exportées dans {dossier_sortie}")
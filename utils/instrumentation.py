@@ -0,0 +1,152 @@
+import os
+import sys
+import json
+import time
+import cProfile
+import functools
+import threading
+import tracemalloc
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Configuration : activée par activer_instrumentation() ou par la variable d'environnement INSTRUMENTATION=1
+_CONFIG = {
+    "actif": os.environ.get("INSTRUMENTATION", "") not in ("", "0"),
+    "memoire": os.environ.get("INSTRUMENTATION_MEMOIRE", "") not in ("", "0"),
+    "profil": os.environ.get("INSTRUMENTATION_PROFIL") or None,
+    "dossier_profil": "resultats",
+}
+_MESURES = []
+_VERROU = threading.Lock()
+
+# INSTRUMENTATION_MEMOIRE=1 : le suivi des allocations démarre dès l'import, comme avec activer_instrumentation(memoire=True)
+if _CONFIG["memoire"] and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+def activer_instrumentation(actif=True, memoire=False, profil=None, dossier_profil="resultats"):
+    """
+    Active ou désactive la mesure des étapes instrumentées.
+
+    Args:
+        actif (bool): Enregistre une mesure à chaque appel d'une étape instrumentée
+        memoire (bool): Suit aussi le pic d'allocation Python avec tracemalloc (ralentit l'exécution)
+        profil (str, optional): Nom de l'étape à profiler avec cProfile
+        dossier_profil (str): Dossier où écrire le fichier profil_<étape>.prof
+    """
+    _CONFIG.update(actif=actif, memoire=memoire, profil=profil, dossier_profil=dossier_profil)
+    if memoire and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+def instrumentation_active():
+    """Indique si les étapes instrumentées enregistrent des mesures"""
+    return _CONFIG["actif"]
+
+def _rss_max_mo():
+    """Pic de mémoire résidente du processus depuis son démarrage, en Mo"""
+    if resource is None:
+        return None
+    pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Octets sous macOS, kilo-octets sous Linux
+    return round(pic / 1024 ** 2 if sys.platform == "darwin" else pic / 1024, 1)
+
+def _forme_entree(args):
+    """Dimensions (dates × tickers) du premier argument contenant des prix ou des rendements"""
+    for arg in args:
+        donnees = getattr(arg, "prix", arg)
+        if isinstance(donnees, (pd.DataFrame, pd.Series)):
+            return donnees.shape if donnees.ndim == 2 else (donnees.shape[0], 1)
+    return None
+
+def instrumenter(fonction):
+    """
+    Décorateur d'étape : mesure la durée, le temps CPU, la mémoire et la taille des données d'entrée.
+
+    Sans instrumentation active, l'appel est transmis directement à la fonction.
+    Le temps CPU est celui du processus (tous threads confondus) et le pic RSS
+    celui du processus depuis son démarrage : pour des étapes exécutées en
+    parallèle, seule la durée est propre à chaque étape.
+    """
+    nom = fonction.__name__
+
+    @functools.wraps(fonction)
+    def enveloppe(*args, **kwargs):
+        if not _CONFIG["actif"]:
+            return fonction(*args, **kwargs)
+
+        memoire = _CONFIG["memoire"] and tracemalloc.is_tracing()
+        if memoire:
+            tracemalloc.reset_peak()
+        profileur = cProfile.Profile() if _CONFIG["profil"] == nom else None
+
+        debut, debut_cpu = time.perf_counter(), time.process_time()
+        if profileur is not None:
+            profileur.enable()
+        try:
+            return fonction(*args, **kwargs)
+        finally:
+            if profileur is not None:
+                profileur.disable()
+                os.makedirs(_CONFIG["dossier_profil"], exist_ok=True)
+                profileur.dump_stats(os.path.join(_CONFIG["dossier_profil"], f"profil_{nom}.prof"))
+            forme = _forme_entree(args)
+            mesure = {
+                "etape": nom,
+                "module": fonction.__module__,
+                "debut": time.time(),
+                "duree_s": round(time.perf_counter() - debut, 4),
+                "cpu_s": round(time.process_time() - debut_cpu, 4),
+                "rss_max_mo": _rss_max_mo(),
+                "pic_python_mo": round(tracemalloc.get_traced_memory()[1] / 1024 ** 2, 2) if memoire else None,
+                "dates": forme[0] if forme else None,
+                "tickers": forme[1] if forme else None,
+                "thread": threading.current_thread().name,
+            }
+            with _VERROU:
+                _MESURES.append(mesure)
+
+    return enveloppe
+
+def mesures():
+    """
+    Mesures enregistrées depuis le début de l'exécution (ou la dernière réinitialisation).
+
+    Returns:
+        pandas.DataFrame: Une ligne par appel d'étape instrumentée
+    """
+    with _VERROU:
+        return pd.DataFrame(list(_MESURES))
+
+def reinitialiser_mesures():
+    """Efface les mesures enregistrées"""
+    with _VERROU:
+        _MESURES.clear()
+
+def exporter_rapport(dossier="resultats", nom="instrumentation"):
+    """
+    Écrit le rapport des mesures en JSON et en CSV.
+
+    Args:
+        dossier (str): Dossier de sortie
+        nom (str): Nom des fichiers, sans extension
+
+    Returns:
+        pandas.DataFrame: Les mesures exportées
+    """
+    with _VERROU:
+        enregistrements = list(_MESURES)
+    df = pd.DataFrame(enregistrements)
+    os.makedirs(dossier, exist_ok=True)
+    with open(os.path.join(dossier, f"{nom}.json"), "w", encoding="utf-8") as f:
+        json.dump({"config": {k: v for k, v in _CONFIG.items() if k != "dossier_profil"},
+                   "mesures": enregistrements}, f, indent=2, ensure_ascii=False, default=str)
+    df.to_csv(os.path.join(dossier, f"{nom}.csv"), index=False)
+
+    if not df.empty:
+        print("\nTemps par étape :")
+        print(df[["etape", "duree_s", "cpu_s", "rss_max_mo", "dates", "tickers"]].to_string(index=False))
+    print(f"Rapport d'instrumentation enregistré dans {os.path.join(dossier, nom)}.json / .csv")
+    return df
@@ -0,0 +1,326 @@
+import os
+import sys
+import site
+import time
+import uuid
+import pickle
+import hashlib
+import inspect
+import sysconfig
+import functools
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+
+def empreinte(valeur):
+    """
+    Empreinte SHA-256 d'une valeur d'entrée ou d'un paramètre d'étape.
+
+    Les DataFrame et Series sont hachés par leur contenu (valeurs, index et
+    colonnes) sans passer par pickle, les tableaux NumPy par leurs octets ;
+    les autres valeurs par leur représentation pickle.
+
+    Args:
+        valeur: Valeur à hacher
+
+    Returns:
+        str: Empreinte hexadécimale
+    """
+    h = hashlib.sha256()
+    if isinstance(valeur, (pd.DataFrame, pd.Series)):
+        h.update(type(valeur).__name__.encode())
+        h.update(pd.util.hash_pandas_object(valeur, index=True).to_numpy().tobytes())
+        if isinstance(valeur, pd.DataFrame):
+            h.update(repr(list(valeur.columns)).encode())
+            h.update(repr(list(valeur.dtypes.astype(str))).encode())
+        else:
+            h.update(repr((valeur.name, str(valeur.dtype))).encode())
+    elif isinstance(valeur, np.ndarray):
+        h.update(repr((valeur.shape, str(valeur.dtype))).encode())
+        h.update(np.ascontiguousarray(valeur).tobytes())
+    elif isinstance(valeur, dict):
+        for cle in sorted(valeur, key=repr):
+            h.update(repr(cle).encode())
+            h.update(empreinte(valeur[cle]).encode())
+    else:
+        h.update(pickle.dumps(valeur, protocol=pickle.HIGHEST_PROTOCOL))
+    return h.hexdigest()
+
+# Dossiers de la bibliothèque standard et des paquets installés : leurs modules ne font pas partie du projet
+_DOSSIERS_EXTERNES = tuple(sorted({os.path.realpath(d) for d in (
+    [sysconfig.get_paths()[cle] for cle in ("stdlib", "platstdlib", "purelib", "platlib")]
+    + site.getsitepackages() + [site.getusersitepackages()])}))
+
+def _fichier_projet(module):
+    """Fichier source d'un module du projet (None pour la bibliothèque standard et les paquets installés)"""
+    fichier = getattr(module, "__file__", None)
+    if not fichier or not fichier.endswith(".py"):
+        return None
+    fichier = os.path.realpath(fichier)
+    if any(fichier.startswith(dossier + os.sep) for dossier in _DOSSIERS_EXTERNES):
+        return None
+    if {"site-packages", "dist-packages"} & set(fichier.split(os.sep)):
+        return None
+    return fichier
+
+def _fichiers_importes(module):
+    """
+    Fichiers source du module et des modules du projet qu'il importe, récursivement.
+
+    Les imports sont relevés dans l'espace de noms du module : modules importés
+    (import x) et fonctions ou classes importées (from x import f).
+
+    Returns:
+        list: Chemins des fichiers, triés
+    """
+    fichiers, a_visiter, vus = set(), [module], set()
+    while a_visiter:
+        module = a_visiter.pop()
+        if module is None or module.__name__ in vus:
+            continue
+        vus.add(module.__name__)
+        fichier = _fichier_projet(module)
+        if fichier is None:
+            continue
+        fichiers.add(fichier)
+        for valeur in list(vars(module).values()):
+            if inspect.ismodule(valeur):
+                a_visiter.append(valeur)
+            elif isinstance(getattr(valeur, "__module__", None), str):
+                a_visiter.append(sys.modules.get(valeur.__module__))
+    return sorted(fichiers)
+
+def _empreinte_fonction(fonction):
+    """
+    Empreinte du code d'une étape : source de sa fonction, de son module et des
+    modules du projet importés par celui-ci, de proche en proche.
+
+    Modifier la fonction ou l'un des modules auxiliaires qu'elle utilise
+    (même indirectement) invalide donc son cache.
+    """
+    if isinstance(fonction, functools.partial):
+        fonction = fonction.func
+    fonction = inspect.unwrap(fonction)
+    h = hashlib.sha256()
+    try:
+        h.update(inspect.getsource(fonction).encode())
+    except (OSError, TypeError):
+        h.update(f"{fonction.__module__}.{fonction.__qualname__}".encode())
+    for fichier in _fichiers_importes(sys.modules.get(getattr(fonction, "__module__", None))):
+        with open(fichier, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+class CacheDisque:
+    """
+    Cache disque des résultats d'étapes, un fichier pickle par clé.
+
+    Chaque lecture rafraîchit la date de modification du fichier ; lorsque la
+    taille totale dépasse `taille_max`, les résultats les moins récemment
+    utilisés sont supprimés en premier.
+
+    Args:
+        dossier (str): Dossier du cache (créé à la première écriture)
+        taille_max (int): Taille maximale du cache en octets (1 Go par défaut)
+    """
+
+    def __init__(self, dossier="cache/pipeline", taille_max=1024 ** 3):
+        self.dossier = dossier
+        self.taille_max = taille_max
+
+    def _chemin(self, cle):
+        return os.path.join(self.dossier, f"{cle}.pkl")
+
+    def contient(self, cle):
+        return os.path.exists(self._chemin(cle))
+
+    def lire(self, cle):
+        """Charge le résultat associé à la clé et le marque comme récemment utilisé"""
+        chemin = self._chemin(cle)
+        with open(chemin, "rb") as f:
+            valeur = pickle.load(f)
+        os.utime(chemin)
+        return valeur
+
+    def ecrire(self, cle, valeur):
+        """Enregistre le résultat (écriture atomique) puis applique la limite de taille"""
+        os.makedirs(self.dossier, exist_ok=True)
+        chemin = self._chemin(cle)
+        temporaire = f"{chemin}.{uuid.uuid4().hex}.tmp"
+        with open(temporaire, "wb") as f:
+            pickle.dump(valeur, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporaire, chemin)
+        self.evincer(conserver=chemin)
+
+    def taille(self):
+        """Taille totale du cache en octets"""
+        if not os.path.isdir(self.dossier):
+            return 0
+        return sum(entree.stat().st_size for entree in os.scandir(self.dossier) if entree.name.endswith(".pkl"))
+
+    def evincer(self, conserver=None):
+        """
+        Supprime les résultats les moins récemment utilisés jusqu'à repasser sous la taille maximale.
+
+        Args:
+            conserver (str, optional): Fichier à ne jamais supprimer (celui qui vient d'être écrit)
+
+        Returns:
+            int: Nombre de fichiers supprimés
+        """
+        entrees = sorted((e for e in os.scandir(self.dossier) if e.name.endswith(".pkl")),
+                         key=lambda e: e.stat().st_mtime)
+        total = sum(e.stat().st_size for e in entrees)
+        supprimes = 0
+        for entree in entrees:
+            if total <= self.taille_max:
+                break
+            if entree.path == conserver:
+                continue
+            total -= entree.stat().st_size
+            os.remove(entree.path)
+            supprimes += 1
+        return supprimes
+
+    def vider(self):
+        """Supprime tous les résultats du cache"""
+        if os.path.isdir(self.dossier):
+            for entree in os.scandir(self.dossier):
+                if entree.name.endswith(".pkl"):
+                    os.remove(entree.path)
+
+class Etape:
+    """
+    Étape du pipeline : une fonction, les étapes (ou entrées) dont elle dépend et ses paramètres.
+
+    Les résultats des dépendances sont passés en arguments positionnels, dans
+    l'ordre de `dependances`, et les paramètres en arguments nommés.
+
+    Args:
+        nom (str): Nom de l'étape
+        fonction (callable): Fonction exécutée
+        dependances (list): Noms des étapes ou entrées dont les résultats sont passés à la fonction
+        parametres (dict, optional): Arguments nommés, inclus dans la clé de cache
+        fichiers (list, optional): Fichiers écrits par l'étape ; le cache n'est valide que s'ils existent
+        cache (bool): Conserve le résultat sur disque (False pour les étapes peu coûteuses ou non sérialisables)
+    """
+
+    def __init__(self, nom, fonction, dependances=(), parametres=None, fichiers=(), cache=True):
+        self.nom = nom
+        self.fonction = fonction
+        self.dependances = list(dependances)
+        self.parametres = dict(parametres or {})
+        self.fichiers = list(fichiers)
+        self.cache = cache
+
+class Pipeline:
+    """
+    Graphe d'étapes avec mémorisation sur disque du résultat de chaque étape.
+
+    La clé d'une étape combine l'empreinte du code de sa fonction (et des
+    modules du projet qu'elle utilise), de ses paramètres et les clés de ses
+    dépendances ; les entrées sont hachées par
+    leur contenu. Une modification ne change donc que les clés des étapes
+    situées en aval, et seules celles-ci sont recalculées. Les étapes
+    indépendantes d'un même niveau du graphe s'exécutent en parallèle sur un
+    pool de threads (les calculs NumPy relâchent le GIL).
+
+    Les arguments fixés par functools.partial ne participent pas à la clé :
+    ils sont réservés aux objets sans effet sur le résultat (journal d'export...).
+
+    Args:
+        cache (CacheDisque, optional): Cache des résultats (aucune mémorisation si None)
+        nb_threads (int): Nombre d'étapes exécutées simultanément
+    """
+
+    def __init__(self, cache=None, nb_threads=4):
+        self.cache = cache
+        self.nb_threads = nb_threads
+        self.etapes = {}
+
+    def ajouter(self, nom, fonction, dependances=(), parametres=None, fichiers=(), cache=True):
+        """Ajoute une étape au pipeline ; ses dépendances doivent être des entrées ou des étapes déjà ajoutées"""
+        if nom in self.etapes:
+            raise ValueError(f"Étape déjà définie : {nom}")
+        self.etapes[nom] = Etape(nom, fonction, dependances, parametres, fichiers, cache)
+        return self
+
+    def _cles(self, entrees):
+        """Clé de chaque entrée et de chaque étape, dans l'ordre d'ajout (ordre topologique)"""
+        cles = {nom: empreinte(valeur) for nom, valeur in entrees.items()}
+        for nom, etape in self.etapes.items():
+            inconnues = [d for d in etape.dependances if d not in cles]
+            if inconnues:
+                raise KeyError(f"Dépendances inconnues pour l'étape {nom} : {inconnues}")
+            h = hashlib.sha256()
+            h.update(nom.encode())
+            h.update(_empreinte_fonction(etape.fonction).encode())
+            h.update(empreinte(etape.parametres).encode())
+            for dependance in etape.dependances:
+                h.update(cles[dependance].encode())
+            cles[nom] = h.hexdigest()
+        return cles
+
+    def _disponible(self, etape, cle):
+        return (etape.cache and self.cache is not None and self.cache.contient(cle)
+                and all(os.path.exists(f) for f in etape.fichiers))
+
+    def _executer_etape(self, etape, cle, valeurs):
+        debut = time.perf_counter()
+        resultat = etape.fonction(*(valeurs[d] for d in etape.dependances), **etape.parametres)
+        duree = time.perf_counter() - debut
+        if etape.cache and self.cache is not None:
+            self.cache.ecrire(cle, resultat)
+        print(f"[pipeline] {etape.nom} : calculée en {duree:.2f} s")
+        return resultat
+
+    def executer(self, entrees, cibles=None):
+        """
+        Exécute les étapes nécessaires pour obtenir les cibles.
+
+        Une étape dont le résultat est en cache est simplement relue ; ses
+        dépendances ne sont alors ni relues ni recalculées.
+
+        Args:
+            entrees (dict): Valeurs d'entrée du pipeline (nom → valeur)
+            cibles (list, optional): Étapes dont le résultat est demandé (toutes par défaut)
+
+        Returns:
+            dict: Résultat de chaque cible (nom → valeur)
+        """
+        cibles = list(self.etapes) if cibles is None else list(cibles)
+        cles = self._cles(entrees)
+        valeurs = dict(entrees)
+
+        # Étapes à recalculer : cibles absentes du cache, puis leurs dépendances absentes du cache
+        a_calculer, a_lire = set(), set()
+        a_visiter = list(cibles)
+        while a_visiter:
+            nom = a_visiter.pop()
+            if nom in entrees or nom in a_calculer or nom in a_lire:
+                continue
+            etape = self.etapes[nom]
+            if self._disponible(etape, cles[nom]):
+                a_lire.add(nom)
+            else:
+                a_calculer.add(nom)
+                a_visiter.extend(etape.dependances)
+
+        for nom in [nom for nom in self.etapes if nom in a_lire]:
+            valeurs[nom] = self.cache.lire(cles[nom])
+            print(f"[pipeline] {nom} : lue depuis le cache")
+
+        # Niveaux du graphe : une étape ne dépend que d'étapes de niveaux inférieurs
+        niveaux = {}
+        for nom, etape in self.etapes.items():
+            if nom in a_calculer:
+                niveaux[nom] = 1 + max((niveaux.get(d, -1) for d in etape.dependances), default=-1)
+
+        with ThreadPoolExecutor(max_workers=self.nb_threads) as pool:
+            for niveau in sorted(set(niveaux.values())):
+                noms = [nom for nom, n in niveaux.items() if n == niveau]
+                futures = {nom: pool.submit(self._executer_etape, self.etapes[nom], cles[nom], valeurs) for nom in noms}
+                for nom, future in futures.items():
+                    valeurs[nom] = future.result()
+
+        return {nom: valeurs[nom] for nom in cibles}
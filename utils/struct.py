@@ -13,8 +13,8 @@ def generer_structure_projet(chemin_racine="."):
             chemin_complet = os.path.join(chemin, nom)
             est_dernier = (i == len(contenu) - 1)
             
-            # Ignorer .DS_Store, .venv et __pycache__
-            if nom == ".DS_Store" or nom == ".venv" or nom == "__pycache__":
+            # Ignorer les fichiers et dossiers cachés (.DS_Store, .venv, .git, ...), __pycache__ et le cache du pipeline
+            if nom.startswith(".") or nom == "__pycache__" or nom == "cache":
                 continue
             
             if os.path.isdir(chemin_complet):
@@ -1,14 +1,17 @@
+from visualisation.rendu import FileRendu
 import matplotlib.pyplot as plt
 import seaborn as sns
 import pandas as pd
 import numpy as np
 import os
+from utils.instrumentation import instrumenter
 
 def creer_dossier_resultats():
     """Crée un dossier pour stocker les graphiques si nécessaire"""
     if not os.path.exists("resultats"):
         os.makedirs("resultats")
 
+@instrumenter
 def graphique_performance_cumulee(data, tickers_selection=None, fichier_sortie="resultats/performance_cumulee.png"):
     """
     Crée un graphique de performance cumulée (base 100) pour l'indice et une sélection de titres.
@@ -33,8 +36,8 @@ def graphique_performance_cumulee(data, tickers_selection=None, fichier_sortie="
     # Sous-ensemble des données pour les titres sélectionnés
     selected_data = data[tickers_selection]
     
-    # Normalisation des prix à 100 pour le premier jour
-    normalized_data = selected_data / selected_data.iloc[0] * 100
+    # Normalisation des prix à 100 pour le premier jour de cotation de chaque titre
+    normalized_data = selected_data / selected_data.bfill().iloc[0] * 100
     
     # Création du graphique
     plt.figure(figsize=(14, 8))
@@ -62,6 +65,7 @@ def graphique_performance_cumulee(data, tickers_selection=None, fichier_sortie="
     print(f"Graphique de performance cumulée sauvegardé dans {fichier_sortie}")
     plt.close()
 
+@instrumenter
 def graphique_distribution_sharpe(stats, fichier_sortie="resultats/distribution_sharpe.png"):
     """
     Crée un histogramme de la distribution des ratios de Sharpe.
@@ -103,7 +107,44 @@ def graphique_distribution_sharpe(stats, fichier_sortie="resultats/distribution_
     print(f"Graphique de distribution des ratios de Sharpe sauvegardé dans {fichier_sortie}")
     plt.close()
 
-def afficher_graphiques(data, stats=None, tickers_selection=None):
+@instrumenter
+def graphique_beta_glissant(beta_glissant, tickers_selection=None, fichier_sortie="resultats/beta_glissant.png"):
+    """
+    Crée un graphique de l'évolution du beta glissant pour une sélection de titres.
+    
+    Args:
+        beta_glissant (pandas.DataFrame): Bêtas glissants (dates × titres), issus de calculer_statistiques_glissantes
+        tickers_selection (list, optional): Liste des tickers à inclure dans le graphique
+        fichier_sortie (str): Chemin du fichier de sortie pour le graphique
+    """
+    if tickers_selection is None:
+        tickers_selection = list(beta_glissant.columns[:9])
+    tickers_selection = [t for t in tickers_selection if t in beta_glissant.columns]
+    
+    donnees = beta_glissant[tickers_selection].dropna(how="all")
+    
+    # Création du graphique
+    plt.figure(figsize=(14, 8))
+    for ticker in tickers_selection:
+        plt.plot(donnees.index, donnees[ticker], linewidth=1.5, alpha=0.8, label=ticker)
+    
+    plt.title('Beta glissant des titres sélectionnés par rapport à l\'indice', fontsize=14)
+    plt.xlabel('Date', fontsize=12)
+    plt.ylabel('Beta', fontsize=12)
+    plt.legend(loc='upper left', fontsize=10)
+    plt.grid(True, alpha=0.3)
+    
+    # Ligne de référence à 1 (même sensibilité que l'indice)
+    plt.axhline(y=1, color='black', linestyle='--', alpha=0.5)
+    
+    # Sauvegarde du graphique
+    plt.tight_layout()
+    plt.savefig(fichier_sortie, dpi=300)
+    print(f"Graphique du beta glissant sauvegardé dans {fichier_sortie}")
+    plt.close()
+
+@instrumenter
+def afficher_graphiques(data, stats=None, tickers_selection=None, file_rendu=None):
     """
     Crée tous les graphiques pour l'analyse.
     
@@ -111,7 +152,11 @@ def afficher_graphiques(data, stats=None, tickers_selection=None):
         data (pandas.DataFrame): DataFrame contenant les prix ajustés
         stats (dict, optional): Dictionnaire contenant les statistiques calculées
         tickers_selection (list, optional): Liste des tickers à inclure dans le graphique de performance
+        file_rendu (FileRendu, optional): File de rendu en arrière-plan ; sans file, les graphiques sont tracés immédiatement
     """
+    if file_rendu is None:
+        file_rendu = FileRendu(nb_processus=0)
+    
     # Créer le dossier de résultats si nécessaire
     creer_dossier_resultats()
     
@@ -122,9 +167,9 @@ def afficher_graphiques(data, stats=None, tickers_selection=None):
         stats = calculer_statistiques(data)
     
     # Graphique 1: Performance cumulée
-    graphique_performance_cumulee(data, tickers_selection)
+    file_rendu.soumettre(graphique_performance_cumulee, data, tickers_selection)
     
-    # Graphique 2: Distribution des ratios de Sharpe
-    graphique_distribution_sharpe(stats)
+    # Graphique 2: Distribution des ratios de Sharpe (seules les statistiques globales sont transmises)
+    file_rendu.soumettre(graphique_distribution_sharpe, {"stats_globales": stats["stats_globales"]})
     
-    print("Génération des graphiques terminée")
+    print("Génération des graphiques lancée")
@@ -0,0 +1,86 @@
+# visualisation/rendu.py
+import os
+import sys
+
+# Backend non interactif : aucun graphique n'ouvre de fenêtre ni ne bloque l'exécution.
+# Sans importer matplotlib (lent) : la variable d'environnement est lue à son premier import,
+# y compris dans les processus de rendu qui en héritent.
+if "matplotlib" in sys.modules:
+    sys.modules["matplotlib"].use("Agg")
+else:
+    os.environ["MPLBACKEND"] = "Agg"
+
+from concurrent.futures import ProcessPoolExecutor
+
+def parametres_heatmap(nb_titres):
+    """
+    Choisit les options de rendu d'une heatmap selon la taille de la matrice.
+
+    Les annotations (un texte par cellule) et les bordures ne sont conservées que
+    pour les petites matrices ; au-delà, la grille est rastérisée et la
+    résolution réduite pour que le rendu reste rapide.
+
+    Args:
+        nb_titres (int): Nombre de lignes (et de colonnes) de la matrice
+
+    Returns:
+        dict: annot, linewidths, rasterized et dpi
+    """
+    return {
+        "annot": nb_titres <= 30,
+        "linewidths": 0.5 if nb_titres <= 50 else 0,
+        "rasterized": nb_titres > 100,
+        "dpi": 300 if nb_titres <= 50 else (150 if nb_titres <= 200 else 100),
+    }
+
+class FileRendu:
+    """
+    File de génération de graphiques exécutée en arrière-plan.
+
+    Les fonctions de tracé sont soumises à un pool de processus (pyplot n'étant
+    pas utilisable depuis plusieurs threads) pendant que le calcul continue ;
+    attendre() bloque jusqu'à ce que tous les fichiers soient écrits.
+
+    Args:
+        nb_processus (int, optional): Nombre de processus de rendu (2 par défaut, 0 pour un rendu immédiat sur place)
+    """
+
+    def __init__(self, nb_processus=2):
+        self.nb_processus = nb_processus
+        self._pool = None
+        self._taches = []
+
+    def soumettre(self, fonction, *args, **kwargs):
+        """Ajoute un graphique à la file ; la fonction et ses arguments doivent être sérialisables"""
+        if self.nb_processus == 0:
+            fonction(*args, **kwargs)
+            return
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.nb_processus)
+        self._taches.append((fonction.__name__, self._pool.submit(fonction, *args, **kwargs)))
+
+    def attendre(self):
+        """
+        Attend la fin de tous les graphiques soumis.
+
+        Returns:
+            int: Nombre de graphiques en échec
+        """
+        echecs = 0
+        for nom, tache in self._taches:
+            try:
+                tache.result()
+            except Exception as erreur:
+                echecs += 1
+                print(f"Échec du graphique {nom} : {erreur}")
+        self._taches = []
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        return echecs
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.attendre()